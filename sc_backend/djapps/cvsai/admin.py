@@ -1,6 +1,13 @@
 from django.contrib import admin
 
-from cvsai.models import Contact, Resume, ResumeSkill, Skill
+from cvsai.models import (
+    Contact,
+    Resume,
+    ResumeSkill,
+    ResumeTranslation,
+    Skill,
+    TranslationMemoryEntry,
+)
 
 
 @admin.register(Skill)
@@ -20,7 +27,7 @@ class ResumeAdmin(admin.ModelAdmin):
     """Admin view for the Resume model."""
 
     list_display = ('firstname', 'lastname', 'created_at')
-    search_fields = ('firstname', 'lastname')
+    search_fields = ('firstname', 'lastname', 'external_id')
     ordering = ('-created_at',)
     list_filter = ('created_at',)
     list_per_page = 20
@@ -56,3 +63,28 @@ class ContactAdmin(admin.ModelAdmin):
     list_display_links = ('contact_type', 'value')
     raw_id_fields = ('resume',)
     autocomplete_fields = ('resume',)
+
+
+@admin.register(ResumeTranslation)
+class ResumeTranslationAdmin(admin.ModelAdmin):
+    """Admin view for the ResumeTranslation model."""
+
+    list_display = ('resume', 'language', 'provider', 'updated_at')
+    list_filter = ('language', 'provider')
+    search_fields = ('resume__firstname', 'resume__lastname')
+    ordering = ('resume',)
+    list_per_page = 20
+    raw_id_fields = ('resume',)
+    readonly_fields = ('created_at', 'updated_at')
+
+
+@admin.register(TranslationMemoryEntry)
+class TranslationMemoryEntryAdmin(admin.ModelAdmin):
+    """Admin view for the TranslationMemoryEntry model."""
+
+    list_display = ('provider', 'source_language', 'target_language', 'last_used_at')
+    list_filter = ('provider', 'target_language')
+    search_fields = ('translated_text',)
+    ordering = ('-last_used_at',)
+    list_per_page = 20
+    readonly_fields = ('key', 'created_at', 'last_used_at')
@@ -17,7 +17,33 @@ urlpatterns = [
         api_views.ResumeRetrieveUpdateDestroyAPIView.as_view(),
         name='resume-detail',
     ),
+    path('resumes/bulk/', api_views.resume_bulk_upsert_api, name='resume-bulk'),
     path('resumes/<int:pk>/pdf/', api_views.resume_pdf_api, name='resume-pdf'),
+    path(
+        'resumes/<int:pk>/translations/<str:language>/',
+        api_views.resume_translation_api,
+        name='resume-translation',
+    ),
+    path(
+        'resumes/export/',
+        api_views.resume_pdf_export_api,
+        name='resume-export',
+    ),
+    path(
+        'resumes/export/<uuid:export_id>/',
+        api_views.resume_pdf_export_download_api,
+        name='resume-export-download',
+    ),
+    path(
+        'resumes/send-email/',
+        api_views.resume_email_batch_api,
+        name='resume-send-email',
+    ),
+    path(
+        'translation/metrics/',
+        api_views.translation_metrics_api,
+        name='translation-metrics',
+    ),
     # Skill endpoints
     path(
         'skills/', api_views.SkillListCreateAPIView.as_view(), name='skill-list-create'
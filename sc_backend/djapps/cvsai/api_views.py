@@ -1,26 +1,150 @@
+import json
+import uuid
+
+from django.conf import settings
+from django.http import FileResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.functional import cached_property
+
+from cvsai.constants import SUPPORTED_LANGUAGES
 from cvsai.models import Resume, Skill
+from cvsai.pagination import ResumeKeysetPagination, SkillKeysetPagination
+from cvsai.pdf_export import (
+    EXPORT_DONE,
+    EXPORT_FAILED,
+    EXPORT_QUEUED,
+    delete_export_state,
+    export_queryset,
+    get_export_path,
+    get_export_state,
+    iter_resume_pdf_zip,
+    set_export_state,
+)
+from cvsai.resume_bulk import (
+    RESULT_CREATED,
+    RESULT_INVALID,
+    RESULT_UPDATED,
+    bulk_upsert_resumes,
+)
 from cvsai.serializers import (
+    CVEmailBatchSerializer,
     ResumeCreateUpdateSerializer,
+    ResumePDFExportSerializer,
     ResumeSerializer,
     SkillSerializer,
 )
+from cvsai.tasks import export_resume_pdfs, send_cv_pdf_emails
+from cvsai.translation_limits import provider_metrics
+from cvsai.translation_memory import get_translation_memory
+from cvsai.translation_store import get_resume_translation
 from cvsai.views import download_resume_pdf
-from rest_framework import generics
-from rest_framework.decorators import api_view
+from rest_framework import generics, status
+from rest_framework.decorators import api_view, parser_classes
+from rest_framework.exceptions import ParseError, ValidationError
+from rest_framework.parsers import BaseParser, JSONParser
 from rest_framework.response import Response
 
 
-class ResumeListCreateAPIView(generics.ListCreateAPIView):
+class NDJSONParser(BaseParser):
+    """Parse newline-delimited JSON into a list, one item per line."""
+
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        items = []
+        for number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError as exc:
+                raise ParseError(f'NDJSON parse error on line {number}: {exc}') from exc
+        return items
+
+
+# nested ResumeSerializer fields and the relations they need prefetched
+RESUME_NESTED_PREFETCH = {
+    'skills': 'resumeskill_set__skill',
+    'projects': 'projects',
+    'contacts': 'contacts',
+}
+# columns of the computed ResumeSerializer fields
+RESUME_FIELD_COLUMNS = {'full_name': ('firstname', 'lastname')}
+
+
+def _split_param(value):
+    return [name.strip() for name in (value or '').split(',') if name.strip()]
+
+
+class ResumeFieldsMixin:
+    """
+    Sparse fieldsets for resume GET requests: ``?fields=`` chooses top-level
+    fields and ``?expand=skills,projects,contacts`` adds nested ones. Only the
+    columns and relations of the chosen fields are loaded.
+
+    Without either parameter every field is returned.
+    """
+
+    @cached_property
+    def resume_fields(self):
+        """Names of the ResumeSerializer fields to return, None for all."""
+        params = self.request.query_params
+        if self.request.method != 'GET' or not (
+            'fields' in params or 'expand' in params
+        ):
+            return None
+
+        all_fields = ResumeSerializer.Meta.fields
+        fields = _split_param(params.get('fields')) or [
+            name for name in all_fields if name not in RESUME_NESTED_PREFETCH
+        ]
+        expand = _split_param(params.get('expand'))
+        errors = {}
+        unknown = [name for name in fields if name not in all_fields]
+        if unknown:
+            errors['fields'] = [f"Unknown fields: {', '.join(unknown)}"]
+        unknown = [name for name in expand if name not in RESUME_NESTED_PREFETCH]
+        if unknown:
+            errors['expand'] = [f"Cannot expand: {', '.join(unknown)}"]
+        if errors:
+            raise ValidationError(errors)
+        return set(fields) | set(expand)
+
+    def get_queryset(self):
+        fields = self.resume_fields
+        if fields is None:
+            return super().get_queryset()
+
+        # the keyset pagination reads id and created_at
+        columns = {'id', 'created_at'}
+        prefetch = []
+        for name in fields:
+            if name in RESUME_NESTED_PREFETCH:
+                prefetch.append(RESUME_NESTED_PREFETCH[name])
+            else:
+                columns.update(RESUME_FIELD_COLUMNS.get(name, (name,)))
+        return Resume.objects.only(*columns).prefetch_related(*prefetch)
+
+    def get_serializer(self, *args, **kwargs):
+        if self.get_serializer_class() is ResumeSerializer:
+            kwargs.setdefault('fields', self.resume_fields)
+        return super().get_serializer(*args, **kwargs)
+
+
+class ResumeListCreateAPIView(ResumeFieldsMixin, generics.ListCreateAPIView):
     """
     List all resumes or create a new resume.
 
-    GET /api/resumes/ - List all resumes
+    GET /api/resumes/ - List all resumes, newest first (?cursor= pages,
+    ?page=N for page numbers, ?fields= and ?expand= to choose fields)
     POST /api/resumes/ - Create new resume
     """
 
     queryset = Resume.objects.all().prefetch_related(
         'resumeskill_set__skill', 'projects', 'contacts'
     )
+    pagination_class = ResumeKeysetPagination
 
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -28,11 +152,15 @@ class ResumeListCreateAPIView(generics.ListCreateAPIView):
         return ResumeSerializer
 
 
-class ResumeRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
+# the ancestors are DRF's generic view mixins
+# pylint: disable-next=too-many-ancestors
+class ResumeRetrieveUpdateDestroyAPIView(
+    ResumeFieldsMixin, generics.RetrieveUpdateDestroyAPIView
+):
     """
     Retrieve, update or delete a resume.
 
-    GET /api/resumes/{id}/ - Retrieve resume
+    GET /api/resumes/{id}/ - Retrieve resume (?fields= and ?expand=)
     PUT /api/resumes/{id}/ - Update resume
     PATCH /api/resumes/{id}/ - Partial update resume
     DELETE /api/resumes/{id}/ - Delete resume
@@ -52,12 +180,14 @@ class SkillListCreateAPIView(generics.ListCreateAPIView):
     """
     List all skills or create a new skill.
 
-    GET /api/skills/ - List all skills
+    GET /api/skills/ - List all skills by name (?cursor= pages, ?page=N for
+    page numbers)
     POST /api/skills/ - Create new skill
     """
 
     queryset = Skill.objects.all()
     serializer_class = SkillSerializer
+    pagination_class = SkillKeysetPagination
 
 
 @api_view(['GET'])
@@ -70,6 +200,192 @@ def resume_pdf_api(request, pk):
     return download_resume_pdf(request, pk)
 
 
+@api_view(['POST'])
+def resume_pdf_export_api(request):
+    """
+    Export many resumes as one ZIP archive of PDFs.
+
+    POST /api/resumes/export/ - {"ids": [...]} and/or {"search": ..., "skill": ...}
+
+    The archive is streamed while PDFs are rendered; with {"mode": "async"}
+    it is built by a Celery task and 202 is returned with its download URL.
+    """
+    serializer = ResumePDFExportSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    params = serializer.validated_data
+
+    queryset = export_queryset(
+        ids=params.get('ids'), search=params.get('search'), skill=params.get('skill')
+    )
+    resume_ids = list(queryset.values_list('id', flat=True))
+    max_resumes = getattr(settings, 'CVSAI_PDF_EXPORT_MAX_RESUMES', 5000)
+    if not resume_ids:
+        return Response(
+            {'error': 'No resumes match the export'}, status=status.HTTP_404_NOT_FOUND
+        )
+    if len(resume_ids) > max_resumes:
+        return Response(
+            {'error': f'At most {max_resumes} resumes can be exported at once'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    renderer = params.get('renderer')
+    if params['mode'] == 'async':
+        export_id = str(uuid.uuid4())
+        set_export_state(export_id, EXPORT_QUEUED, count=len(resume_ids))
+        try:
+            export_resume_pdfs.delay(export_id, resume_ids, renderer)
+        except Exception:
+            delete_export_state(export_id)
+            raise
+        download_url = reverse(
+            'cvsai_api:resume-export-download', kwargs={'export_id': export_id}
+        )
+        return Response(
+            {
+                'status': 'queued',
+                'export_id': export_id,
+                'count': len(resume_ids),
+                'download_url': request.build_absolute_uri(download_url),
+            },
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+    response = StreamingHttpResponse(
+        iter_resume_pdf_zip(export_queryset(ids=resume_ids), renderer),
+        content_type='application/zip',
+    )
+    response['Content-Disposition'] = 'attachment; filename="resumes.zip"'
+    return response
+
+
+@api_view(['GET'])
+def resume_pdf_export_download_api(request, export_id):
+    """
+    Download an archive built by an async export.
+
+    GET /api/resumes/export/{export_id}/ - 202 while the archive is being built,
+    500 with the error when the export failed, 404 for unknown or expired ids
+    """
+    export_id = str(export_id)
+    path = get_export_path(export_id)
+    if not path.exists():
+        state = get_export_state(export_id)
+        if state is None or state['status'] == EXPORT_DONE:
+            # a done export whose archive was removed has expired
+            return Response(
+                {'error': 'Export not found'}, status=status.HTTP_404_NOT_FOUND
+            )
+        if state['status'] == EXPORT_FAILED:
+            return Response(
+                {
+                    'status': EXPORT_FAILED,
+                    'export_id': export_id,
+                    'error': state['error'],
+                },
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+        return Response(
+            {'status': state['status'], 'export_id': export_id},
+            status=status.HTTP_202_ACCEPTED,
+        )
+    return FileResponse(
+        open(path, 'rb'),  # pylint: disable=consider-using-with
+        as_attachment=True,
+        filename='resumes.zip',
+        content_type='application/zip',
+    )
+
+
+@api_view(['POST'])
+def resume_email_batch_api(request):
+    """
+    Email resume PDFs to many recipients in one Celery task.
+
+    POST /api/resumes/send-email/ - {"resume_ids": [...], "recipients": [...]}
+    and/or {"deliveries": [{"resume_id": 1, "email": "..."}]}
+    """
+    serializer = CVEmailBatchSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    pairs = serializer.validated_data['pairs']
+
+    task = send_cv_pdf_emails.delay([list(pair) for pair in pairs])
+    return Response(
+        {'status': 'queued', 'task_id': task.id, 'count': len(pairs)},
+        status=status.HTTP_202_ACCEPTED,
+    )
+
+
+@api_view(['POST'])
+@parser_classes([JSONParser, NDJSONParser])
+def resume_bulk_upsert_api(request):
+    """
+    Create or update many resumes in one request.
+
+    POST /api/resumes/bulk/ - a JSON array of resume payloads (as for POST
+    /api/resumes/), or one payload per line as application/x-ndjson. A
+    payload with the external_id of an existing resume updates it. Invalid
+    payloads are reported and skipped, the others are saved.
+    """
+    payloads = request.data
+    if not isinstance(payloads, list):
+        return Response(
+            {'error': 'Expected a JSON array or NDJSON of resumes'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    max_resumes = getattr(settings, 'CVSAI_BULK_MAX_RESUMES', 1000)
+    if len(payloads) > max_resumes:
+        return Response(
+            {'error': f'At most {max_resumes} resumes can be sent at once'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    results = bulk_upsert_resumes(payloads)
+    counts = {RESULT_CREATED: 0, RESULT_UPDATED: 0, RESULT_INVALID: 0}
+    for result in results:
+        counts[result['status']] += 1
+    return Response({**counts, 'results': results})
+
+
+@api_view(['GET'])
+def resume_translation_api(request, pk, language):
+    """
+    Translated resume content.
+
+    GET /api/resumes/{id}/translations/{language}/ - served from the stored
+    translation, only fields changed since it was stored are translated
+    """
+    if language not in SUPPORTED_LANGUAGES:
+        return Response(
+            {'error': f'Language {language} is not supported'},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    resume = get_object_or_404(
+        Resume.objects.prefetch_related(
+            'resumeskill_set__skill', 'projects', 'contacts'
+        ),
+        pk=pk,
+    )
+    return Response(get_resume_translation(resume, language))
+
+
+@api_view(['GET'])
+def translation_metrics_api(request):
+    """
+    Translation provider metrics of the serving process.
+
+    GET /api/translation/metrics/ - circuit breaker state (closed, open,
+    half_open) and counters, rate limiter counters and translation memory
+    hits per provider
+    """
+    return Response(
+        {
+            'providers': provider_metrics(),
+            'translation_memory': dict(get_translation_memory().stats),
+        }
+    )
+
+
 @api_view(['GET'])
 def api_root(request):
     """
@@ -82,7 +398,12 @@ def api_root(request):
                 'resumes': '/api/resumes/',
                 'skills': '/api/skills/',
                 'resume_detail': '/api/resumes/{id}/',
+                'resume_bulk': '/api/resumes/bulk/',
                 'resume_pdf': '/api/resumes/{id}/pdf/',
+                'resume_pdf_export': '/api/resumes/export/',
+                'resume_send_email': '/api/resumes/send-email/',
+                'resume_translation': '/api/resumes/{id}/translations/{language}/',
+                'translation_metrics': '/api/translation/metrics/',
             },
             'documentation': {
                 'create_resume': {
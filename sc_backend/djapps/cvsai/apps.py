@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CvsaiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'cvsai'
+
+    def ready(self):
+        # pylint: disable=import-outside-toplevel,unused-import
+        from cvsai import signals  # noqa: F401
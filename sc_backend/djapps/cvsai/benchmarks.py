@@ -0,0 +1,395 @@
+import datetime
+import itertools
+import json
+import math
+import multiprocessing
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.utils import timezone
+
+import reportlab
+import xhtml2pdf
+
+from cvsai.constants import RESUME_PDF_TEMPLATE, SKILL_LEVELS
+from cvsai.pdf_cache import template_hash
+from cvsai.pdf_renderers import (
+    REPORTLAB_LAYOUT_VERSION,
+    render_resume_pdf,
+    resume_render_job,
+)
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+LOREM = (
+    'Designed, built and operated Django services with Celery workers, '
+    'PostgreSQL and Redis; mentored engineers and reviewed code. '
+)
+
+
+def lorem(size):
+    """Return roughly ``size`` bytes of text."""
+    return (LOREM * (size // len(LOREM) + 1))[:size]
+
+
+def build_synthetic_resume(projects=5, skills=10, bio_size=1000):
+    """
+    Create a resume with the given number of projects and skills and a bio of
+    ``bio_size`` bytes. Call inside a transaction that is rolled back.
+    """
+    # imported here: measure_rss loads this module in a process without Django
+    # pylint: disable-next=import-outside-toplevel
+    from cvsai.models import Contact, Project, Resume, ResumeSkill, Skill
+
+    resume = Resume.objects.create(
+        firstname='Bench',
+        lastname=f'Mark {projects}x{skills}x{bio_size}',
+        title='Senior Python Developer',
+        bio=lorem(bio_size),
+    )
+    Contact.objects.bulk_create(
+        [
+            Contact(resume=resume, contact_type='email', value='bench@example.com'),
+            Contact(resume=resume, contact_type='github', value='https://github.com/b'),
+        ]
+    )
+    skill_objects = [
+        Skill.objects.get_or_create(name=f'Benchmark skill {i}')[0]
+        for i in range(skills)
+    ]
+    ResumeSkill.objects.bulk_create(
+        [
+            ResumeSkill(resume=resume, skill=skill, level=SKILL_LEVELS[i % 4][0])
+            for i, skill in enumerate(skill_objects)
+        ]
+    )
+    Project.objects.bulk_create(
+        [
+            Project(
+                resume=resume,
+                title=f'Project {i}',
+                description=lorem(400),
+                url=f'https://example.com/projects/{i}',
+                start_date=datetime.date(2020, 1, 1) + datetime.timedelta(days=30 * i),
+                end_date=None if i % 3 else datetime.date(2025, 1, 1),
+            )
+            for i in range(projects)
+        ]
+    )
+    return (
+        Resume.objects.filter(pk=resume.pk)
+        .prefetch_related('resumeskill_set__skill', 'projects', 'contacts')
+        .get()
+    )
+
+
+def measure(func, iterations=5):
+    """
+    Call ``func`` ``iterations`` times after one warm-up call.
+
+    Return wall and CPU time statistics in milliseconds, the tracemalloc peak
+    of a single call in KiB and the size of the last result.
+    """
+    func()  # warm-up: imports, font metrics, template compilation
+
+    timings = []
+    cpu_timings = []
+    for _ in range(iterations):
+        started, cpu_started = time.perf_counter(), time.process_time()
+        result = func()
+        timings.append((time.perf_counter() - started) * 1000)
+        cpu_timings.append((time.process_time() - cpu_started) * 1000)
+
+    tracemalloc.start()
+    try:
+        func()
+        _current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'wall_ms_median': round(statistics.median(timings), 2),
+        'wall_ms_min': round(min(timings), 2),
+        'wall_ms_max': round(max(timings), 2),
+        'cpu_ms_median': round(statistics.median(cpu_timings), 2),
+        'peak_kib': round(peak / 1024, 1),
+        'size_bytes': len(result),
+    }
+
+
+# (name, projects, skills, bio size in bytes), smallest to largest
+SIZE_LADDER = (
+    ('empty', 0, 0, 100),
+    ('small', 5, 10, 500),
+    ('medium', 25, 25, 2000),
+    ('large', 100, 50, 10_000),
+    ('xlarge', 200, 100, 50_000),
+)
+GRID_PROJECTS = (0, 10, 50, 200)
+GRID_SKILLS = (0, 10, 50, 100)
+GRID_BIO_SIZES = (100, 1000, 10_000, 50_000)
+
+
+def size_ladder():
+    """Benchmark cases of increasing size, one step per SIZE_LADDER entry."""
+    return [
+        {'name': name, 'projects': projects, 'skills': skills, 'bio_size': bio}
+        for name, projects, skills, bio in SIZE_LADDER
+    ]
+
+
+def size_grid(projects=GRID_PROJECTS, skills=GRID_SKILLS, bio_sizes=GRID_BIO_SIZES):
+    """Benchmark cases for every combination of the given sizes."""
+    return [
+        {'name': f'p{p}-s{s}-b{b}', 'projects': p, 'skills': s, 'bio_size': b}
+        for p, s, b in itertools.product(projects, skills, bio_sizes)
+    ]
+
+
+def _max_rss_kib():
+    """Peak resident set size of this process in KiB."""
+    try:
+        # ru_maxrss of a child starts at its parent's value on Linux,
+        # VmHWM is reset on exec
+        with open('/proc/self/status', encoding='ascii') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes elsewhere
+    return usage // 1024 if sys.platform == 'darwin' else usage
+
+
+def _rss_probe(func, arg):
+    before = _max_rss_kib()
+    func(arg)
+    after = _max_rss_kib()
+    return {'rss_peak_kib': after, 'rss_growth_kib': after - before}
+
+
+def measure_rss(func, arg):
+    """
+    Run ``func(arg)`` once in a fresh process and return its peak RSS and how
+    much the render grew it, in KiB. ``func`` must be a picklable top-level
+    function, as returned by pdf_renderers.resume_render_job.
+
+    RSS is a high-water mark of the whole process, so it cannot be measured
+    for several renders in the same process.
+    """
+    if resource is None:
+        return {'rss_peak_kib': None, 'rss_growth_kib': None}
+    with ProcessPoolExecutor(
+        max_workers=1, mp_context=multiprocessing.get_context('spawn')
+    ) as executor:
+        return executor.submit(_rss_probe, func, arg).result()
+
+
+def run_suite(cases, renderers, iterations=3, rss=True):
+    """
+    Benchmark every renderer on every case and return a list of result rows.
+
+    Builds synthetic resumes, so call inside a transaction that is rolled back.
+    """
+    results = []
+    for case in cases:
+        resume = build_synthetic_resume(
+            case['projects'], case['skills'], case['bio_size']
+        )
+        for renderer in renderers:
+            row = dict(case, renderer=renderer)
+            row.update(
+                measure(
+                    lambda name=renderer, resume=resume: render_resume_pdf(
+                        resume, name, inline=True
+                    ),
+                    iterations,
+                )
+            )
+            if rss:
+                row.update(measure_rss(*resume_render_job(resume, renderer)))
+            results.append(row)
+    return results
+
+
+def environment_info():
+    """Versions that influence the results, stored next to them."""
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'django': django.get_version(),
+        'xhtml2pdf': xhtml2pdf.__version__,
+        'reportlab': reportlab.Version,
+        'template_hash': template_hash(RESUME_PDF_TEMPLATE)[:12],
+        'reportlab_layout_version': REPORTLAB_LAYOUT_VERSION,
+    }
+
+
+def write_report(results, options, stdout, **sections):
+    """
+    Write the JSON report of a benchmark command: the results with the run
+    date, iterations, environment and extra ``sections``, to the ``output``
+    option file or to ``stdout``.
+    """
+    report = {
+        'created_at': timezone.now().isoformat(),
+        'iterations': options['iterations'],
+        'environment': environment_info(),
+        **sections,
+        'results': results,
+    }
+    if options['output']:
+        with open(options['output'], 'w', encoding='utf-8') as file_obj:
+            json.dump(report, file_obj, indent=2)
+    else:
+        stdout.write(json.dumps(report, indent=2))
+
+
+COMPARED_METRICS = ('cpu_ms_median', 'peak_kib', 'rss_growth_kib')
+
+
+def find_regressions(results, baseline, threshold=1.25, metrics=COMPARED_METRICS):
+    """
+    Compare results with a baseline run (same row format) and return a
+    description of every metric that grew by more than ``threshold`` times.
+    """
+    baseline_rows = {(row['name'], row['renderer']): row for row in baseline}
+    regressions = []
+    for row in results:
+        previous = baseline_rows.get((row['name'], row['renderer']))
+        if previous is None:
+            continue
+        for metric in metrics:
+            old, new = previous.get(metric), row.get(metric)
+            if not old or new is None:
+                continue
+            if new > old * threshold:
+                regressions.append(
+                    f"{row['name']}/{row['renderer']} {metric}: "
+                    f"{old} -> {new} (x{new / old:.2f})"
+                )
+    return regressions
+
+
+TRANSLATION_SCENARIOS = ('content', 'view')
+# fake server counters reported per translated resume
+TRANSLATION_COUNTERS = (
+    ('requests', 'calls_per_resume'),
+    ('texts', 'texts_per_resume'),
+    ('errors', 'errors_per_resume'),
+    ('rate_limited', 'rate_limited_per_resume'),
+    ('max_tokens', 'max_tokens_per_resume'),
+    ('completion_tokens', 'completion_tokens_per_resume'),
+)
+
+
+def percentile(values, percent):
+    """Nearest-rank percentile of values."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(len(ordered) * percent / 100) - 1)]
+
+
+def _translation_calls(resume, target_language):
+    """Return the benchmarked calls of TRANSLATION_SCENARIOS by name."""
+    # imported here: measure_rss loads this module in a process without Django
+    # pylint: disable=import-outside-toplevel
+    from django.test import RequestFactory
+
+    from cvsai.models import ResumeTranslation
+    from cvsai.translation_services import translate_cv_content
+    from cvsai.views import translate_cv
+
+    factory = RequestFactory()
+
+    def translate_view():
+        ResumeTranslation.objects.filter(resume=resume).delete()
+        request = factory.post(
+            f'/cv/{resume.pk}/translate/',
+            json.dumps({'language': target_language}),
+            content_type='application/json',
+        )
+        response = translate_cv(request, resume.pk)
+        if response.status_code != 200:
+            raise RuntimeError(f"translate_cv failed: {response.content!r}")
+
+    return {
+        'content': lambda: translate_cv_content(resume, target_language),
+        'view': translate_view,
+    }
+
+
+def _timings(call, iterations):
+    """Return the wall time of ``iterations`` calls in milliseconds."""
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def run_translation_benchmark(
+    resume,
+    providers,
+    server,
+    *,
+    scenarios=TRANSLATION_SCENARIOS,
+    iterations=10,
+    target_language='kw',
+    memory=False,
+):
+    """
+    Translate the resume ``iterations`` times (after one warm-up) with every
+    provider and scenario, the providers answered by ``server`` (a running
+    FakeTranslationServer), and return a list of result rows: p50/p95/max
+    latency in milliseconds and the server counters per resume.
+
+    ``content`` calls translate_cv_content, ``view`` POSTs to the translate_cv
+    view after deleting its stored translation. The translation memory is
+    disabled unless ``memory``, or every call after the first would be a hit.
+    """
+    # imported here: measure_rss loads this module in a process without Django
+    # pylint: disable=import-outside-toplevel
+    from django.test import override_settings
+
+    from cvsai.translation_limits import reset_provider_limits
+
+    calls = _translation_calls(resume, target_language)
+    results = []
+    for provider in providers:
+        for scenario in scenarios:
+            with override_settings(
+                TRANSLATION_SERVICE=provider,
+                TRANSLATION_FALLBACK_CHAIN=[],
+                TRANSLATION_MEMORY_ENABLED=memory,
+                **server.settings,
+            ):
+                # no circuit opened by a previous run
+                reset_provider_limits()
+                calls[scenario]()  # warm-up: connections, lazy imports
+                before = server.stats.copy()
+                timings = _timings(calls[scenario], iterations)
+
+            row = {
+                'provider': provider,
+                'scenario': scenario,
+                'iterations': iterations,
+                'p50_ms': round(percentile(timings, 50), 2),
+                'p95_ms': round(percentile(timings, 95), 2),
+                'max_ms': round(max(timings), 2),
+            }
+            for counter, name in TRANSLATION_COUNTERS:
+                count = server.stats[counter] - before[counter]
+                row[name] = round(count / iterations, 2)
+            results.append(row)
+    return results
@@ -1,5 +1,7 @@
 from django.utils.translation import gettext_lazy as _
 
+RESUME_PDF_TEMPLATE = 'cvsai/resume_pdf.html'
+
 SL_BEGINNER = 'beginner'
 SL_INTERMEDIATE = 'intermediate'
 SL_ADVANCED = 'advanced'
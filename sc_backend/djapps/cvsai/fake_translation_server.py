@@ -0,0 +1,186 @@
+import http.server
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from urllib.parse import parse_qsl
+
+from cvsai.text_chunks import count_tokens
+from cvsai.translation_limits import TokenBucket
+
+GOOGLE_PATH = '/language/translate/v2'
+OPENAI_PATH = '/v1/chat/completions'
+
+TARGET_LANGUAGE_RE = re.compile(r' to ([\w-]+)\. ')
+
+
+def fake_translation(text, target_language):
+    """Translation answered by the fake server."""
+    return f'[FAKE {target_language.upper()}] {text}'
+
+
+class FakeTranslationHandler(http.server.BaseHTTPRequestHandler):
+    """Google Translate v2 and OpenAI chat completions stand-in."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        server = self.server
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        server.count('requests')
+
+        if server.limiter is not None and not server.limiter.acquire(0):
+            server.count('rate_limited')
+            self.answer(429, {'error': 'rate limited'}, {'Retry-After': '1'})
+            return
+        server.sleep()
+        if server.fail():
+            server.count('errors')
+            self.answer(503, {'error': 'unavailable'})
+            return
+
+        if self.path.startswith(GOOGLE_PATH):
+            self.answer(200, self.google(body.decode()))
+        elif self.path.startswith(OPENAI_PATH):
+            self.answer(200, self.openai(json.loads(body)))
+        else:
+            self.answer(404, {'error': 'not found'})
+
+    def google(self, body):
+        params = parse_qsl(body)
+        target = dict(params).get('target', 'xx')
+        texts = [value for name, value in params if name == 'q']
+        self.server.count('texts', len(texts))
+        return {
+            'data': {
+                'translations': [
+                    {'translatedText': fake_translation(text, target)} for text in texts
+                ]
+            }
+        }
+
+    def openai(self, data):
+        prompt = data['messages'][-1]['content']
+        match = TARGET_LANGUAGE_RE.search(prompt)
+        target = match.group(1) if match else 'xx'
+        source = prompt.split('\n\n', 1)[1]
+        if data.get('response_format', {}).get('type') == 'json_object':
+            texts = json.loads(source)
+            content = json.dumps(
+                {'translations': [fake_translation(text, target) for text in texts]},
+                ensure_ascii=False,
+            )
+        else:
+            texts = [source]
+            content = fake_translation(source, target)
+
+        completion_tokens = count_tokens(content)
+        self.server.count('texts', len(texts))
+        self.server.count('max_tokens', data.get('max_tokens', 0))
+        self.server.count('completion_tokens', completion_tokens)
+        return {
+            'choices': [{'message': {'role': 'assistant', 'content': content}}],
+            'usage': {
+                'prompt_tokens': sum(
+                    count_tokens(message['content']) for message in data['messages']
+                ),
+                'completion_tokens': completion_tokens,
+            },
+        }
+
+    def answer(self, status, payload, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except BrokenPipeError:
+            # the client gave up waiting (read timeout)
+            self.close_connection = True
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        if self.server.verbose:
+            super().log_message(*args)
+
+
+class FakeTranslationServer(http.server.ThreadingHTTPServer):
+    """
+    Local stand-in of the Google Translate v2 and OpenAI chat completions
+    endpoints, for load tests and benchmarks without paid API calls.
+
+    Every request waits ``latency`` seconds plus up to ``jitter`` seconds
+    either way, fails with 503 at ``error_rate`` (0-1) and is answered with
+    429 over ``rate_limit`` requests per second (0 for no limit). Requests,
+    translated texts, errors and OpenAI tokens are counted in ``stats``.
+    """
+
+    daemon_threads = True
+    # log every request like http.server does
+    verbose = False
+
+    def __init__(
+        self,
+        *,
+        address=('127.0.0.1', 0),
+        latency=0.0,
+        jitter=0.0,
+        error_rate=0.0,
+        rate_limit=0,
+        seed=None,
+    ):
+        super().__init__(address, FakeTranslationHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.limiter = TokenBucket(rate_limit, rate_limit) if rate_limit else None
+        self.stats = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    @property
+    def settings(self):
+        """Settings pointing both providers at this server."""
+        return {
+            'GOOGLE_TRANSLATE_URL': self.url + GOOGLE_PATH,
+            'GOOGLE_TRANSLATE_API_KEY': 'fake',
+            'OPENAI_API_URL': self.url + OPENAI_PATH,
+            'OPENAI_API_KEY': 'fake',
+        }
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.stats[name] += value
+
+    def sleep(self):
+        with self._lock:
+            delay = self.latency + self._random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+    def fail(self):
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+    def start(self):
+        """Serve from a background thread."""
+        self._thread = threading.Thread(
+            target=self.serve_forever, args=(0.05,), daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,162 @@
+import functools
+import logging
+import os
+import smtplib
+import threading
+import time
+
+from django.conf import settings
+from django.core.mail import get_connection
+
+from celery.signals import worker_process_shutdown
+
+logger = logging.getLogger(__name__)
+
+
+class PersistentMailConnection:
+    """
+    Mail connection opened lazily and kept open across Celery tasks of a
+    worker process, so only the first email pays connect + STARTTLS + AUTH.
+
+    Before reuse the connection is dropped and opened again when:
+
+    * it has been idle for more than ``idle_timeout`` seconds (servers close
+      idle SMTP sessions, e.g. postfix after 300s);
+    * ``max_messages`` were sent over it (servers cap messages per session);
+    * it fails a NOOP health check, sent only when it has been idle for
+      more than ``health_check_after`` seconds (back-to-back sends of a
+      batch skip the round trip);
+    * the process forked since it was opened.
+
+    A send that hits a connection dropped by the server is retried once on a
+    new connection.
+    """
+
+    def __init__(
+        self,
+        idle_timeout=60,
+        max_messages=50,
+        connection_factory=None,
+        health_check_after=5,
+    ):
+        self.idle_timeout = idle_timeout
+        self.health_check_after = health_check_after
+        self.max_messages = max_messages
+        self.connection_factory = connection_factory or get_connection
+        self._connection = None
+        self._pid = None
+        self._sent = 0
+        self._last_used = 0
+        self._lock = threading.Lock()
+
+    def send_messages(self, messages):
+        """Send messages like a mail backend does, raising on failure."""
+        with self._lock:
+            try:
+                try:
+                    return self._send(messages)
+                except smtplib.SMTPServerDisconnected:
+                    logger.info("Mail server closed the connection, reconnecting")
+                    self._discard()
+                    return self._send(messages)
+            except smtplib.SMTPRecipientsRefused:
+                # the session itself is still fine
+                raise
+            except Exception:
+                self._discard()
+                raise
+
+    def close(self):
+        with self._lock:
+            self._discard()
+
+    def _send(self, messages):
+        connection = self._get_connection()
+        try:
+            return connection.send_messages(messages)
+        finally:
+            self._sent += len(messages)
+            self._last_used = time.monotonic()
+
+    def _get_connection(self):
+        if self._connection is not None and not self._is_reusable():
+            self._discard()
+        if self._connection is None:
+            connection = self.connection_factory()
+            connection.open()
+            self._connection = connection
+            self._pid = os.getpid()
+            self._sent = 0
+        return self._connection
+
+    def _is_reusable(self):
+        if self._pid != os.getpid():
+            return False
+        if self._sent >= self.max_messages:
+            return False
+        idle = time.monotonic() - self._last_used
+        if idle > self.idle_timeout:
+            return False
+        if idle <= self.health_check_after:
+            return True
+        smtp = getattr(self._connection, 'connection', None)
+        if not isinstance(smtp, smtplib.SMTP):
+            # non-SMTP backends (locmem, console, file) have nothing to check
+            return True
+        try:
+            return smtp.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def _discard(self):
+        connection, self._connection = self._connection, None
+        if connection is None:
+            return
+        if self._pid != os.getpid():
+            # the socket belongs to the parent process, do not QUIT it
+            return
+        try:
+            connection.close()
+        except (smtplib.SMTPException, OSError) as exc:
+            logger.debug("Error closing mail connection: %s", exc)
+
+
+@functools.lru_cache(maxsize=1)
+def get_worker_mail_connection():
+    """Return the mail connection shared by the tasks of this process."""
+    return PersistentMailConnection(
+        idle_timeout=getattr(settings, 'CVSAI_EMAIL_IDLE_TIMEOUT', 60),
+        max_messages=getattr(settings, 'CVSAI_EMAIL_BATCH_SIZE', 50),
+        health_check_after=getattr(settings, 'CVSAI_EMAIL_HEALTH_CHECK_AFTER', 5),
+    )
+
+
+@worker_process_shutdown.connect
+def close_worker_mail_connection(**kwargs):
+    """QUIT the SMTP session when the Celery worker process exits."""
+    # the connection opens lazily, getting it does not connect
+    get_worker_mail_connection().close()
+
+
+def send_messages_batched(messages, connection=None):
+    """
+    Send email messages over one mail connection instead of one per message.
+
+    ``connection`` defaults to the worker connection, which is reopened
+    every CVSAI_EMAIL_BATCH_SIZE messages and when the server drops it.
+    Return a list of ``(message, error)`` pairs, ``error`` is None for
+    delivered messages.
+    """
+    if connection is None:
+        connection = get_worker_mail_connection()
+
+    results = []
+    for message in messages:
+        try:
+            connection.send_messages([message])
+        except (smtplib.SMTPException, OSError) as exc:
+            logger.warning("Unable to send email to %s: %s", message.to, exc)
+            results.append((message, exc))
+        else:
+            results.append((message, None))
+    return results
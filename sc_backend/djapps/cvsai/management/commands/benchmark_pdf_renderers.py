@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from cvsai.benchmarks import build_synthetic_resume, measure
+from cvsai.models import Resume
+from cvsai.pdf_renderers import PDF_RENDERERS, render_resume_pdf
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare latency and peak memory of the resume PDF renderers "
+        "(pisa HTML template vs native ReportLab)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--resume-id', type=int, help="Benchmark an existing resume"
+        )
+        parser.add_argument('--iterations', type=int, default=5)
+        parser.add_argument('--projects', type=int, default=10)
+        parser.add_argument('--skills', type=int, default=15)
+        parser.add_argument('--bio-size', type=int, default=1500)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options['resume_id']:
+                resume = (
+                    Resume.objects.filter(pk=options['resume_id'])
+                    .prefetch_related('resumeskill_set__skill', 'projects', 'contacts')
+                    .first()
+                )
+                if resume is None:
+                    raise CommandError(f"Resume {options['resume_id']} not found")
+            else:
+                resume = build_synthetic_resume(
+                    options['projects'], options['skills'], options['bio_size']
+                )
+
+            self.stdout.write(
+                f"{'renderer':<10} {'median ms':>10} {'min ms':>9} "
+                f"{'max ms':>9} {'peak KiB':>10} {'size B':>9}"
+            )
+            for renderer in PDF_RENDERERS:
+                stats = measure(
+                    lambda name=renderer: render_resume_pdf(resume, name, inline=True),
+                    options['iterations'],
+                )
+                self.stdout.write(
+                    f"{renderer:<10} {stats['wall_ms_median']:>10} "
+                    f"{stats['wall_ms_min']:>9} {stats['wall_ms_max']:>9} "
+                    f"{stats['peak_kib']:>10} {stats['size_bytes']:>9}"
+                )
+
+            # synthetic data only lives for the benchmark
+            transaction.set_rollback(True)
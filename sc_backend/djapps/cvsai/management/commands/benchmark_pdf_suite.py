@@ -0,0 +1,79 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from cvsai.benchmarks import (
+    GRID_BIO_SIZES,
+    GRID_PROJECTS,
+    GRID_SKILLS,
+    find_regressions,
+    run_suite,
+    size_grid,
+    size_ladder,
+    write_report,
+)
+from cvsai.pdf_renderers import PDF_RENDERERS
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark every resume PDF renderer on synthetic resumes of increasing "
+        "size: wall/CPU time, tracemalloc peak and RSS. Writes JSON results and "
+        "optionally fails on regressions against a baseline run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grid',
+            action='store_true',
+            help="Every combination of --projects/--skills/--bio-sizes "
+            "instead of the size ladder",
+        )
+        parser.add_argument('--projects', type=int, nargs='+', default=GRID_PROJECTS)
+        parser.add_argument('--skills', type=int, nargs='+', default=GRID_SKILLS)
+        parser.add_argument('--bio-sizes', type=int, nargs='+', default=GRID_BIO_SIZES)
+        parser.add_argument(
+            '--renderer', choices=PDF_RENDERERS, action='append', dest='renderers'
+        )
+        parser.add_argument('--iterations', type=int, default=3)
+        parser.add_argument(
+            '--no-rss',
+            action='store_false',
+            dest='rss',
+            help="Skip the RSS probe (one fresh process per case and renderer)",
+        )
+        parser.add_argument('--output', help="Write JSON results to this file")
+        parser.add_argument('--baseline', help="JSON results of a previous run")
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=1.25,
+            help="Fail when a metric grows by more than this factor",
+        )
+
+    def handle(self, *args, **options):
+        if options['grid']:
+            cases = size_grid(
+                options['projects'], options['skills'], options['bio_sizes']
+            )
+        else:
+            cases = size_ladder()
+        renderers = options['renderers'] or list(PDF_RENDERERS)
+
+        with transaction.atomic():
+            results = run_suite(cases, renderers, options['iterations'], options['rss'])
+            # synthetic data only lives for the benchmark
+            transaction.set_rollback(True)
+
+        write_report(results, options, self.stdout)
+
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as file_obj:
+                baseline = json.load(file_obj)['results']
+            regressions = find_regressions(results, baseline, options['threshold'])
+            if regressions:
+                raise CommandError(
+                    "PDF rendering regressions:\n" + '\n'.join(regressions)
+                )
+            self.stderr.write(self.style.SUCCESS("No regressions against baseline"))
@@ -0,0 +1,93 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from cvsai.benchmarks import (
+    TRANSLATION_SCENARIOS,
+    build_synthetic_resume,
+    run_translation_benchmark,
+    write_report,
+)
+from cvsai.constants import SUPPORTED_LANGUAGES
+from cvsai.fake_translation_server import FakeTranslationServer
+from cvsai.management.commands.fake_translation_server import (
+    add_fake_server_arguments,
+)
+
+PROVIDERS = ('google', 'openai', 'mock')
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark CV translation with every provider against the local fake "
+        "translation server: p50/p95 latency of translate_cv_content and the "
+        "translate_cv view and provider calls per resume. Writes JSON results."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--provider', choices=PROVIDERS, action='append', dest='providers'
+        )
+        parser.add_argument(
+            '--scenario',
+            choices=TRANSLATION_SCENARIOS,
+            action='append',
+            dest='scenarios',
+        )
+        parser.add_argument('--iterations', type=int, default=10)
+        parser.add_argument('--projects', type=int, default=5)
+        parser.add_argument('--skills', type=int, default=10)
+        parser.add_argument('--bio-size', type=int, default=1000)
+        parser.add_argument(
+            '--language', choices=sorted(SUPPORTED_LANGUAGES), default='kw'
+        )
+        parser.add_argument(
+            '--memory',
+            action='store_true',
+            help="Keep the translation memory enabled (repeat calls are hits)",
+        )
+        add_fake_server_arguments(parser)
+        parser.add_argument('--output', help="Write JSON results to this file")
+
+    def handle(self, *args, **options):
+        server = FakeTranslationServer(
+            latency=options['latency'],
+            jitter=options['jitter'],
+            error_rate=options['error_rate'],
+            rate_limit=options['rate_limit'],
+            seed=options['seed'],
+        ).start()
+        try:
+            with transaction.atomic():
+                resume = build_synthetic_resume(
+                    options['projects'], options['skills'], options['bio_size']
+                )
+                results = run_translation_benchmark(
+                    resume,
+                    options['providers'] or list(PROVIDERS),
+                    server,
+                    scenarios=options['scenarios'] or list(TRANSLATION_SCENARIOS),
+                    iterations=options['iterations'],
+                    target_language=options['language'],
+                    memory=options['memory'],
+                )
+                # synthetic data only lives for the benchmark
+                transaction.set_rollback(True)
+        finally:
+            server.stop()
+
+        write_report(
+            results,
+            options,
+            self.stdout,
+            resume={
+                'projects': options['projects'],
+                'skills': options['skills'],
+                'bio_size': options['bio_size'],
+            },
+            server={
+                'latency': options['latency'],
+                'jitter': options['jitter'],
+                'error_rate': options['error_rate'],
+                'rate_limit': options['rate_limit'],
+            },
+        )
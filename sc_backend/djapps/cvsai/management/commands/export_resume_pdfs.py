@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from cvsai.pdf_export import export_queryset, iter_resume_pdf_zip
+from cvsai.pdf_renderers import PDF_RENDERERS
+
+
+class Command(BaseCommand):
+    help = "Export resume PDFs into a ZIP archive, reusing cached PDFs."
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help="Path of the ZIP archive to write")
+        parser.add_argument('--ids', type=int, nargs='+', help="Resume ids")
+        parser.add_argument('--search', help="Name or title contains")
+        parser.add_argument('--skill', help="Resumes having this skill")
+        parser.add_argument('--renderer', choices=PDF_RENDERERS)
+        parser.add_argument('--workers', type=int, default=4)
+
+    def handle(self, *args, **options):
+        if not (options['ids'] or options['search'] or options['skill']):
+            raise CommandError("Provide --ids, --search or --skill")
+
+        queryset = export_queryset(
+            ids=options['ids'], search=options['search'], skill=options['skill']
+        )
+        count = queryset.count()
+        with open(options['output'], 'wb') as file_obj:
+            for chunk in iter_resume_pdf_zip(
+                queryset, options['renderer'], options['workers']
+            ):
+                file_obj.write(chunk)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Exported {count} resumes to {options['output']}")
+        )
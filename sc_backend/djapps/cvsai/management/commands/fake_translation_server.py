@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand
+
+from cvsai.fake_translation_server import FakeTranslationServer
+
+
+def add_fake_server_arguments(parser):
+    """Latency, errors and rate limit options of the fake server."""
+    parser.add_argument(
+        '--latency', type=float, default=0.05, help="Seconds per request"
+    )
+    parser.add_argument(
+        '--jitter',
+        type=float,
+        default=0.02,
+        help="Latency varies by up to this many seconds either way",
+    )
+    parser.add_argument(
+        '--error-rate', type=float, default=0.0, help="Share of 503 answers (0-1)"
+    )
+    parser.add_argument(
+        '--rate-limit',
+        type=int,
+        default=0,
+        help="Requests per second answered before 429 (0 for no limit)",
+    )
+    parser.add_argument('--seed', type=int, help="Seed of latency and errors")
+
+
+class Command(BaseCommand):
+    help = (
+        "Serve a local stand-in of the Google Translate v2 and OpenAI chat "
+        "completions endpoints, for load tests without paid API calls."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8099)
+        add_fake_server_arguments(parser)
+        parser.add_argument(
+            '--verbose-requests', action='store_true', help="Log every request"
+        )
+
+    def handle(self, *args, **options):
+        server = FakeTranslationServer(
+            address=(options['host'], options['port']),
+            latency=options['latency'],
+            jitter=options['jitter'],
+            error_rate=options['error_rate'],
+            rate_limit=options['rate_limit'],
+            seed=options['seed'],
+        )
+        server.verbose = options['verbose_requests']
+        self.stdout.write(f"Fake translation server on {server.url}, set:")
+        for name, value in server.settings.items():
+            self.stdout.write(f"  {name}={value}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(f"Served: {dict(server.stats)}")
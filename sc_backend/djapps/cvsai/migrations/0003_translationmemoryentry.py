@@ -0,0 +1,63 @@
+# Generated by Django 5.2.1 on 2026-10-18 09:50
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cvsai', '0002_resume_title'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TranslationMemoryEntry',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                (
+                    'key',
+                    models.CharField(
+                        help_text='sha256 of provider, languages and source text',
+                        max_length=64,
+                        unique=True,
+                        verbose_name='Key',
+                    ),
+                ),
+                ('provider', models.CharField(max_length=20, verbose_name='Provider')),
+                (
+                    'source_language',
+                    models.CharField(max_length=10, verbose_name='Source language'),
+                ),
+                (
+                    'target_language',
+                    models.CharField(max_length=10, verbose_name='Target language'),
+                ),
+                ('translated_text', models.TextField(verbose_name='Translated text')),
+                (
+                    'created_at',
+                    models.DateTimeField(auto_now_add=True, verbose_name='created'),
+                ),
+                (
+                    'last_used_at',
+                    models.DateTimeField(
+                        db_index=True,
+                        default=django.utils.timezone.now,
+                        verbose_name='last used',
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': 'Translation memory entry',
+                'verbose_name_plural': 'Translation memory entries',
+            },
+        ),
+    ]
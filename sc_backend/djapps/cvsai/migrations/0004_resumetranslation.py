@@ -0,0 +1,61 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cvsai', '0003_translationmemoryentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumeTranslation',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                ('language', models.CharField(max_length=10, verbose_name='Language')),
+                ('provider', models.CharField(max_length=20, verbose_name='Provider')),
+                (
+                    'fields',
+                    models.JSONField(
+                        default=dict,
+                        help_text='Translated text and source text hash per resume field',
+                        verbose_name='Fields',
+                    ),
+                ),
+                (
+                    'created_at',
+                    models.DateTimeField(auto_now_add=True, verbose_name='created'),
+                ),
+                (
+                    'updated_at',
+                    models.DateTimeField(auto_now=True, verbose_name='updated'),
+                ),
+                (
+                    'resume',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='translations',
+                        to='cvsai.resume',
+                        verbose_name='Resume',
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': 'Resume translation',
+                'verbose_name_plural': 'Resume translations',
+                'ordering': ['resume', 'language'],
+                'unique_together': {('resume', 'language')},
+            },
+        ),
+    ]
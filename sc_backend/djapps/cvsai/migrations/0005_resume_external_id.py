@@ -0,0 +1,25 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cvsai', '0004_resumetranslation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resume',
+            name='external_id',
+            field=models.CharField(
+                blank=True,
+                help_text='Key of the resume in the system it is imported from',
+                max_length=100,
+                null=True,
+                unique=True,
+                verbose_name='External ID',
+            ),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cvsai', '0005_resume_external_id'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='resume',
+            index=models.Index(
+                fields=['created_at', 'id'], name='cvsai_resume_created_id_idx'
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='skill',
+            index=models.Index(fields=['name', 'id'], name='cvsai_skill_name_id_idx'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.urls import reverse
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 from cvsai.constants import CONTACT_TYPES, SKILL_LEVELS, SL_INTERMEDIATE
@@ -16,6 +17,8 @@ class Skill(models.Model):
         verbose_name = _("Skill")
         verbose_name_plural = _("Skills")
         ordering = ['name']
+        # keyset pagination of the skill API
+        indexes = [models.Index(fields=['name', 'id'], name='cvsai_skill_name_id_idx')]
 
     def __str__(self):
         return self.name
@@ -50,6 +53,14 @@ class Resume(models.Model):
         blank=True,
         help_text=_("Skills with proficiency levels"),
     )
+    external_id = models.CharField(
+        verbose_name=_("External ID"),
+        max_length=100,
+        unique=True,
+        null=True,
+        blank=True,
+        help_text=_("Key of the resume in the system it is imported from"),
+    )
 
     created_at = models.DateTimeField(verbose_name=_("created"), auto_now_add=True)
     updated_at = models.DateTimeField(verbose_name=_("updated"), auto_now=True)
@@ -58,6 +69,12 @@ class Resume(models.Model):
         verbose_name = _("Resume")
         verbose_name_plural = _("Resumes")
         ordering = ['-created_at']
+        # keyset pagination of the resume API
+        indexes = [
+            models.Index(
+                fields=['created_at', 'id'], name='cvsai_resume_created_id_idx'
+            )
+        ]
 
     def __str__(self):
         return f"{self.firstname} {self.lastname}"
@@ -162,3 +179,58 @@ class Contact(models.Model):
 
     def __str__(self):
         return f"{self.get_contact_type_display()}: {self.value}"
+
+
+class TranslationMemoryEntry(models.Model):
+    """Provider translation of a text, see cvsai.translation_memory."""
+
+    key = models.CharField(
+        verbose_name=_("Key"),
+        max_length=64,
+        unique=True,
+        help_text=_("sha256 of provider, languages and source text"),
+    )
+    provider = models.CharField(verbose_name=_("Provider"), max_length=20)
+    source_language = models.CharField(verbose_name=_("Source language"), max_length=10)
+    target_language = models.CharField(verbose_name=_("Target language"), max_length=10)
+    translated_text = models.TextField(verbose_name=_("Translated text"))
+    created_at = models.DateTimeField(verbose_name=_("created"), auto_now_add=True)
+    last_used_at = models.DateTimeField(
+        verbose_name=_("last used"), default=timezone.now, db_index=True
+    )
+
+    class Meta:
+        verbose_name = _("Translation memory entry")
+        verbose_name_plural = _("Translation memory entries")
+
+    def __str__(self):
+        return f"{self.provider} {self.source_language}->{self.target_language}"
+
+
+class ResumeTranslation(models.Model):
+    """Stored translation of a resume, see cvsai.translation_store."""
+
+    resume = models.ForeignKey(
+        Resume,
+        verbose_name=_("Resume"),
+        on_delete=models.CASCADE,
+        related_name='translations',
+    )
+    language = models.CharField(verbose_name=_("Language"), max_length=10)
+    provider = models.CharField(verbose_name=_("Provider"), max_length=20)
+    fields = models.JSONField(
+        verbose_name=_("Fields"),
+        default=dict,
+        help_text=_("Translated text and source text hash per resume field"),
+    )
+    created_at = models.DateTimeField(verbose_name=_("created"), auto_now_add=True)
+    updated_at = models.DateTimeField(verbose_name=_("updated"), auto_now=True)
+
+    class Meta:
+        verbose_name = _("Resume translation")
+        verbose_name_plural = _("Resume translations")
+        ordering = ['resume', 'language']
+        unique_together = ['resume', 'language']
+
+    def __str__(self):
+        return f"{self.resume} ({self.language})"
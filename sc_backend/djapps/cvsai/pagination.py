@@ -0,0 +1,169 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (cursor) pagination on the ``ordering`` fields, the last of which
+    must be unique.
+
+    A page is selected with a WHERE on the ordering values of the last row
+    seen instead of an OFFSET and no COUNT(*) is run, so every page costs the
+    same however deep a client pages (given an index matching ``ordering``).
+    Responses have ``next`` and ``previous`` links and ``results``.
+
+    ``?page=N`` opts into page-number pagination, with ``count``.
+    """
+
+    ordering = ('-id',)
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    page_query_param = 'page'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self):
+        self.request = None
+        self.model = None
+        self.page_numbers = None
+        self.next_position = None
+        self.previous_position = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.model = queryset.model
+        queryset = queryset.order_by(*self.ordering)
+        page_size = self.get_page_size(request)
+
+        if self.page_query_param in request.query_params:
+            self.page_numbers = PageNumberPagination()
+            self.page_numbers.page_size = page_size
+            self.page_numbers.page_query_param = self.page_query_param
+            return self.page_numbers.paginate_queryset(queryset, request, view)
+
+        position, backwards = self.decode_cursor(request)
+        if backwards:
+            queryset = queryset.reverse()
+        if position is not None:
+            queryset = queryset.filter(self.position_filter(position, backwards))
+        rows = list(queryset[: page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if backwards:
+            # a page before the one the cursor came from
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, position is not None
+        if rows and has_next:
+            self.next_position = self.get_position(rows[-1])
+        if rows and has_previous:
+            self.previous_position = self.get_position(rows[0])
+        return rows
+
+    def get_paginated_response(self, data):
+        if self.page_numbers is not None:
+            return self.page_numbers.get_paginated_response(data)
+        return Response(
+            {
+                'next': self.get_link(self.next_position, backwards=False),
+                'previous': self.get_link(self.previous_position, backwards=True),
+                'results': data,
+            }
+        )
+
+    def to_html(self):
+        # no browsable-API pagination controls (display_page_controls is False)
+        return ''
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def _fields(self):
+        return [
+            # pylint: disable-next=protected-access
+            self.model._meta.get_field(name.lstrip('-'))
+            for name in self.ordering
+        ]
+
+    def get_position(self, row):
+        """Ordering values of a row, as strings."""
+        return [field.value_to_string(row) for field in self._fields()]
+
+    def position_filter(self, position, backwards):
+        """
+        Return the Q selecting the rows after ``position`` in the ordering,
+        before it when ``backwards``.
+        """
+        # the bound on the first field alone lets the index narrow the scan
+        first = self.ordering[0]
+        descending = first.startswith('-') != backwards
+        condition = Q(
+            **{f"{first.lstrip('-')}__{'lte' if descending else 'gte'}": position[0]}
+        )
+
+        after = Q()
+        equal = {}
+        for name, value in zip(self.ordering, position):
+            descending = name.startswith('-') != backwards
+            name = name.lstrip('-')
+            after |= Q(**equal, **{f"{name}__{'lt' if descending else 'gt'}": value})
+            equal[name] = value
+        return condition & after
+
+    def encode_cursor(self, position, backwards):
+        payload = json.dumps({'p': position, 'b': backwards}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, request):
+        """Return the position and direction of the cursor of the request."""
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            fields = self._fields()
+            if len(payload['p']) != len(fields):
+                raise ValueError(cursor)
+            position = [
+                field.to_python(value) for field, value in zip(fields, payload['p'])
+            ]
+            return position, bool(payload['b'])
+        except (binascii.Error, TypeError, KeyError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message) from None
+
+    def get_link(self, position, backwards):
+        if position is None:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.encode_cursor(position, backwards),
+        )
+
+
+class ResumeKeysetPagination(KeysetPagination):
+    """Resumes newest first, keyed on (created_at, id)."""
+
+    ordering = ('-created_at', '-id')
+
+
+class SkillKeysetPagination(KeysetPagination):
+    """Skills by name, keyed on (name, id)."""
+
+    ordering = ('name', 'id')
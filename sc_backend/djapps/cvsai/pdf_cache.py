@@ -0,0 +1,305 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.template.loader import get_template
+
+from cvsai.constants import RESUME_PDF_TEMPLATE
+from cvsai.pdf_renderers import (
+    REPORTLAB_LAYOUT_VERSION,
+    RENDERER_REPORTLAB,
+    get_renderer,
+    render_resume_pdf,
+)
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# first and longest wait between attempts to take a busy render lock
+LOCK_POLL_INTERVAL = 0.05
+LOCK_POLL_MAX_INTERVAL = 0.5
+
+
+def resume_content_version(resume):
+    """
+    Return a hash of everything that ends up in the resume PDF:
+    the resume itself plus its skills, projects and contacts.
+    """
+    payload = {
+        'resume': [resume.firstname, resume.lastname, resume.title, resume.bio],
+        'skills': [
+            [rs.skill_id, rs.skill.name, rs.level]
+            for rs in resume.resumeskill_set.all()
+        ],
+        'projects': [
+            [
+                project.id,
+                project.title,
+                project.description,
+                project.url,
+                project.start_date,
+                project.end_date,
+            ]
+            for project in resume.projects.all()
+        ],
+        'contacts': [
+            [contact.contact_type, contact.value] for contact in resume.contacts.all()
+        ],
+    }
+    raw = json.dumps(payload, default=str, sort_keys=True).encode('utf-8')
+    return hashlib.sha256(raw).hexdigest()
+
+
+def template_hash(template_src):
+    """Return a hash of the template source, so template edits bust the cache."""
+    template = get_template(template_src)
+    source = Path(template.origin.name).read_bytes()
+    return hashlib.sha256(source).hexdigest()
+
+
+def resume_pdf_key(resume, template_src=RESUME_PDF_TEMPLATE, renderer=None):
+    """
+    Cache key of the resume PDF: resume id, renderer, content version and
+    template hash (ReportLab layout version for the reportlab renderer).
+    """
+    renderer = get_renderer(renderer)
+    if renderer == RENDERER_REPORTLAB:
+        layout = REPORTLAB_LAYOUT_VERSION
+    else:
+        layout = template_hash(template_src)
+    digest = hashlib.sha256(
+        f'{resume_content_version(resume)}:{layout}'.encode()
+    ).hexdigest()
+    return f'{resume.pk}-{renderer}-{digest[:32]}'
+
+
+class PDFCache:
+    """
+    Content-addressed on-disk storage of rendered PDFs.
+
+    Files live under ``MEDIA_ROOT/<CVSAI_PDF_CACHE_DIR>``. The access time of a
+    file is bumped on every hit and the least recently used files are evicted
+    once the total size goes over ``CVSAI_PDF_CACHE_MAX_SIZE``.
+    """
+
+    def __init__(self, root=None, max_size=None):
+        if root is None:
+            root = os.path.join(
+                settings.MEDIA_ROOT,
+                getattr(settings, 'CVSAI_PDF_CACHE_DIR', 'pdf_cache'),
+            )
+        if max_size is None:
+            max_size = getattr(settings, 'CVSAI_PDF_CACHE_MAX_SIZE', 500 * 1024**2)
+        self.root = Path(root)
+        self.max_size = max_size
+
+    def path(self, key):
+        return self.root / f'{key}.pdf'
+
+    def get(self, key):
+        """Return the path of the cached PDF or None, marking it as used."""
+        path = self.path(key)
+        try:
+            stat = path.stat()
+            os.utime(path, (time.time(), stat.st_mtime))
+        except FileNotFoundError:
+            return None
+        return path
+
+    def lock_path(self, key):
+        return self.root / f'{key}.lock'
+
+    @contextmanager
+    def lock(self, key, timeout=None):
+        """
+        Hold an exclusive lock on the key across processes, so concurrent
+        misses for the same resume version render it only once.
+
+        Yields True once the lock is held and False when it was not free
+        within ``timeout`` seconds (CVSAI_PDF_CACHE_LOCK_TIMEOUT), so a stuck
+        render does not block the callers waiting for it.
+        """
+        if fcntl is None:
+            yield True
+            return
+        if timeout is None:
+            timeout = getattr(settings, 'CVSAI_PDF_CACHE_LOCK_TIMEOUT', 35)
+        lock_file = self._acquire(self.lock_path(key), time.monotonic() + timeout)
+        if lock_file is None:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+            lock_file.close()
+
+    def _acquire(self, path, expires_at):
+        """Return the open, locked lock file or None past ``expires_at``."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        delay = LOCK_POLL_INTERVAL
+        while True:
+            lock_file = open(path, 'wb')  # pylint: disable=consider-using-with
+            while True:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    remaining = expires_at - time.monotonic()
+                    if remaining <= 0:
+                        lock_file.close()
+                        return None
+                    time.sleep(min(delay, remaining))
+                    delay = min(delay * 2, LOCK_POLL_MAX_INTERVAL)
+            try:
+                if os.fstat(lock_file.fileno()).st_ino == os.stat(path).st_ino:
+                    return lock_file
+            except FileNotFoundError:
+                pass
+            # removed with its entry while we waited, lock the current file
+            lock_file.close()
+
+    def read(self, key):
+        """Return the cached PDF bytes or None."""
+        path = self.get(key)
+        if path is None:
+            return None
+        try:
+            return path.read_bytes()
+        except FileNotFoundError:
+            # evicted by another process in the meantime
+            return None
+
+    def set(self, key, content):
+        """Store PDF bytes atomically and drop older versions of the resume."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as tmp_file:
+                tmp_file.write(content)
+            os.replace(tmp_path, self.path(key))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+        self._remove_stale_versions(key)
+        self.evict()
+        return self.path(key)
+
+    def delete_resume(self, resume_id):
+        """Remove every cached PDF of the resume and its lock files."""
+        for path in self.root.glob(f'{resume_id}-*.*'):
+            path.unlink(missing_ok=True)
+
+    def evict(self):
+        """Remove least recently used files until the cache fits max_size."""
+        entries = []
+        total = 0
+        for path in self.root.glob('*.pdf'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_atime, stat.st_size, path))
+            total += stat.st_size
+
+        if total <= self.max_size:
+            return
+
+        for _atime, size, path in sorted(entries, key=lambda entry: entry[0]):
+            path.unlink(missing_ok=True)
+            self.lock_path(path.stem).unlink(missing_ok=True)
+            total -= size
+            if total <= self.max_size:
+                break
+
+    def _remove_stale_versions(self, key):
+        prefix = key.rsplit('-', 1)[0]
+        for path in self.root.glob(f'{prefix}-*.*'):
+            if path.stem != key:
+                path.unlink(missing_ok=True)
+
+
+def get_pdf_cache():
+    """Return the configured PDF cache or None when caching is disabled."""
+    if not getattr(settings, 'CVSAI_PDF_CACHE_ENABLED', True):
+        return None
+    return PDFCache()
+
+
+def store_resume_pdf(resume, key=None, template_src=RESUME_PDF_TEMPLATE, renderer=None):
+    """Render the resume PDF, store it in the PDF cache and return its bytes."""
+    content = render_resume_pdf(resume, renderer, template_src)
+    cache = get_pdf_cache()
+    if cache is None:
+        return content
+
+    if key is None:
+        key = resume_pdf_key(resume, template_src, renderer)
+    try:
+        cache.set(key, content)
+    except OSError as exc:
+        logger.warning("Unable to store resume PDF %s: %s", key, exc)
+    return content
+
+
+def get_resume_pdf(resume, template_src=RESUME_PDF_TEMPLATE, renderer=None):
+    """
+    Return resume PDF bytes, rendering them only when the resume content or
+    the template changed since the last render.
+    """
+    cache = get_pdf_cache()
+    if cache is None:
+        return render_resume_pdf(resume, renderer, template_src)
+
+    key = resume_pdf_key(resume, template_src, renderer)
+    content = cache.read(key)
+    if content is not None:
+        return content
+    with cache.lock(key) as locked:
+        if not locked:
+            logger.warning("Render lock of %s is busy, rendering uncached", key)
+            return render_resume_pdf(resume, renderer, template_src)
+        # another process may have rendered it while we waited for the lock
+        content = cache.read(key)
+        if content is not None:
+            return content
+        return store_resume_pdf(resume, key, template_src, renderer)
+
+
+def get_resume_pdf_file(resume, template_src=RESUME_PDF_TEMPLATE, renderer=None):
+    """
+    Return ``(path, content)`` of the stored resume PDF.
+
+    ``content`` is only set when the PDF had to be rendered, ``path`` is None
+    when the PDF could not be stored (cache disabled or not writable).
+    """
+    cache = get_pdf_cache()
+    if cache is None:
+        return None, render_resume_pdf(resume, renderer, template_src)
+
+    key = resume_pdf_key(resume, template_src, renderer)
+    path = cache.get(key)
+    if path is not None:
+        return path, None
+
+    with cache.lock(key) as locked:
+        if not locked:
+            logger.warning("Render lock of %s is busy, rendering uncached", key)
+            return None, render_resume_pdf(resume, renderer, template_src)
+        path = cache.get(key)
+        if path is not None:
+            return path, None
+        content = store_resume_pdf(resume, key, template_src, renderer)
+    return cache.get(key), content
@@ -0,0 +1,187 @@
+import functools
+import io
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+
+from xhtml2pdf import pisa
+
+logger = logging.getLogger(__name__)
+
+WARMUP_HTML = (
+    '<html><head><style>@page { size: A4; margin: 1cm; } '
+    'body { font-family: Arial, sans-serif; }</style></head>'
+    '<body><h1>Warm-up</h1><b>bold</b> <small>small</small></body></html>'
+)
+
+
+class PDFRenderError(Exception):
+    """Raised when xhtml2pdf fails to produce a PDF document."""
+
+
+class PDFRenderTimeout(PDFRenderError):
+    """Raised when a render does not finish within the engine timeout."""
+
+
+class PDFEngineBusy(PDFRenderError):
+    """Raised when the render queue is full; retry after ``retry_after`` s."""
+
+    def __init__(self, retry_after):
+        super().__init__('PDF rendering engine is busy, please retry later')
+        self.retry_after = retry_after
+
+
+def html_to_pdf(html):
+    """Convert an HTML document to PDF bytes with xhtml2pdf."""
+    result = io.BytesIO()
+    pdf = pisa.CreatePDF(io.BytesIO(html.encode('utf-8')), result)
+    if pdf.err:
+        raise PDFRenderError(pdf.err)
+    return result.getvalue()
+
+
+def _init_worker():
+    """Import pisa/ReportLab and load the fonts once per worker process."""
+    try:
+        html_to_pdf(WARMUP_HTML)
+    except Exception as exc:
+        logger.warning("PDF worker warm-up failed: %s", exc)
+
+
+class PDFRenderEngine:
+    """
+    Bounded pool of warm worker processes for CPU-bound PDF rendering.
+
+    HTML is rendered from the Django template in the calling process (the
+    compiled template stays in the template loader cache) and only the
+    HTML -> PDF conversion runs in the pool:
+
+    * at most ``workers`` renders run at a time and ``max_queue`` more may
+      wait; beyond that ``PDFEngineBusy`` is raised right away;
+    * a render that takes longer than ``timeout`` seconds raises
+      ``PDFRenderTimeout``; if it already started, its worker is killed and
+      replaced on demand, renders running in the other workers go on (every
+      worker is a single-process executor of its own);
+    * every worker is replaced after ``max_tasks_per_child`` renders to cap
+      memory growth of the long-lived processes.
+
+    With ``workers=0`` (or inside a daemonic process such as a Celery prefork
+    child, which cannot have children) rendering happens inline.
+    """
+
+    def __init__(
+        self,
+        *,
+        workers=2,
+        max_queue=8,
+        timeout=30,
+        max_tasks_per_child=100,
+        retry_after=5,
+    ):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.max_tasks_per_child = max_tasks_per_child
+        self.retry_after = retry_after
+        self._slots = threading.BoundedSemaphore(max(workers, 1) + max_queue)
+        self._lock = threading.Lock()
+        # idle workers, None for one not started (or killed) yet
+        self._idle = queue.Queue()
+        for _ in range(max(workers, 0)):
+            self._idle.put(None)
+        self._executors = set()
+
+    @property
+    def inline(self):
+        return self.workers <= 0 or multiprocessing.current_process().daemon
+
+    def render(self, html):
+        """Convert HTML to PDF bytes in the pool."""
+        return self.run(html_to_pdf, html)
+
+    def run(self, func, *args):
+        """Run a picklable top-level function in the pool and return its result."""
+        # the slot is held for the whole call and released in the finally below
+        # pylint: disable-next=consider-using-with
+        if not self._slots.acquire(blocking=False):
+            raise PDFEngineBusy(self.retry_after)
+        try:
+            if self.inline:
+                return func(*args)
+            return self._run_in_pool(func, *args)
+        finally:
+            self._slots.release()
+
+    def shutdown(self):
+        """Stop the worker processes, they are started again on demand."""
+        with self._lock:
+            executors, self._executors = self._executors, set()
+        for executor in executors:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run_in_pool(self, func, *args):
+        expires_at = time.monotonic() + self.timeout
+        try:
+            executor = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise PDFRenderTimeout(
+                f'No PDF rendering worker was free within {self.timeout} seconds'
+            ) from None
+        try:
+            executor = self._get_executor(executor)
+            future = executor.submit(func, *args)
+            try:
+                return future.result(timeout=max(expires_at - time.monotonic(), 0))
+            except FuturesTimeoutError as exc:
+                self._kill(executor)
+                executor = None
+                raise PDFRenderTimeout(
+                    f'PDF rendering took longer than {self.timeout} seconds'
+                ) from exc
+        except BrokenProcessPool as exc:
+            self._kill(executor)
+            executor = None
+            raise PDFRenderError('PDF rendering worker died') from exc
+        finally:
+            self._idle.put(executor)
+
+    def _get_executor(self, executor):
+        """Return the idle worker, started again when it is gone or stopped."""
+        with self._lock:
+            if executor is None or executor not in self._executors:
+                executor = ProcessPoolExecutor(
+                    max_workers=1,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker,
+                    max_tasks_per_child=self.max_tasks_per_child,
+                )
+                self._executors.add(executor)
+            return executor
+
+    def _kill(self, executor):
+        """Terminate the process of a stuck or broken worker and drop it."""
+        with self._lock:
+            self._executors.discard(executor)
+        # ProcessPoolExecutor cannot cancel a running call, kill its worker
+        for process in list((executor._processes or {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+@functools.lru_cache(maxsize=1)
+def get_pdf_engine():
+    """Return the process-wide PDF rendering engine configured in settings."""
+    return PDFRenderEngine(
+        workers=getattr(settings, 'CVSAI_PDF_WORKERS', 2),
+        max_queue=getattr(settings, 'CVSAI_PDF_MAX_QUEUE', 8),
+        timeout=getattr(settings, 'CVSAI_PDF_RENDER_TIMEOUT', 30),
+        max_tasks_per_child=getattr(settings, 'CVSAI_PDF_WORKER_MAX_RENDERS', 100),
+        retry_after=getattr(settings, 'CVSAI_PDF_RETRY_AFTER', 5),
+    )
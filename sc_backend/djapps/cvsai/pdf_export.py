@@ -0,0 +1,247 @@
+import logging
+import os
+import shutil
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q, QuerySet
+from django.template.defaultfilters import slugify
+
+from cvsai.models import Resume
+from cvsai.pdf_cache import get_pdf_cache, resume_pdf_key
+from cvsai.pdf_engine import PDFEngineBusy, get_pdf_engine
+from cvsai.pdf_renderers import resume_render_job
+
+logger = logging.getLogger(__name__)
+
+COPY_CHUNK_SIZE = 64 * 1024
+QUERY_CHUNK_SIZE = 100
+# first wait of a render refused by the busy engine, doubled on each retry
+BUSY_BACKOFF = 0.1
+
+EXPORT_KEY_PREFIX = 'cvsai:pdf_export:'
+
+EXPORT_QUEUED = 'queued'
+EXPORT_FAILED = 'failed'
+EXPORT_DONE = 'done'
+
+
+def export_queryset(ids=None, search=None, skill=None):
+    """Resumes selected for a bulk export, by ids and/or a simple filter."""
+    queryset = Resume.objects.order_by('id')
+    if ids:
+        queryset = queryset.filter(id__in=ids)
+    if search:
+        queryset = queryset.filter(
+            Q(firstname__icontains=search)
+            | Q(lastname__icontains=search)
+            | Q(title__icontains=search)
+        )
+    if skill:
+        queryset = queryset.filter(skills__name__iexact=skill).distinct()
+    return queryset.prefetch_related('resumeskill_set__skill', 'projects', 'contacts')
+
+
+def resume_pdf_archive_name(resume):
+    """File name of the resume inside the export archive."""
+    return f"{slugify(resume.full_name.replace(' ', '_'))}_{resume.pk}_resume.pdf"
+
+
+def _render(func, arg):
+    """
+    Render in the PDF engine. While its queue is full (interactive downloads
+    come first) wait with exponential back-off, for at most
+    CVSAI_PDF_EXPORT_BUSY_TIMEOUT seconds.
+    """
+    engine = get_pdf_engine()
+    expires_at = time.monotonic() + getattr(
+        settings, 'CVSAI_PDF_EXPORT_BUSY_TIMEOUT', 120
+    )
+    delay = BUSY_BACKOFF
+    while True:
+        try:
+            return engine.run(func, arg)
+        except PDFEngineBusy as exc:
+            remaining = expires_at - time.monotonic()
+            if remaining <= 0:
+                raise
+            delay = min(delay, exc.retry_after, remaining)
+            time.sleep(delay)
+            delay *= 2
+
+
+def iter_resume_pdfs(resumes, renderer=None, max_workers=4):
+    """
+    Yield ``(resume, source, error)`` for each resume as soon as its PDF is
+    available; ``source`` is the stored file path or the rendered bytes.
+
+    Cached PDFs are yielded right away, missing ones are rendered in parallel
+    (at most ``max_workers`` at a time) and stored in the PDF cache. ORM and
+    template work stays in the calling thread.
+    """
+    if isinstance(resumes, QuerySet):
+        # keep prefetched children of only one chunk of resumes in memory
+        resumes = resumes.iterator(chunk_size=QUERY_CHUNK_SIZE)
+
+    pdf_cache = get_pdf_cache()
+    pending = {}
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        for resume in resumes:
+            key = resume_pdf_key(resume, renderer=renderer) if pdf_cache else None
+            path = pdf_cache.get(key) if pdf_cache else None
+            if path is not None:
+                yield resume, path, None
+                continue
+
+            try:
+                func, arg = resume_render_job(resume, renderer)
+            except Exception as exc:
+                yield resume, None, exc
+                continue
+            pending[executor.submit(_render, func, arg)] = (resume, key)
+            if len(pending) >= max_workers * 2:
+                yield from _iter_completed(pending, pdf_cache)
+
+        while pending:
+            yield from _iter_completed(pending, pdf_cache)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _iter_completed(pending, pdf_cache):
+    done, _not_done = wait(pending, return_when=FIRST_COMPLETED)
+    for future in done:
+        resume, key = pending.pop(future)
+        try:
+            content = future.result()
+        except Exception as exc:
+            yield resume, None, exc
+            continue
+
+        if pdf_cache is not None:
+            try:
+                pdf_cache.set(key, content)
+            except OSError as exc:
+                logger.warning("Unable to store resume PDF %s: %s", key, exc)
+        yield resume, content, None
+
+
+class _ZipBuffer:
+    """Write-only file object collecting ZipFile output until it is drained."""
+
+    def __init__(self):
+        self._chunks = []
+        self._offset = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._offset
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def iter_resume_pdf_zip(resumes, renderer=None, max_workers=4):
+    """
+    Yield a ZIP archive of the resume PDFs chunk by chunk, one entry per PDF in
+    completion order; only one entry is held in memory at a time. Resumes that
+    failed to render are listed in ``errors.txt``.
+    """
+    buffer = _ZipBuffer()
+    errors = []
+    # PDF streams are already compressed
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for resume, source, error in iter_resume_pdfs(resumes, renderer, max_workers):
+            if error is not None:
+                errors.append(f'{resume.pk} {resume.full_name}: {error}')
+                continue
+
+            name = resume_pdf_archive_name(resume)
+            if isinstance(source, Path):
+                try:
+                    with open(source, 'rb') as src, archive.open(name, 'w') as dst:
+                        shutil.copyfileobj(src, dst, COPY_CHUNK_SIZE)
+                except FileNotFoundError:
+                    errors.append(f'{resume.pk} {resume.full_name}: evicted, retry')
+                    continue
+            else:
+                archive.writestr(name, source)
+            yield buffer.drain()
+
+        if errors:
+            archive.writestr('errors.txt', '\n'.join(errors) + '\n')
+    yield buffer.drain()
+
+
+def get_export_dir():
+    return Path(settings.MEDIA_ROOT) / getattr(
+        settings, 'CVSAI_PDF_EXPORT_DIR', 'pdf_exports'
+    )
+
+
+def get_export_path(export_id):
+    return get_export_dir() / f'{export_id}.zip'
+
+
+def _export_ttl():
+    return getattr(settings, 'CVSAI_PDF_EXPORT_TTL', 24 * 3600)
+
+
+def get_export_state(export_id):
+    """Return the state of an async export, None when unknown or expired."""
+    return cache.get(EXPORT_KEY_PREFIX + export_id)
+
+
+def set_export_state(export_id, status, **fields):
+    """Record the status (queued, failed or done) of an async export."""
+    cache.set(
+        EXPORT_KEY_PREFIX + export_id,
+        {'status': status, **fields},
+        timeout=_export_ttl(),
+    )
+
+
+def delete_export_state(export_id):
+    cache.delete(EXPORT_KEY_PREFIX + export_id)
+
+
+def build_resume_pdf_zip(export_id, resumes, renderer=None):
+    """Write the export archive to the export directory and return its path."""
+    export_dir = get_export_dir()
+    export_dir.mkdir(parents=True, exist_ok=True)
+    _remove_expired_exports(export_dir)
+
+    path = get_export_path(export_id)
+    partial_path = path.with_suffix('.part')
+    try:
+        with open(partial_path, 'wb') as file_obj:
+            for chunk in iter_resume_pdf_zip(resumes, renderer):
+                file_obj.write(chunk)
+        os.replace(partial_path, path)
+    finally:
+        partial_path.unlink(missing_ok=True)
+    return path
+
+
+def _remove_expired_exports(export_dir):
+    expired = time.time() - _export_ttl()
+    for path in export_dir.iterdir():
+        try:
+            if path.stat().st_mtime < expired:
+                path.unlink(missing_ok=True)
+        except FileNotFoundError:
+            continue
@@ -0,0 +1,341 @@
+import io
+from itertools import batched
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.template.loader import get_template
+from django.utils import timezone
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.units import cm
+from reportlab.platypus import (
+    HRFlowable,
+    KeepTogether,
+    Paragraph,
+    SimpleDocTemplate,
+    Spacer,
+    Table,
+    TableStyle,
+)
+
+from cvsai.constants import RESUME_PDF_TEMPLATE
+from cvsai.pdf_engine import PDFRenderError, get_pdf_engine, html_to_pdf
+
+RENDERER_PISA = 'pisa'
+RENDERER_REPORTLAB = 'reportlab'
+PDF_RENDERERS = (RENDERER_PISA, RENDERER_REPORTLAB)
+
+# Bump when the ReportLab layout changes, it is part of the PDF cache key
+REPORTLAB_LAYOUT_VERSION = '1'
+
+# Colours and sizes mirror cvsai/resume_pdf.html
+DARK = colors.HexColor('#2c3e50')
+MUTED = colors.HexColor('#7f8c8d')
+GREY = colors.HexColor('#6c757d')
+LINK = colors.HexColor('#3498db')
+
+STYLES = {
+    'name': ParagraphStyle(
+        'name',
+        fontName='Helvetica-Bold',
+        fontSize=18,
+        leading=22,
+        alignment=TA_CENTER,
+        textColor=DARK,
+    ),
+    'title': ParagraphStyle(
+        'title',
+        fontName='Helvetica',
+        fontSize=12,
+        leading=16,
+        alignment=TA_CENTER,
+        textColor=MUTED,
+    ),
+    'contacts': ParagraphStyle(
+        'contacts',
+        fontName='Helvetica',
+        fontSize=8.25,
+        leading=11.5,
+        alignment=TA_CENTER,
+        textColor=colors.HexColor('#555555'),
+        spaceBefore=7,
+    ),
+    'section': ParagraphStyle(
+        'section',
+        fontName='Helvetica-Bold',
+        fontSize=12,
+        leading=15,
+        textColor=DARK,
+        spaceBefore=8,
+    ),
+    'body': ParagraphStyle(
+        'body',
+        fontName='Helvetica',
+        fontSize=9,
+        leading=12.6,
+        alignment=TA_JUSTIFY,
+        textColor=colors.HexColor('#333333'),
+    ),
+    'skill': ParagraphStyle(
+        'skill',
+        fontName='Helvetica',
+        fontSize=9,
+        leading=12,
+        alignment=TA_CENTER,
+        textColor=colors.HexColor('#333333'),
+    ),
+    'project_title': ParagraphStyle(
+        'project_title',
+        fontName='Helvetica-Bold',
+        fontSize=10.5,
+        leading=14,
+        textColor=DARK,
+        leftIndent=10,
+        rightIndent=90,
+        spaceAfter=4,
+    ),
+    'project_dates': ParagraphStyle(
+        'project_dates',
+        fontName='Helvetica',
+        fontSize=7.5,
+        textColor=GREY,
+    ),
+    'project_url': ParagraphStyle(
+        'project_url',
+        fontName='Helvetica',
+        fontSize=7.5,
+        leading=11,
+        textColor=LINK,
+        leftIndent=10,
+        spaceAfter=4,
+    ),
+    'project_body': ParagraphStyle(
+        'project_body',
+        fontName='Helvetica',
+        fontSize=9,
+        leading=12.6,
+        alignment=TA_JUSTIFY,
+        textColor=colors.HexColor('#333333'),
+        leftIndent=10,
+    ),
+}
+
+
+def resume_pdf_data(resume):
+    """Return the resume as plain (picklable) data for draw_resume_pdf."""
+    return {
+        'full_name': resume.full_name,
+        'title': resume.title,
+        'bio': resume.bio,
+        'contacts': [
+            (contact.get_contact_type_display(), contact.value)
+            for contact in resume.contacts.all()
+        ],
+        'skills': [
+            (resume_skill.skill.name, str(resume_skill.get_level_display()))
+            for resume_skill in resume.resumeskill_set.all()
+        ],
+        'projects': [
+            {
+                'title': project.title,
+                'description': project.description,
+                'url': project.url,
+                'start_date': project.start_date,
+                'end_date': project.end_date,
+            }
+            for project in resume.projects.all()
+        ],
+        'generated_on': timezone.now().strftime('%Y-%m-%d %H:%M'),
+    }
+
+
+def _text(value):
+    return escape(str(value)).replace('\n', '<br/>')
+
+
+def _section(title):
+    return [
+        Paragraph(_text(title), STYLES['section']),
+        HRFlowable(
+            width='100%',
+            thickness=1,
+            color=colors.HexColor('#bdc3c7'),
+            spaceBefore=2,
+            spaceAfter=8,
+        ),
+    ]
+
+
+def _skills_table(skills, width):
+    cells = [
+        Paragraph(
+            f'<b>{_text(name)}</b> - <font size="7">{_text(level)}</font>',
+            STYLES['skill'],
+        )
+        for name, level in skills
+    ]
+    rows = [list(row) for row in batched(cells, 3)]
+    rows[-1] += [''] * (3 - len(rows[-1]))
+    table = Table(rows, colWidths=[width / 3] * 3)
+    table.setStyle(
+        TableStyle(
+            [
+                ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#f8f9fa')),
+                ('GRID', (0, 0), (-1, -1), 0.75, colors.HexColor('#dee2e6')),
+                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+                ('TOPPADDING', (0, 0), (-1, -1), 6),
+                ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+            ]
+        )
+    )
+    return table
+
+
+def _project_dates(project):
+    start, end = project['start_date'], project['end_date']
+    dates = start.strftime('%b %Y') if start else ''
+    return f"{dates} - {end.strftime('%b %Y')}" if end else f'{dates} - Present'
+
+
+class ProjectParagraph(Paragraph):
+    """Paragraph with the blue left border of a ``.project`` block."""
+
+    bar_width = 2.25
+
+    def __init__(self, text, style, dates='', **kwargs):
+        super().__init__(text, style, **kwargs)
+        self.dates = dates
+
+    def draw(self):
+        super().draw()
+        canvas = self.canv
+        canvas.saveState()
+        canvas.setStrokeColor(LINK)
+        canvas.setLineWidth(self.bar_width)
+        bar_x = self.bar_width / 2
+        canvas.line(bar_x, -self.style.spaceAfter, bar_x, self.height)
+        if self.dates:
+            dates_style = STYLES['project_dates']
+            canvas.setFont(dates_style.fontName, dates_style.fontSize)
+            canvas.setFillColor(dates_style.textColor)
+            canvas.drawRightString(
+                self.width - self.style.rightIndent,
+                self.height - self.style.fontSize,
+                self.dates,
+            )
+        canvas.restoreState()
+
+
+def _project(project):
+    # title, dates (drawn on the right of the title) and url are short
+    flowables = [
+        ProjectParagraph(
+            _text(project['title']),
+            STYLES['project_title'],
+            dates=_project_dates(project),
+        )
+    ]
+    if project['url']:
+        flowables.append(ProjectParagraph(_text(project['url']), STYLES['project_url']))
+    return [
+        KeepTogether(flowables),
+        ProjectParagraph(_text(project['description']), STYLES['project_body']),
+        Spacer(1, 11),
+    ]
+
+
+def draw_resume_pdf(data):
+    """
+    Draw the resume straight onto ReportLab platypus flowables.
+
+    Follows the layout of cvsai/resume_pdf.html: header with name, title and
+    contacts, then summary, skills table and projects.
+    """
+    result = io.BytesIO()
+    doc = SimpleDocTemplate(
+        result,
+        pagesize=A4,
+        leftMargin=1 * cm,
+        rightMargin=1 * cm,
+        topMargin=1 * cm,
+        bottomMargin=1 * cm,
+        title=f"{data['full_name']} - Resume",
+    )
+    width = doc.width - 12  # default frame padding is 6pt on each side
+
+    story = [
+        Paragraph(_text(data['full_name']), STYLES['name']),
+        Paragraph(_text(data['title']), STYLES['title']),
+    ]
+    if data['contacts']:
+        contacts = ' | '.join(
+            f'{_text(kind)}: {_text(value)}' for kind, value in data['contacts']
+        )
+        story.append(Paragraph(contacts, STYLES['contacts']))
+    story.append(
+        HRFlowable(
+            width='100%', thickness=1.5, color=DARK, spaceBefore=11, spaceAfter=15
+        )
+    )
+
+    if data['bio']:
+        story += _section('Professional Summary')
+        story += [Paragraph(_text(data['bio']), STYLES['body']), Spacer(1, 15)]
+
+    if data['skills']:
+        story += _section('Skills')
+        story += [_skills_table(data['skills'], width), Spacer(1, 15)]
+
+    if data['projects']:
+        story += _section('Projects')
+        for project in data['projects']:
+            story += _project(project)
+
+    def watermark(canvas, _doc):
+        canvas.saveState()
+        canvas.setFont('Helvetica', 6)
+        canvas.setFillColor(colors.HexColor('#cccccc'))
+        canvas.drawRightString(A4[0] - 10, 10, f"Generated on {data['generated_on']}")
+        canvas.restoreState()
+
+    try:
+        doc.build(story, onFirstPage=watermark, onLaterPages=watermark)
+    except Exception as exc:
+        raise PDFRenderError(exc) from exc
+    return result.getvalue()
+
+
+def get_renderer(renderer=None):
+    """Return the renderer name, defaulting to settings.CVSAI_PDF_RENDERER."""
+    renderer = renderer or getattr(settings, 'CVSAI_PDF_RENDERER', RENDERER_PISA)
+    if renderer not in PDF_RENDERERS:
+        raise ValueError(f'Unknown PDF renderer: {renderer}')
+    return renderer
+
+
+def resume_render_job(resume, renderer=None, template_src=RESUME_PDF_TEMPLATE):
+    """
+    Do the ORM/template part of a render in the calling process and return
+    ``(func, arg)``: ``func(arg)`` produces the PDF bytes and is picklable.
+    """
+    if get_renderer(renderer) == RENDERER_REPORTLAB:
+        return draw_resume_pdf, resume_pdf_data(resume)
+    return html_to_pdf, get_template(template_src).render({'resume': resume})
+
+
+def render_resume_pdf(
+    resume, renderer=None, template_src=RESUME_PDF_TEMPLATE, inline=False
+):
+    """
+    Render the resume PDF with the ``pisa`` (HTML template through xhtml2pdf)
+    or the ``reportlab`` (native drawing) renderer.
+
+    The CPU-heavy part runs in the PDF rendering engine unless ``inline``.
+    """
+    func, arg = resume_render_job(resume, renderer, template_src)
+    if inline:
+        return func(arg)
+    return get_pdf_engine().run(func, arg)
@@ -0,0 +1,187 @@
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from cvsai.models import Resume, Skill
+from cvsai.serializers import (
+    NESTED_MODELS,
+    NestedRowChanges,
+    ResumeBulkItemSerializer,
+    change_ids,
+    nested_items,
+    nested_rows,
+    skill_levels,
+)
+from cvsai.signals import schedule_resume_pdf_prerender
+
+RESULT_CREATED = 'created'
+RESULT_UPDATED = 'updated'
+RESULT_INVALID = 'invalid'
+
+# a batch losing the race for a new external_id is run again this many times
+BULK_UPSERT_ATTEMPTS = 3
+
+
+def _repeated_contacts(contacts):
+    """Return whether two contacts have the same type and value."""
+    keys = [(contact['contact_type'], contact['value']) for contact in contacts]
+    return len(set(keys)) != len(keys)
+
+
+def validate_resume_payloads(payloads):
+    """
+    Validate resume payloads in one pass.
+
+    Return ``(index, validated data)`` of the valid payloads and ``{index:
+    errors}`` of the others; an external_id repeated in the payloads, or a
+    contact type and value repeated in a payload, is an error.
+    """
+    valid, errors = [], {}
+    external_ids = set()
+    for index, payload in enumerate(payloads):
+        serializer = ResumeBulkItemSerializer(data=payload)
+        if not serializer.is_valid():
+            errors[index] = serializer.errors
+            continue
+        if _repeated_contacts(serializer.validated_data.get('contacts', [])):
+            errors[index] = {'contacts': ['Contact repeated in this resume.']}
+            continue
+        external_id = serializer.validated_data.get('external_id')
+        if external_id in external_ids:
+            errors[index] = {'external_id': ['Repeated in this request.']}
+            continue
+        if external_id:
+            external_ids.add(external_id)
+        valid.append((index, serializer.validated_data))
+    return valid, errors
+
+
+def _is_external_id_conflict(exc):
+    # the constraint is named after the column on SQLite and PostgreSQL
+    return 'external_id' in str(exc)
+
+
+def bulk_upsert_resumes(payloads, batch_size=None):
+    """
+    Create resumes from payloads in the ResumeCreateUpdateSerializer shape,
+    or update the resume with the same external_id, with batched queries for
+    the resumes and for every nested list.
+
+    The nested lists given for an existing resume are reconciled with its
+    rows like an update through ResumeCreateUpdateSerializer does. Return one
+    result per payload, in order: its ``status``, and the ``id`` and nested
+    ``changes`` or the ``errors``.
+
+    The batch runs in a transaction. When a concurrent request creates a
+    resume with one of the new external_ids first, the unique constraint
+    rolls the batch back and it is run again, updating that resume; other
+    integrity errors are raised.
+    """
+    batch_size = batch_size or getattr(settings, 'CVSAI_BULK_BATCH_SIZE', 500)
+    conflict = None
+    for _attempt in range(BULK_UPSERT_ATTEMPTS):
+        try:
+            with transaction.atomic():
+                return _upsert_resumes(payloads, batch_size)
+        except IntegrityError as exc:
+            if not _is_external_id_conflict(exc):
+                raise
+            conflict = exc
+    # still losing the race after the last attempt
+    raise conflict
+
+
+def _upsert_resumes(payloads, batch_size):
+    valid, errors = validate_resume_payloads(payloads)
+    items, updated_fields = _resolve_resumes(valid)
+    _write_resumes(items, updated_fields, batch_size)
+
+    writers, changes = _reconcile_nested(items)
+    for writer in writers.values():
+        writer.write(batch_size)
+
+    # bulk writes send no post_save signals
+    for _index, resume, _nested, _existing in items:
+        schedule_resume_pdf_prerender(resume.id)
+
+    results = [
+        {'index': index, 'status': RESULT_INVALID, 'errors': item_errors}
+        for index, item_errors in errors.items()
+    ]
+    for (index, resume, _nested, is_existing), change in zip(items, changes):
+        results.append(
+            {
+                'index': index,
+                'status': RESULT_UPDATED if is_existing else RESULT_CREATED,
+                'id': resume.id,
+                'external_id': resume.external_id,
+                'changes': {name: change_ids(item) for name, item in change.items()},
+            }
+        )
+    return sorted(results, key=lambda result: result['index'])
+
+
+def _resolve_resumes(valid):
+    """
+    Return ``(index, resume, nested lists, existing)`` of the valid payloads,
+    with their values set on a new resume or on the one with the same
+    external_id, and the names of the fields set on existing resumes.
+    """
+    external_ids = [
+        data['external_id'] for _index, data in valid if data.get('external_id')
+    ]
+    existing = Resume.objects.prefetch_related(
+        'resumeskill_set', 'projects', 'contacts'
+    ).in_bulk(external_ids, field_name='external_id')
+
+    now = timezone.now()
+    items, updated_fields = [], {'updated_at'}
+    for index, data in valid:
+        nested = {name: data.pop(name) for name in NESTED_MODELS if name in data}
+        resume = existing.get(data.get('external_id'))
+        is_existing = resume is not None
+        if not is_existing:
+            resume = Resume(**data)
+        else:
+            for attr, value in data.items():
+                setattr(resume, attr, value)
+            # bulk_update does not set auto_now fields
+            resume.updated_at = now
+            updated_fields.update(data)
+        items.append((index, resume, nested, is_existing))
+    return items, updated_fields
+
+
+def _write_resumes(items, updated_fields, batch_size):
+    created = [resume for _index, resume, _nested, existing in items if not existing]
+    updated = [resume for _index, resume, _nested, existing in items if existing]
+    Resume.objects.bulk_create(created, batch_size=batch_size)
+    if updated:
+        Resume.objects.bulk_update(
+            updated, sorted(updated_fields), batch_size=batch_size
+        )
+
+
+def _reconcile_nested(items):
+    """
+    Collect the nested row changes of every resume; return the
+    NestedRowChanges writers by nested list and the changes of each item.
+    """
+    skill_ids = set()
+    for _index, _resume, nested, _existing in items:
+        skill_ids.update(skill_levels(nested.get('skills', [])))
+    skills = Skill.objects.in_bulk(list(skill_ids))
+
+    writers = {name: NestedRowChanges(model) for name, model in NESTED_MODELS.items()}
+    changes = [
+        {
+            name: writers[name].reconcile(
+                resume,
+                nested_rows(resume, name) if is_existing else {},
+                nested_items(name, data, skills),
+            )
+            for name, data in nested.items()
+        }
+        for _index, resume, nested, is_existing in items
+    ]
+    return writers, changes
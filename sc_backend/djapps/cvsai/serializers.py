@@ -1,6 +1,141 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import prefetch_related_objects
+
 from cvsai.models import Contact, Project, Resume, ResumeSkill, Skill
+from cvsai.pdf_renderers import PDF_RENDERERS
 from rest_framework import serializers
 
+NESTED_MODELS = {'skills': ResumeSkill, 'projects': Project, 'contacts': Contact}
+
+
+def skill_levels(skills_data):
+    """
+    Return ``{skill id: level}`` of nested skills data; invalid skill ids are
+    skipped, the last level of a repeated skill wins.
+    """
+    levels = {}
+    for skill_data in skills_data:
+        try:
+            skill_id = int(skill_data.get('skill_id'))
+        except (TypeError, ValueError):
+            continue
+        levels[skill_id] = skill_data.get('level', 'intermediate')
+    return levels
+
+
+def nested_items(name, data, skills):
+    """
+    Return the ``(key, field values)`` pairs of a nested list, keyed like
+    nested_rows. Skills not in ``skills`` (known skill ids) are skipped.
+    """
+    if name == 'skills':
+        return [
+            (skill_id, {'skill_id': skill_id, 'level': level})
+            for skill_id, level in skill_levels(data).items()
+            if skill_id in skills
+        ]
+    items = []
+    for values in data:
+        key = values.pop('id', None)
+        if key is None and name == 'contacts':
+            key = (values['contact_type'], values['value'])
+        items.append((key, values))
+    return items
+
+
+def nested_rows(resume, name):
+    """Return the rows of a nested list of the resume by match key."""
+    if name == 'skills':
+        # skills are matched by skill id
+        return {row.skill_id: row for row in resume.resumeskill_set.all()}
+    if name == 'projects':
+        return {row.id: row for row in resume.projects.all()}
+    # contacts are matched by id, or by type and value
+    rows = {}
+    for row in resume.contacts.all():
+        rows[row.id] = rows[(row.contact_type, row.value)] = row
+    return rows
+
+
+class NestedRowChanges:
+    """
+    Changes to the rows of a resume child model, collected for one or many
+    resumes and written with one query per kind of change.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.created = []
+        self.updated = []
+        self.changed_fields = set()
+        self.deleted = []
+
+    def reconcile(self, resume, rows, items):
+        """
+        Collect the changes making the rows of the resume match ``items``, a
+        list of ``(key, field values)`` pairs.
+
+        An item whose key is in ``rows`` (existing rows by key) updates that
+        row when a value differs, other items are created and rows left
+        unmatched are deleted. Return the resume's ``created`` and
+        ``updated`` rows and ``deleted`` ids, see change_ids.
+        """
+        matched = set()
+        created, updated = [], []
+        for key, values in items:
+            row = rows.get(key)
+            if row is None or row.id in matched:
+                created.append(self.model(resume=resume, **values))
+                continue
+            matched.add(row.id)
+            changed = [
+                name for name, value in values.items() if getattr(row, name) != value
+            ]
+            if changed:
+                for name in changed:
+                    setattr(row, name, values[name])
+                updated.append(row)
+                self.changed_fields.update(changed)
+
+        deleted = sorted({row.id for row in rows.values()} - matched)
+        self.created += created
+        self.updated += updated
+        self.deleted += deleted
+        return {'created': created, 'updated': updated, 'deleted': deleted}
+
+    def write(self, batch_size=None):
+        if self.deleted:
+            self.model.objects.filter(id__in=self.deleted).delete()
+        if self.updated:
+            self.model.objects.bulk_update(
+                self.updated, sorted(self.changed_fields), batch_size=batch_size
+            )
+        # sets the ids of the created rows
+        self.model.objects.bulk_create(self.created, batch_size=batch_size)
+
+
+def change_ids(changes):
+    """Return changes of NestedRowChanges.reconcile with ids, once written."""
+    return {
+        'created': [row.id for row in changes['created']],
+        'updated': [row.id for row in changes['updated']],
+        'deleted': changes['deleted'],
+    }
+
+
+# a mixin, the public methods are those of the serializer it is mixed into
+# pylint: disable-next=too-few-public-methods
+class DynamicFieldsMixin:
+    """Serializer taking a ``fields`` argument: the names of the fields to keep."""
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
 
 class SkillSerializer(serializers.ModelSerializer):
     """Serializer for Skill model."""
@@ -24,6 +159,9 @@ class ResumeSkillSerializer(serializers.ModelSerializer):
 class ProjectSerializer(serializers.ModelSerializer):
     """Serializer for Project model."""
 
+    # writable: nested updates match projects by id
+    id = serializers.IntegerField(required=False)
+
     class Meta:
         model = Project
         fields = [
@@ -41,12 +179,15 @@ class ProjectSerializer(serializers.ModelSerializer):
 class ContactSerializer(serializers.ModelSerializer):
     """Serializer for Contact model."""
 
+    # writable: nested updates match contacts by id
+    id = serializers.IntegerField(required=False)
+
     class Meta:
         model = Contact
         fields = ['id', 'contact_type', 'value']
 
 
-class ResumeSerializer(serializers.ModelSerializer):
+class ResumeSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """Serializer for Resume model."""
 
     skills = ResumeSkillSerializer(source='resumeskill_set', many=True, read_only=True)
@@ -62,6 +203,7 @@ class ResumeSerializer(serializers.ModelSerializer):
             'lastname',
             'title',
             'bio',
+            'external_id',
             'full_name',
             'skills',
             'projects',
@@ -89,82 +231,169 @@ class ResumeCreateUpdateSerializer(serializers.ModelSerializer):
             'lastname',
             'title',
             'bio',
+            'external_id',
             'skills',
             'projects',
             'contacts',
         ]
 
+    def validate_external_id(self, value):
+        # blank keys are not unique, store them as NULL
+        return value or None
+
+    @transaction.atomic
     def create(self, validated_data):
         """Create resume with nested relationships."""
-        skills_data = validated_data.pop('skills', [])
-        projects_data = validated_data.pop('projects', [])
-        contacts_data = validated_data.pop('contacts', [])
+        nested = {name: validated_data.pop(name, []) for name in NESTED_MODELS}
 
         # Create resume
         resume = Resume.objects.create(**validated_data)
 
-        # Create skills
-        self._create_skills(resume, skills_data)
-
-        # Create projects
-        self._create_projects(resume, projects_data)
-
-        # Create contacts
-        self._create_contacts(resume, contacts_data)
-
+        # bulk writes send no post_save signals, saving the resume has
+        # already scheduled its PDF pre-render for the end of the transaction
+        resume.nested_changes = self._save_nested(resume, nested, existing=False)
         return resume
 
+    @transaction.atomic
     def update(self, instance, validated_data):
-        """Update resume with nested relationships."""
-        skills_data = validated_data.pop('skills', None)
-        projects_data = validated_data.pop('projects', None)
-        contacts_data = validated_data.pop('contacts', None)
+        """
+        Update resume with nested relationships: the rows of every nested list
+        given are reconciled with it, so unchanged rows keep their ids.
+        """
+        nested = {
+            name: validated_data.pop(name)
+            for name in NESTED_MODELS
+            if name in validated_data
+        }
 
         # Update basic fields
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
         instance.save()
 
-        # Update skills if provided
-        if skills_data is not None:
-            instance.resumeskill_set.all().delete()
-            self._create_skills(instance, skills_data)
+        instance.nested_changes = self._save_nested(instance, nested, existing=True)
+        return instance
 
-        # Update projects if provided
-        if projects_data is not None:
-            instance.projects.all().delete()
-            self._create_projects(instance, projects_data)
+    def _save_nested(self, resume, nested, existing):
+        """
+        Helper method to reconcile the given nested lists with the rows of the
+        resume (none when not ``existing``), with one query for the skills.
+        """
+        skills = {}
+        if nested.get('skills'):
+            skills = Skill.objects.in_bulk(list(skill_levels(nested['skills'])))
+
+        changes = {}
+        for name, data in nested.items():
+            writer = NestedRowChanges(NESTED_MODELS[name])
+            rows = nested_rows(resume, name) if existing else {}
+            changes[name] = writer.reconcile(
+                resume, rows, nested_items(name, data, skills)
+            )
+            writer.write()
+        return {name: change_ids(change) for name, change in changes.items()}
 
-        # Update contacts if provided
-        if contacts_data is not None:
-            instance.contacts.all().delete()
-            self._create_contacts(instance, contacts_data)
+    def to_representation(self, instance):
+        """
+        Return full representation after create/update, with the ids of the
+        nested rows created, updated and deleted in ``changes``.
+        """
+        prefetch_related_objects(
+            [instance], 'resumeskill_set__skill', 'projects', 'contacts'
+        )
+        data = ResumeSerializer(instance).data
+        if hasattr(instance, 'nested_changes'):
+            data['changes'] = instance.nested_changes
+        return data
 
-        return instance
 
-    def _create_skills(self, resume, skills_data):
-        """Helper method to create skills."""
-        for skill_data in skills_data:
-            skill_id = skill_data.get('skill_id')
-            level = skill_data.get('level', 'intermediate')
-
-            if skill_id:
-                try:
-                    skill = Skill.objects.get(id=skill_id)
-                    ResumeSkill.objects.create(resume=resume, skill=skill, level=level)
-                except Skill.DoesNotExist:
-                    continue
-
-    def _create_projects(self, resume, projects_data):
-        """Helper method to create projects."""
-        for project_data in projects_data:
-            Project.objects.create(resume=resume, **project_data)
-
-    def _create_contacts(self, resume, contacts_data):
-        """Helper method to create contacts."""
-        for contact_data in contacts_data:
-            Contact.objects.create(resume=resume, **contact_data)
+class ResumeBulkItemSerializer(ResumeCreateUpdateSerializer):
+    """
+    One resume of a bulk upsert: an existing external_id updates that resume
+    instead of failing validation.
+    """
 
-    def to_representation(self, instance):
-        """Return full representation after create/update."""
-        return ResumeSerializer(instance).data
+    class Meta(ResumeCreateUpdateSerializer.Meta):
+        extra_kwargs = {'external_id': {'validators': []}}
+
+
+class RequestSerializer(serializers.Serializer):
+    """Serializer validating request data only, it never saves anything."""
+
+    def create(self, validated_data):
+        raise TypeError(f'{type(self).__name__} does not create objects.')
+
+    def update(self, instance, validated_data):
+        raise TypeError(f'{type(self).__name__} does not update objects.')
+
+
+class ResumePDFExportSerializer(RequestSerializer):
+    """Serializer for bulk resume PDF export requests."""
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, allow_empty=False
+    )
+    search = serializers.CharField(required=False, allow_blank=False)
+    skill = serializers.CharField(required=False, allow_blank=False)
+    renderer = serializers.ChoiceField(choices=PDF_RENDERERS, required=False)
+    mode = serializers.ChoiceField(
+        choices=['stream', 'async'], required=False, default='stream'
+    )
+
+    def validate(self, attrs):
+        if not any(attrs.get(name) for name in ('ids', 'search', 'skill')):
+            raise serializers.ValidationError(
+                'Provide resume ids or a filter (search, skill).'
+            )
+        return attrs
+
+
+class CVEmailDeliverySerializer(RequestSerializer):
+    """One resume to one recipient."""
+
+    resume_id = serializers.IntegerField(min_value=1)
+    email = serializers.EmailField()
+
+
+class CVEmailBatchSerializer(RequestSerializer):
+    """
+    Serializer for batch CV email requests: every resume of ``resume_ids`` to
+    every address of ``recipients``, and/or explicit ``deliveries``.
+    """
+
+    resume_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, allow_empty=False
+    )
+    recipients = serializers.ListField(
+        child=serializers.EmailField(), required=False, allow_empty=False
+    )
+    deliveries = CVEmailDeliverySerializer(many=True, required=False)
+
+    def validate(self, attrs):
+        if bool(attrs.get('resume_ids')) != bool(attrs.get('recipients')):
+            raise serializers.ValidationError(
+                'resume_ids and recipients must be given together.'
+            )
+
+        pairs = [
+            (resume_id, email)
+            for resume_id in attrs.get('resume_ids', [])
+            for email in attrs.get('recipients', [])
+        ]
+        pairs += [
+            (delivery['resume_id'], delivery['email'])
+            for delivery in attrs.get('deliveries', [])
+        ]
+        pairs = list(dict.fromkeys(pairs))
+        if not pairs:
+            raise serializers.ValidationError(
+                'Provide resume_ids with recipients, or deliveries.'
+            )
+
+        max_deliveries = getattr(settings, 'CVSAI_EMAIL_MAX_DELIVERIES', 500)
+        if len(pairs) > max_deliveries:
+            raise serializers.ValidationError(
+                f'At most {max_deliveries} emails can be sent at once.'
+            )
+        attrs['pairs'] = pairs
+        return attrs
@@ -0,0 +1,66 @@
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from cvsai.models import Contact, Project, Resume, ResumeSkill
+from cvsai.tasks import prerender_lock_key, prerender_resume_pdf
+
+logger = logging.getLogger(__name__)
+
+
+def schedule_resume_pdf_prerender(resume_id):
+    """
+    Queue a background PDF render of the resume once the transaction commits.
+
+    Calls within CVSAI_PDF_PRERENDER_DEBOUNCE seconds are collapsed into one
+    task, which renders the state of the resume at the time it runs.
+    """
+    if not getattr(settings, 'CVSAI_PDF_PRERENDER', True):
+        return
+    if not getattr(settings, 'CVSAI_PDF_CACHE_ENABLED', True):
+        return
+    # robust: a failing pre-render must not fail the request that saved
+    transaction.on_commit(lambda: _enqueue_prerender(resume_id), robust=True)
+
+
+def _enqueue_prerender(resume_id):
+    delay = getattr(settings, 'CVSAI_PDF_PRERENDER_DEBOUNCE', 10)
+    lock_key = prerender_lock_key(resume_id)
+    try:
+        # A task already waiting for its countdown will pick this edit up
+        if not cache.add(lock_key, 1, timeout=delay + 60):
+            return
+        prerender_resume_pdf.apply_async((resume_id,), countdown=delay)
+    except Exception as exc:
+        logger.warning(
+            "Unable to queue PDF pre-render of resume %s: %s", resume_id, exc
+        )
+        try:
+            cache.delete(lock_key)
+        except Exception as cleanup_exc:
+            # the lock expires on its own
+            logger.warning(
+                "Unable to release PDF pre-render lock of resume %s: %s",
+                resume_id,
+                cleanup_exc,
+            )
+
+
+@receiver(post_save, sender=Resume)
+@receiver(post_delete, sender=Resume)
+def resume_changed(instance, **kwargs):
+    schedule_resume_pdf_prerender(instance.pk)
+
+
+@receiver(post_save, sender=ResumeSkill)
+@receiver(post_delete, sender=ResumeSkill)
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+@receiver(post_save, sender=Contact)
+@receiver(post_delete, sender=Contact)
+def resume_child_changed(instance, **kwargs):
+    schedule_resume_pdf_prerender(instance.resume_id)
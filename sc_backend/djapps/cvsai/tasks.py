@@ -1,14 +1,49 @@
-import os
-import tempfile
-
 from django.conf import settings
+from django.core.cache import cache
 from django.core.mail import EmailMessage
 from django.template.loader import render_to_string
 
 from celery import shared_task
 
+from .mail import get_worker_mail_connection, send_messages_batched
 from .models import Resume
-from .utils import render_to_pdf
+from .pdf_cache import get_pdf_cache, get_resume_pdf
+from .pdf_export import (
+    EXPORT_DONE,
+    EXPORT_FAILED,
+    build_resume_pdf_zip,
+    export_queryset,
+    set_export_state,
+)
+from .translation_jobs import (
+    JOB_RUNNING,
+    JOB_SUCCESS,
+    fail_translation_job,
+    get_translation_job,
+    update_translation_job,
+)
+from .translation_store import get_resume_translation
+
+
+def prerender_lock_key(resume_id):
+    """Cache key marking that a PDF pre-render of the resume is already queued."""
+    return f'cvsai:pdf_prerender:{resume_id}'
+
+
+def build_cv_email(resume, recipient_email, pdf_content):
+    """Return the CV email message with the resume PDF attached."""
+    email = EmailMessage(
+        subject=f'CV: {resume.full_name} - {resume.title}',
+        body=render_to_string(
+            'cvsai/emails/cv_email.txt',
+            {'resume': resume, 'recipient_email': recipient_email},
+        ),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[recipient_email],
+    )
+    filename = f"{resume.full_name.replace(' ', '_')}_resume.pdf"
+    email.attach(filename, pdf_content, 'application/pdf')
+    return email
 
 
 @shared_task
@@ -23,65 +58,192 @@ def send_cv_pdf_email(resume_id, recipient_email):
     Returns:
         dict: Result of the email sending operation
     """
-    # Get the resume
-    resume = Resume.objects.filter(id=resume_id).firtst()
+    resume = (
+        Resume.objects.filter(id=resume_id)
+        .prefetch_related('resumeskill_set__skill', 'projects', 'contacts')
+        .first()
+    )
     if not resume:
         return {'status': 'error', 'message': f'Resume with ID {resume_id} not found'}
-    # Generate PDF
     try:
-        # Create a temporary file for the PDF
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-            # Use our existing PDF utility
-            pdf_response = render_to_pdf(
-                'cvsai/resume_pdf.html',
+        # Read from the PDF cache, rendered only when the resume changed
+        pdf_content = get_resume_pdf(resume)
+
+        email = build_cv_email(resume, recipient_email, pdf_content)
+
+        # Send email over the SMTP session kept open by this worker
+        get_worker_mail_connection().send_messages([email])
+
+        return {
+            'status': 'success',
+            'message': f'CV sent successfully to {recipient_email}',
+            'resume_id': resume_id,
+            'recipient': recipient_email,
+        }
+
+    except Exception as exc:
+        return {'status': 'error', 'message': f'Failed to send email: {str(exc)}'}
+
+
+@shared_task
+def send_cv_pdf_emails(deliveries):
+    """
+    Celery task to send CV PDFs to many recipients.
+
+    Args:
+        deliveries (list): ``[resume_id, recipient_email]`` pairs
+
+    Each resume PDF is rendered (or read from the PDF cache) once and all
+    emails go through one mail connection, see cvsai.mail.
+
+    Returns:
+        dict: Number of sent emails and the deliveries that failed
+    """
+    # JSON serialization turns the pairs into lists, dedupe them as tuples
+    deliveries = list(dict.fromkeys(map(tuple, deliveries)))
+    resumes = (
+        Resume.objects.filter(id__in={resume_id for resume_id, _ in deliveries})
+        .prefetch_related('resumeskill_set__skill', 'projects', 'contacts')
+        .in_bulk()
+    )
+
+    failed = []
+    emails = []
+    sending = []
+    pdfs = {}
+    for resume_id, recipient_email in deliveries:
+        resume = resumes.get(resume_id)
+        if resume is None:
+            failed.append(
+                {
+                    'resume_id': resume_id,
+                    'recipient': recipient_email,
+                    'error': 'Resume not found',
+                }
+            )
+            continue
+        if resume_id not in pdfs:
+            try:
+                pdfs[resume_id] = get_resume_pdf(resume)
+            except Exception as exc:
+                pdfs[resume_id] = exc
+        if isinstance(pdfs[resume_id], Exception):
+            failed.append(
+                {
+                    'resume_id': resume_id,
+                    'recipient': recipient_email,
+                    'error': f'Failed to generate PDF: {pdfs[resume_id]}',
+                }
+            )
+            continue
+        emails.append(build_cv_email(resume, recipient_email, pdfs[resume_id]))
+        sending.append((resume_id, recipient_email))
+
+    sent = 0
+    results = send_messages_batched(emails)
+    for (resume_id, recipient_email), (_email, error) in zip(sending, results):
+        if error is None:
+            sent += 1
+        else:
+            failed.append(
                 {
-                    'resume': resume,
-                },
-                f"{resume.full_name}_resume.pdf",
+                    'resume_id': resume_id,
+                    'recipient': recipient_email,
+                    'error': f'Failed to send email: {error}',
+                }
             )
 
-            # Write PDF content to temporary file
-            tmp_file.write(pdf_response.content)
-            tmp_file_path = tmp_file.name
+    if not failed:
+        status = 'success'
+    else:
+        status = 'partial' if sent else 'error'
+    return {'status': status, 'sent': sent, 'failed': failed}
 
-        # Prepare email
-        subject = f'CV: {resume.full_name} - {resume.title}'
 
-        # Email body
-        email_body = render_to_string(
-            'cvsai/emails/cv_email.txt',
-            {'resume': resume, 'recipient_email': recipient_email},
-        )
+@shared_task(ignore_result=True)
+def prerender_resume_pdf(resume_id):
+    """
+    Celery task to render the resume PDF into the PDF cache.
+
+    Queued (debounced) by cvsai.signals whenever a resume or one of its
+    skills, projects or contacts is saved or deleted.
+    """
+    # Edits made from now on must queue a new render
+    cache.delete(prerender_lock_key(resume_id))
+
+    pdf_cache = get_pdf_cache()
+    if pdf_cache is None:
+        return
+
+    resume = (
+        Resume.objects.filter(id=resume_id)
+        .prefetch_related('resumeskill_set__skill', 'projects', 'contacts')
+        .first()
+    )
+    if not resume:
+        pdf_cache.delete_resume(resume_id)
+        return
 
-        # Create email message
-        email = EmailMessage(
-            subject=subject,
-            body=email_body,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[recipient_email],
+    get_resume_pdf(resume)
+
+
+@shared_task
+def export_resume_pdfs(export_id, resume_ids, renderer=None):
+    """
+    Celery task to build a ZIP archive of resume PDFs for a bulk export.
+
+    The archive is written to MEDIA_ROOT/pdf_exports/<export_id>.zip and is
+    served by the export download endpoint once complete; the export state
+    read by that endpoint is set to done or failed.
+    """
+    try:
+        path = build_resume_pdf_zip(
+            export_id, export_queryset(ids=resume_ids), renderer
         )
+    except Exception as exc:
+        set_export_state(export_id, EXPORT_FAILED, error=f'Export failed: {exc}')
+        return {'status': 'error', 'export_id': export_id, 'message': str(exc)}
 
-        # Attach PDF
-        filename = f"{resume.full_name.replace(' ', '_')}_resume.pdf"
-        with open(tmp_file_path, 'rb') as file_obj:
-            email.attach(filename, file_obj.read(), 'application/pdf')
+    size = path.stat().st_size
+    set_export_state(export_id, EXPORT_DONE, size=size)
+    return {'status': 'success', 'export_id': export_id, 'size': size}
 
-        # Send email
-        email.send()
 
-        # Clean up temporary file
-        os.unlink(tmp_file_path)
+@shared_task
+def translate_resume(job_id):
+    """
+    Celery task translating a resume for a translation job.
 
-        return {
-            'status': 'success',
-            'message': f'CV sent successfully to {recipient_email}',
-            'resume_id': resume_id,
-            'recipient': recipient_email,
-        }
+    Progress (translated fields out of total) and the translated content are
+    stored in the job state read by the job status endpoint, see
+    cvsai.translation_jobs.
+    """
+    job = get_translation_job(job_id)
+    if job is None:
+        return {'status': 'error', 'message': f'Translation job {job_id} expired'}
+
+    resume = (
+        Resume.objects.filter(id=job['resume_id'])
+        .prefetch_related('resumeskill_set__skill', 'projects', 'contacts')
+        .first()
+    )
+    if not resume:
+        fail_translation_job(job_id, f'Resume with ID {job["resume_id"]} not found')
+        return {'status': 'error', 'job_id': job_id}
 
+    update_translation_job(job_id, status=JOB_RUNNING)
+    try:
+        content = get_resume_translation(
+            resume,
+            job['language'],
+            progress=lambda done, total: update_translation_job(
+                job_id, done=done, total=total
+            ),
+            strict=True,
+        )
     except Exception as exc:
-        # Clean up temporary file if it exists
-        if 'tmp_file_path' in locals() and os.path.exists(tmp_file_path):
-            os.unlink(tmp_file_path)
+        fail_translation_job(job_id, f'Translation failed: {exc}')
+        return {'status': 'error', 'job_id': job_id}
 
-        return {'status': 'error', 'message': f'Failed to send email: {str(exc)}'}
+    update_translation_job(job_id, status=JOB_SUCCESS, translated_content=content)
+    return {'status': 'success', 'job_id': job_id}
@@ -1,6 +1,12 @@
 
+from django.core.cache import cache
+
 import pytest
+
+from cvsai.mail import close_worker_mail_connection
 from cvsai.models import Contact, Project, Resume, ResumeSkill, Skill
+from cvsai.translation_limits import reset_provider_limits
+from cvsai.translation_memory import get_translation_memory
 
 
 @pytest.fixture
@@ -58,3 +64,34 @@ def multiple_resumes():
         )
         resumes.append(resume)
     return resumes
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    """Keep rendered files (PDF cache etc.) out of the repository media dir."""
+    settings.MEDIA_ROOT = str(tmp_path / "media")
+    return settings.MEDIA_ROOT
+
+
+@pytest.fixture(autouse=True)
+def worker_mail_connection():
+    """Do not carry the worker SMTP session over to the next test."""
+    yield
+    close_worker_mail_connection()
+
+
+@pytest.fixture(autouse=True)
+def translation_memory():
+    """Start every test with an empty translation memory."""
+    memory = get_translation_memory()
+    yield memory
+    memory.clear_local()
+    memory.stats.clear()
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def provider_limits():
+    """Do not carry open circuits and rate limits over to the next test."""
+    yield
+    reset_provider_limits()
@@ -1,12 +1,18 @@
 import json
+from unittest import mock
 
+from django.db import IntegrityError
+from django.db.models import QuerySet
 from django.urls import reverse
 
 import pytest
+import requests
 from rest_framework import status
 from rest_framework.test import APIClient
 
 from cvsai.models import Resume, Skill
+from cvsai.resume_bulk import bulk_upsert_resumes
+from cvsai.tasks import send_cv_pdf_emails
 from cvsai.tests.constants import TEST_EMAIL
 
 
@@ -146,6 +152,151 @@ class TestResumeAPI:
         # Verify deletion in database
         assert not Resume.objects.filter(id=sample_resume.pk).exists()
 
+    def test_create_resume_query_budget(
+        self, api_client, django_assert_max_num_queries
+    ):
+        """Test that nested rows are written in bulk, whatever their number."""
+        skills = Skill.objects.bulk_create(
+            Skill(name=f'Skill {i}') for i in range(30)
+        )
+        payload = {
+            'firstname': 'Bulk',
+            'lastname': 'Writer',
+            'title': 'Developer',
+            'bio': 'Bulk writes',
+            'skills': [
+                {'skill_id': skill.id, 'level': 'advanced'} for skill in skills
+            ]
+            + [{'skill_id': 999999}],
+            'projects': [
+                {
+                    'title': f'Project {i}',
+                    'description': 'Project description',
+                    'start_date': '2024-01-01',
+                }
+                for i in range(20)
+            ],
+            'contacts': [
+                {'contact_type': 'email', 'value': f'bulk{i}@example.com'}
+                for i in range(8)
+            ],
+        }
+        url = reverse('cvsai_api:resume-list-create')
+
+        # savepoint, resume, skills lookup, 3 bulk INSERTs, release and the
+        # prefetched representation
+        with django_assert_max_num_queries(12):
+            response = api_client.post(
+                url, data=json.dumps(payload), content_type='application/json'
+            )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        data = response.json()
+        assert len(data['skills']) == 30
+        assert len(data['projects']) == 20
+        assert len(data['contacts']) == 8
+
+    def test_update_resume_nested(self, api_client, sample_resume):
+        """Test that PUT replaces the nested rows given."""
+        skill = Skill.objects.create(name='Go')
+        url = reverse('cvsai_api:resume-detail', kwargs={'pk': sample_resume.pk})
+        payload = {
+            'firstname': 'Oleksandr',
+            'lastname': 'Shtalinberg',
+            'title': 'Go Developer',
+            'bio': 'Gopher',
+            'skills': [
+                {'skill_id': str(skill.id), 'level': 'beginner'},
+                {'skill_id': skill.id, 'level': 'expert'},
+                {'skill_id': 'unknown'},
+            ],
+            'contacts': [],
+        }
+
+        response = api_client.put(
+            url, data=json.dumps(payload), content_type='application/json'
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert [
+            (item['skill']['name'], item['level']) for item in data['skills']
+        ] == [('Go', 'expert')]
+        assert len(data['projects']) == 1
+        assert data['contacts'] == []
+
+    def test_patch_reconciles_nested_rows(self, api_client, sample_resume):
+        """Test that nested rows are matched, not deleted and re-created."""
+        resume_skill = sample_resume.resumeskill_set.get()
+        project = sample_resume.projects.get()
+        contact = sample_resume.contacts.get()
+        url = reverse('cvsai_api:resume-detail', kwargs={'pk': sample_resume.pk})
+        payload = {
+            'skills': [{'skill_id': resume_skill.skill_id, 'level': 'expert'}],
+            'projects': [
+                {'id': project.id, 'title': 'Renamed Project'},
+                {
+                    'title': 'New Project',
+                    'description': 'Added by PATCH',
+                    'start_date': '2025-02-01',
+                },
+            ],
+            # matched by type and value, unchanged
+            'contacts': [{'contact_type': 'email', 'value': contact.value}],
+        }
+
+        response = api_client.patch(
+            url, data=json.dumps(payload), content_type='application/json'
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        new_project = sample_resume.projects.exclude(id=project.id).get()
+        assert data['changes'] == {
+            'skills': {'created': [], 'updated': [resume_skill.id], 'deleted': []},
+            'projects': {
+                'created': [new_project.id],
+                'updated': [project.id],
+                'deleted': [],
+            },
+            'contacts': {'created': [], 'updated': [], 'deleted': []},
+        }
+        project.refresh_from_db()
+        assert project.title == 'Renamed Project'
+        assert project.description == 'A test project for testing purposes'
+        assert sample_resume.resumeskill_set.get().level == 'expert'
+        assert sample_resume.contacts.get().id == contact.id
+
+    def test_put_deletes_removed_rows(self, api_client, sample_resume):
+        """Test that only rows missing from a nested list are deleted."""
+        contact = sample_resume.contacts.get()
+        project = sample_resume.projects.get()
+        url = reverse('cvsai_api:resume-detail', kwargs={'pk': sample_resume.pk})
+        payload = {
+            'firstname': 'Oleksandr',
+            'lastname': 'Shtalinberg',
+            'title': 'Python Django Developer',
+            'bio': 'Same bio',
+            'projects': [],
+            'contacts': [
+                {'id': contact.id, 'contact_type': 'email', 'value': contact.value},
+                {'contact_type': 'github', 'value': 'https://github.com/o'},
+            ],
+        }
+
+        response = api_client.put(
+            url, data=json.dumps(payload), content_type='application/json'
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        changes = response.json()['changes']
+        assert set(changes) == {'projects', 'contacts'}
+        assert changes['projects']['deleted'] == [project.id]
+        assert changes['contacts']['updated'] == []
+        assert len(changes['contacts']['created']) == 1
+        assert not sample_resume.projects.exists()
+        assert sample_resume.resumeskill_set.count() == 1
+
     def test_resume_not_found(self, api_client):
         """Test 404 for non-existent resume."""
         url = reverse('cvsai_api:resume-detail', kwargs={'pk': 9999})
@@ -185,6 +336,425 @@ class TestSkillAPI:
         assert Skill.objects.filter(name='JavaScript').exists()
 
 
+def bulk_payload(index, skill, **fields):
+    """Resume payload of the bulk API."""
+    return {
+        'firstname': f'Bulk{index}',
+        'lastname': 'Import',
+        'title': 'Developer',
+        'bio': 'Imported resume',
+        'external_id': f'ext-{index}',
+        'skills': [{'skill_id': skill.id, 'level': 'advanced'}],
+        'projects': [
+            {
+                'title': f'Project {index}',
+                'description': 'Imported project',
+                'start_date': '2024-01-01',
+            }
+        ],
+        'contacts': [{'contact_type': 'email', 'value': f'bulk{index}@example.com'}],
+        **fields,
+    }
+
+
+@pytest.mark.django_db
+class TestResumeBulkAPI:
+    """Test cases for the bulk resume upsert endpoint."""
+
+    @pytest.fixture
+    def prerender(self):
+        with mock.patch('cvsai.resume_bulk.schedule_resume_pdf_prerender') as patched:
+            yield patched
+
+    def test_create(
+        self, api_client, sample_skill, prerender, django_assert_max_num_queries
+    ):
+        """Test that resumes and nested rows are inserted in batches."""
+        payloads = [bulk_payload(index, sample_skill) for index in range(50)]
+        payloads.append({'firstname': 'Missing fields'})
+
+        # savepoint, external ids, resumes, skills, 3 nested INSERTs, release
+        # and the request log
+        with django_assert_max_num_queries(9):
+            response = api_client.post(
+                reverse('cvsai_api:resume-bulk'),
+                data=json.dumps(payloads),
+                content_type='application/json',
+            )
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert (data['created'], data['updated'], data['invalid']) == (50, 0, 1)
+        assert data['results'][50]['status'] == 'invalid'
+        assert 'lastname' in data['results'][50]['errors']
+        first = data['results'][0]
+        assert first['status'] == 'created'
+        assert first['external_id'] == 'ext-0'
+        resume = Resume.objects.get(id=first['id'])
+        assert resume.projects.get().title == 'Project 0'
+        assert resume.resumeskill_set.get().skill == sample_skill
+        assert resume.contacts.get().value == 'bulk0@example.com'
+        assert prerender.call_count == 50
+
+    def test_upsert_by_external_id(self, api_client, sample_resume, prerender):
+        """Test that a known external_id updates its resume in place."""
+        sample_resume.external_id = 'ext-1'
+        sample_resume.save()
+        project = sample_resume.projects.get()
+        payload = {
+            'firstname': 'Oleksandr',
+            'lastname': 'Shtalinberg',
+            'title': 'Architect',
+            'bio': 'Updated by import',
+            'external_id': 'ext-1',
+            'projects': [
+                {
+                    'id': project.id,
+                    'title': 'Imported title',
+                    'description': project.description,
+                    'start_date': '2025-01-01',
+                    'url': project.url,
+                }
+            ],
+        }
+
+        response = api_client.post(
+            reverse('cvsai_api:resume-bulk'),
+            data=json.dumps([payload]),
+            content_type='application/json',
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        [result] = response.json()['results']
+        assert result['status'] == 'updated'
+        assert result['id'] == sample_resume.id
+        assert result['changes'] == {
+            'projects': {'created': [], 'updated': [project.id], 'deleted': []}
+        }
+        updated_at = sample_resume.updated_at
+        sample_resume.refresh_from_db()
+        assert sample_resume.title == 'Architect'
+        assert sample_resume.updated_at > updated_at
+        assert sample_resume.projects.get().title == 'Imported title'
+        # nested lists left out are kept
+        assert sample_resume.contacts.count() == 1
+        prerender.assert_called_once_with(sample_resume.id)
+
+    def test_concurrently_created_resume_is_updated(
+        self, api_client, sample_resume, sample_skill, prerender
+    ):
+        """Test that losing the race for a new external_id updates the winner."""
+        in_bulk = QuerySet.in_bulk
+        lookups = []
+
+        def lost_race(queryset, *args, **kwargs):
+            # the first lookup runs before the concurrent request commits
+            if queryset.model is Resume and not lookups:
+                lookups.append(args)
+                return {}
+            return in_bulk(queryset, *args, **kwargs)
+
+        Resume.objects.filter(id=sample_resume.id).update(external_id='ext-1')
+        with mock.patch.object(
+            QuerySet, 'in_bulk', autospec=True, side_effect=lost_race
+        ):
+            response = api_client.post(
+                reverse('cvsai_api:resume-bulk'),
+                data=json.dumps([bulk_payload(1, sample_skill, title='Imported')]),
+                content_type='application/json',
+            )
+
+        assert response.status_code == status.HTTP_200_OK
+        [result] = response.json()['results']
+        assert result['status'] == 'updated'
+        assert result['id'] == sample_resume.id
+        assert Resume.objects.get().title == 'Imported'
+        prerender.assert_called_once_with(sample_resume.id)
+
+    def test_repeated_contact_is_invalid(self, api_client, sample_skill, prerender):
+        """Test that a contact repeated in a payload fails that payload only."""
+        repeated = bulk_payload(1, sample_skill)
+        repeated['contacts'] *= 2
+
+        response = api_client.post(
+            reverse('cvsai_api:resume-bulk'),
+            data=json.dumps([repeated, bulk_payload(2, sample_skill)]),
+            content_type='application/json',
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        results = response.json()['results']
+        assert [result['status'] for result in results] == ['invalid', 'created']
+        assert 'contacts' in results[0]['errors']
+
+    def test_other_integrity_errors_are_not_retried(self, sample_skill, prerender):
+        """Test that only external_id conflicts run the batch again."""
+        error = IntegrityError('UNIQUE constraint failed: cvsai_contact.value')
+        with mock.patch(
+            'cvsai.resume_bulk._upsert_resumes', side_effect=error
+        ) as upsert, pytest.raises(IntegrityError):
+            bulk_upsert_resumes([bulk_payload(1, sample_skill)])
+        assert upsert.call_count == 1
+
+    def test_ndjson(self, api_client, sample_skill, prerender):
+        """Test that NDJSON bodies are accepted and repeated keys rejected."""
+        lines = [
+            json.dumps(bulk_payload(1, sample_skill)),
+            '',
+            json.dumps(bulk_payload(1, sample_skill, title='Twice')),
+        ]
+
+        response = api_client.post(
+            reverse('cvsai_api:resume-bulk'),
+            data='\n'.join(lines),
+            content_type='application/x-ndjson',
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        results = response.json()['results']
+        assert [result['status'] for result in results] == ['created', 'invalid']
+        assert Resume.objects.get().title == 'Developer'
+
+    def test_invalid_body(self, api_client, settings):
+        """Test that non-list and oversized bodies are rejected."""
+        url = reverse('cvsai_api:resume-bulk')
+        response = api_client.post(
+            url, data=json.dumps({'firstname': 'x'}), content_type='application/json'
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        settings.CVSAI_BULK_MAX_RESUMES = 1
+        response = api_client.post(
+            url, data=json.dumps([{}, {}]), content_type='application/json'
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        response = api_client.post(
+            url, data='{"firstname": ', content_type='application/x-ndjson'
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+    """Test cases for the cursor pagination of the list endpoints."""
+
+    @pytest.fixture
+    def resumes(self):
+        resumes = Resume.objects.bulk_create(
+            Resume(firstname=f'Page{i}', lastname='User', bio='bio') for i in range(5)
+        )
+        # ties on created_at are broken by id
+        Resume.objects.filter(id__in=[r.id for r in resumes[1:4]]).update(
+            created_at=resumes[1].created_at
+        )
+        return Resume.objects.order_by('-created_at', '-id')
+
+    def walk(self, api_client, url, link='next'):
+        """Follow the links from url, return the ids of every page."""
+        pages = []
+        while url:
+            response = api_client.get(url)
+            assert response.status_code == status.HTTP_200_OK
+            data = response.json()
+            assert 'count' not in data
+            pages.append([item['id'] for item in data['results']])
+            url = data[link]
+        return pages
+
+    def test_walk_resumes(self, api_client, resumes):
+        """Test that pages follow (created_at, id) without gaps or repeats."""
+        url = reverse('cvsai_api:resume-list-create') + '?page_size=2'
+        pages = self.walk(api_client, url)
+
+        expected = [resume.id for resume in resumes]
+        assert pages == [expected[0:2], expected[2:4], expected[4:5]]
+
+    def test_previous(self, api_client, resumes):
+        """Test that previous links walk the pages back."""
+        url = reverse('cvsai_api:resume-list-create') + '?page_size=2'
+        first = api_client.get(url).json()
+        second = api_client.get(first['next']).json()
+        third = api_client.get(second['next']).json()
+        assert first['previous'] is None
+        assert third['next'] is None
+
+        pages = self.walk(api_client, third['previous'], link='previous')
+        expected = [resume.id for resume in resumes]
+        assert pages == [expected[2:4], expected[0:2]]
+
+    def test_skills(self, api_client):
+        """Test that skills are paged by name."""
+        Skill.objects.bulk_create(Skill(name=name) for name in 'edcba')
+        url = reverse('cvsai_api:skill-list-create') + '?page_size=3'
+        response = api_client.get(url)
+        names = [skill['name'] for skill in response.json()['results']]
+        assert names == ['a', 'b', 'c']
+        response = api_client.get(response.json()['next'])
+        assert [skill['name'] for skill in response.json()['results']] == ['d', 'e']
+
+    def test_page_numbers(self, api_client, resumes):
+        """Test that ?page= opts into page-number pagination."""
+        url = reverse('cvsai_api:resume-list-create')
+        response = api_client.get(url, {'page': 2, 'page_size': 2})
+        data = response.json()
+        assert data['count'] == 5
+        assert [item['id'] for item in data['results']] == [
+            resume.id for resume in resumes[2:4]
+        ]
+
+    def test_invalid_cursor(self, api_client):
+        """Test that a malformed cursor is a 404."""
+        url = reverse('cvsai_api:resume-list-create')
+        response = api_client.get(url, {'cursor': 'not-a-cursor'})
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+class TestResumeFields:
+    """Test cases for ?fields= and ?expand= on the resume endpoints."""
+
+    def test_sparse_list(
+        self, api_client, sample_resume, django_assert_max_num_queries
+    ):
+        """Test that only the chosen columns are loaded, without prefetches."""
+        url = reverse('cvsai_api:resume-list-create')
+
+        # the resumes and the request log
+        with django_assert_max_num_queries(2) as queries:
+            response = api_client.get(url, {'fields': 'id,full_name,title'})
+
+        assert response.status_code == status.HTTP_200_OK
+        [item] = response.json()['results']
+        assert item == {
+            'id': sample_resume.id,
+            'full_name': 'Oleksandr Shtalinberg',
+            'title': 'Python Django Developer',
+        }
+        assert '"bio"' not in queries.captured_queries[0]['sql']
+
+    def test_expand(self, api_client, sample_resume):
+        """Test that nested fields are returned only when expanded."""
+        url = reverse('cvsai_api:resume-detail', kwargs={'pk': sample_resume.pk})
+        response = api_client.get(url, {'expand': 'skills'})
+
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data['bio'] == sample_resume.bio
+        assert data['skills'][0]['skill']['name'] == 'Python'
+        assert 'projects' not in data
+        assert 'contacts' not in data
+
+    def test_fields_and_expand(self, api_client, sample_resume):
+        """Test that expanded fields are added to the chosen ones."""
+        url = reverse('cvsai_api:resume-list-create')
+        response = api_client.get(url, {'fields': 'id', 'expand': 'contacts'})
+
+        [item] = response.json()['results']
+        assert set(item) == {'id', 'contacts'}
+        assert item['contacts'][0]['value'] == TEST_EMAIL
+
+    def test_unknown_fields(self, api_client, sample_resume):
+        """Test that unknown fields are rejected."""
+        url = reverse('cvsai_api:resume-list-create')
+        response = api_client.get(url, {'fields': 'id,salary', 'expand': 'bio'})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert set(response.json()) == {'fields', 'expand'}
+
+
+@pytest.mark.django_db
+class TestResumeEmailBatchAPI:
+    """Test cases for the batch CV email endpoint."""
+
+    @pytest.fixture
+    def delay(self):
+        with mock.patch.object(send_cv_pdf_emails, 'delay') as patched:
+            patched.return_value.id = 'task-id'
+            yield patched
+
+    def test_queue_batch(self, api_client, sample_resume, delay):
+        """Test POST /api/resumes/send-email/ - queue one task for all emails."""
+        url = reverse('cvsai_api:resume-send-email')
+        data = {
+            'resume_ids': [sample_resume.pk],
+            'recipients': ['a@example.com', 'b@example.com'],
+            'deliveries': [
+                {'resume_id': sample_resume.pk, 'email': 'a@example.com'},
+                {'resume_id': sample_resume.pk, 'email': 'c@example.com'},
+            ],
+        }
+        response = api_client.post(url, data, format='json')
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert response.json() == {'status': 'queued', 'task_id': 'task-id', 'count': 3}
+        delay.assert_called_once_with(
+            [
+                [sample_resume.pk, 'a@example.com'],
+                [sample_resume.pk, 'b@example.com'],
+                [sample_resume.pk, 'c@example.com'],
+            ]
+        )
+
+    def test_invalid_batch(self, api_client, delay):
+        """Test that recipients without resumes are rejected."""
+        url = reverse('cvsai_api:resume-send-email')
+        response = api_client.post(
+            url, {'recipients': ['a@example.com']}, format='json'
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        delay.assert_not_called()
+
+
+@pytest.mark.django_db
+class TestResumeTranslationAPI:
+    """Test cases for the stored resume translation endpoint."""
+
+    def test_get_translation(self, settings, api_client, sample_resume):
+        """Test GET /api/resumes/{id}/translations/{language}/."""
+        settings.TRANSLATION_SERVICE = 'mock'
+        url = reverse(
+            'cvsai_api:resume-translation',
+            kwargs={'pk': sample_resume.pk, 'language': 'kw'},
+        )
+        response = api_client.get(url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()['title'] == '[MOCK KW] Python Django Developer'
+        assert sample_resume.translations.filter(language='kw').exists()
+
+    def test_unsupported_language(self, api_client, sample_resume):
+        """Test that unsupported languages are rejected."""
+        url = reverse(
+            'cvsai_api:resume-translation',
+            kwargs={'pk': sample_resume.pk, 'language': 'xx'},
+        )
+        assert api_client.get(url).status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_translation_metrics(settings, api_client, sample_resume):
+    """Test GET /api/translation/metrics/ - provider and memory metrics."""
+    settings.TRANSLATION_SERVICE = 'openai'
+    settings.OPENAI_API_KEY = 'key'
+    error = requests.ConnectionError('down')
+    with mock.patch('requests.Session.post', side_effect=error):
+        api_client.get(
+            reverse(
+                'cvsai_api:resume-translation',
+                kwargs={'pk': sample_resume.pk, 'language': 'kw'},
+            )
+        )
+
+    response = api_client.get(reverse('cvsai_api:translation-metrics'))
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data['providers']['openai']['circuit']['failures'] == 1
+    assert data['providers']['openai']['circuit']['state'] == 'closed'
+    assert data['translation_memory']['misses'] == 5
+
+
 @pytest.mark.django_db
 class TestAPIValidation:
     """Test API validation and error handling."""
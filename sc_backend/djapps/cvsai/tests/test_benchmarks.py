@@ -0,0 +1,181 @@
+import json
+
+from django.core.management import CommandError, call_command
+
+import pytest
+import requests
+
+from cvsai.benchmarks import find_regressions, percentile, size_grid
+from cvsai.fake_translation_server import FakeTranslationServer
+from cvsai.models import Resume
+
+SUITE_ARGS = [
+    '--grid',
+    '--projects', '2',
+    '--skills', '3',
+    '--bio-sizes', '100',
+    '--renderer', 'reportlab',
+    '--iterations', '1',
+    '--no-rss',
+]  # fmt: skip
+
+
+def test_size_grid():
+    """Test that the grid covers every size combination."""
+    cases = size_grid(projects=(0, 10), skills=(5,), bio_sizes=(100, 1000))
+    assert [case['name'] for case in cases] == [
+        'p0-s5-b100',
+        'p0-s5-b1000',
+        'p10-s5-b100',
+        'p10-s5-b1000',
+    ]
+
+
+def test_find_regressions():
+    """Test that only metrics over the threshold are reported."""
+    baseline = [
+        {'name': 'small', 'renderer': 'pisa', 'cpu_ms_median': 100, 'peak_kib': 500}
+    ]
+    results = [
+        {'name': 'small', 'renderer': 'pisa', 'cpu_ms_median': 120, 'peak_kib': 800},
+        {'name': 'new', 'renderer': 'pisa', 'cpu_ms_median': 900, 'peak_kib': 900},
+    ]
+    regressions = find_regressions(results, baseline, threshold=1.25)
+    assert regressions == ['small/pisa peak_kib: 500 -> 800 (x1.60)']
+
+
+@pytest.mark.django_db
+class TestBenchmarkPDFSuiteCommand:
+    """Test cases for the benchmark_pdf_suite management command."""
+
+    def test_writes_json_results(self, tmp_path):
+        """Test that results are written as JSON and data is rolled back."""
+        output = tmp_path / 'bench.json'
+        call_command('benchmark_pdf_suite', *SUITE_ARGS, '--output', str(output))
+
+        report = json.loads(output.read_text())
+        assert report['environment']['reportlab_layout_version']
+        [row] = report['results']
+        assert row['name'] == 'p2-s3-b100'
+        assert row['renderer'] == 'reportlab'
+        assert row['cpu_ms_median'] > 0
+        assert row['peak_kib'] > 0
+        assert row['size_bytes'] > 0
+        assert not Resume.objects.exists()
+
+    def test_fails_on_regression(self, tmp_path):
+        """Test that the command fails when a metric regressed."""
+        baseline = tmp_path / 'baseline.json'
+        row = {'name': 'p2-s3-b100', 'renderer': 'reportlab', 'peak_kib': 1}
+        baseline.write_text(json.dumps({'results': [row]}))
+
+        with pytest.raises(CommandError, match='peak_kib'):
+            call_command(
+                'benchmark_pdf_suite',
+                *SUITE_ARGS,
+                '--output',
+                str(tmp_path / 'bench.json'),
+                '--baseline',
+                str(baseline),
+            )
+
+
+def test_percentile():
+    """Test nearest-rank percentiles."""
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile([7], 95) == 7
+
+
+@pytest.fixture
+def fake_server():
+    server = FakeTranslationServer(seed=1).start()
+    yield server
+    server.stop()
+
+
+class TestFakeTranslationServer:
+    """Test cases for the fake translation server."""
+
+    def test_google(self, fake_server):
+        """Test that Google v2 requests are answered text by text."""
+        response = requests.post(
+            fake_server.settings['GOOGLE_TRANSLATE_URL'],
+            data={'q': ['one', 'two'], 'target': 'co', 'key': 'fake'},
+            timeout=5,
+        )
+        translations = response.json()['data']['translations']
+        assert [item['translatedText'] for item in translations] == [
+            '[FAKE CO] one',
+            '[FAKE CO] two',
+        ]
+        assert fake_server.stats['texts'] == 2
+
+    def test_openai_batch(self, fake_server):
+        """Test that JSON batch prompts get a JSON object of translations."""
+        prompt = 'Translate every string from en to kw. Return JSON:\n\n["a", "b"]'
+        response = requests.post(
+            fake_server.settings['OPENAI_API_URL'],
+            json={
+                'messages': [{'role': 'user', 'content': prompt}],
+                'response_format': {'type': 'json_object'},
+                'max_tokens': 50,
+            },
+            timeout=5,
+        )
+        content = response.json()['choices'][0]['message']['content']
+        assert json.loads(content) == {'translations': ['[FAKE KW] a', '[FAKE KW] b']}
+        assert fake_server.stats['max_tokens'] == 50
+        assert fake_server.stats['completion_tokens'] > 0
+
+    def test_errors_and_rate_limit(self):
+        """Test that errors and requests over the rate limit are answered."""
+        server = FakeTranslationServer(error_rate=1.0, rate_limit=1).start()
+        try:
+            url = server.settings['GOOGLE_TRANSLATE_URL']
+            statuses = [
+                requests.post(url, data={'q': 'a'}, timeout=5).status_code
+                for _ in range(2)
+            ]
+        finally:
+            server.stop()
+        assert statuses == [503, 429]
+        assert server.stats['errors'] == 1
+        assert server.stats['rate_limited'] == 1
+
+
+@pytest.mark.django_db
+class TestBenchmarkTranslationCommand:
+    """Test cases for the benchmark_translation management command."""
+
+    def test_writes_json_results(self, tmp_path):
+        """Test that every provider and scenario is measured and rolled back."""
+        output = tmp_path / 'bench.json'
+        call_command(
+            'benchmark_translation',
+            '--iterations', '2',
+            '--projects', '2',
+            '--skills', '2',
+            '--bio-size', '200',
+            '--latency', '0',
+            '--jitter', '0',
+            '--output', str(output),
+        )  # fmt: skip
+
+        report = json.loads(output.read_text())
+        rows = {(row['provider'], row['scenario']): row for row in report['results']}
+        assert set(rows) == {
+            (provider, scenario)
+            for provider in ('google', 'openai', 'mock')
+            for scenario in ('content', 'view')
+        }
+        for row in rows.values():
+            assert 0 < row['p50_ms'] <= row['p95_ms'] <= row['max_ms']
+        assert rows['google', 'content']['calls_per_resume'] >= 1
+        # title, bio, 2 skill levels, 2 project titles and the description
+        # shared by both synthetic projects (unique texts only)
+        assert rows['google', 'view']['texts_per_resume'] == 7
+        assert rows['openai', 'content']['completion_tokens_per_resume'] > 0
+        assert rows['mock', 'content']['calls_per_resume'] == 0
+        assert not Resume.objects.exists()
@@ -0,0 +1,152 @@
+import smtplib
+import socketserver
+import threading
+from unittest import mock
+
+from django.core.mail import EmailMessage
+
+import pytest
+
+from cvsai.mail import PersistentMailConnection, send_messages_batched
+
+
+class SMTPStubHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP to accept messages from smtplib."""
+
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply('220 stub ESMTP')
+        while line := self.rfile.readline():
+            command = line.decode().strip().upper()
+            if command.startswith('EHLO'):
+                self.reply('250 stub')
+            elif command == 'DATA':
+                self.reply('354 end with .')
+                while self.rfile.readline() not in (b'.\r\n', b''):
+                    pass
+                self.server.messages += 1
+                self.reply('250 queued')
+                if self.server.drop_after_message:
+                    return
+            elif command == 'NOOP':
+                self.server.noops += 1
+                self.reply('250 ok')
+            elif command == 'QUIT':
+                self.reply('221 bye')
+                return
+            else:
+                # MAIL, RCPT, RSET
+                self.reply('250 ok')
+
+
+@pytest.fixture
+def smtp_server(settings):
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), SMTPStubHandler)
+    server.daemon_threads = True
+    server.connections = 0
+    server.messages = 0
+    server.noops = 0
+    server.drop_after_message = False
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+
+    settings.EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+    settings.EMAIL_HOST, settings.EMAIL_PORT = server.server_address
+    settings.EMAIL_USE_TLS = False
+    settings.EMAIL_HOST_USER = ''
+    settings.EMAIL_TIMEOUT = 5
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_messages(count):
+    return [
+        EmailMessage('CV', 'Body', 'noreply@example.com', [f'hr{i}@example.com'])
+        for i in range(count)
+    ]
+
+
+class TestPersistentMailConnection:
+    """Test cases for the mail connection reused across tasks."""
+
+    def test_session_is_reused(self, smtp_server):
+        """Test that consecutive sends share one SMTP session."""
+        connection = PersistentMailConnection()
+        for message in make_messages(3):
+            connection.send_messages([message])
+        connection.close()
+
+        assert smtp_server.messages == 3
+        assert smtp_server.connections == 1
+
+    def test_session_is_renewed(self, smtp_server):
+        """Test the per-session message cap and the idle timeout."""
+        connection = PersistentMailConnection(max_messages=2)
+        for message in make_messages(3):
+            connection.send_messages([message])
+        assert smtp_server.connections == 2
+
+        connection.idle_timeout = 0
+        connection.send_messages(make_messages(1))
+        connection.close()
+        assert smtp_server.connections == 3
+        assert smtp_server.messages == 4
+
+    def test_health_check_only_after_idle(self, smtp_server):
+        """Test that NOOP is skipped between back-to-back sends."""
+        connection = PersistentMailConnection()
+        for message in make_messages(3):
+            connection.send_messages([message])
+        assert smtp_server.noops == 0
+
+        connection.health_check_after = 0
+        connection.send_messages(make_messages(1))
+        connection.close()
+        assert smtp_server.noops == 1
+        assert smtp_server.connections == 1
+
+    def test_reconnect_after_server_closed_session(self, smtp_server):
+        """Test that a session closed by the server is replaced transparently."""
+        smtp_server.drop_after_message = True
+        connection = PersistentMailConnection()
+        for message in make_messages(2):
+            connection.send_messages([message])
+
+        assert smtp_server.messages == 2
+        assert smtp_server.connections == 2
+
+    def test_retry_when_dropped_during_send(self):
+        """Test that a send interrupted by a disconnect is retried once."""
+        backend = mock.Mock()
+        backend.send_messages.side_effect = [smtplib.SMTPServerDisconnected(), 1]
+        connection = PersistentMailConnection(connection_factory=lambda: backend)
+
+        assert connection.send_messages(make_messages(1)) == 1
+        assert backend.open.call_count == 2
+
+
+class TestSendMessagesBatched:
+    """Test cases for sending many emails over one mail connection."""
+
+    def test_one_session_per_chunk(self, smtp_server):
+        """Test that a batch opens one session per max_messages emails."""
+        connection = PersistentMailConnection(max_messages=2)
+        results = send_messages_batched(make_messages(5), connection)
+
+        assert [error for _message, error in results] == [None] * 5
+        assert smtp_server.connections == 3
+
+    def test_failures_are_returned(self):
+        """Test that failed messages are returned with their error."""
+        connection = mock.Mock()
+        connection.send_messages.side_effect = [1, OSError('refused'), 1]
+        results = send_messages_batched(make_messages(3), connection)
+
+        errors = [error for _message, error in results]
+        assert errors[0] is None
+        assert isinstance(errors[1], OSError)
+        assert errors[2] is None
@@ -0,0 +1,387 @@
+import io
+import operator
+import os
+import threading
+import time
+import zipfile
+from unittest import mock
+
+from django.urls import reverse
+
+import pytest
+
+from cvsai import pdf_cache, pdf_renderers
+from cvsai.models import Project
+from cvsai.pdf_cache import PDFCache, get_resume_pdf, resume_pdf_key
+from cvsai.pdf_engine import PDFEngineBusy, PDFRenderEngine, PDFRenderTimeout
+from cvsai.pdf_export import iter_resume_pdfs
+from cvsai.pdf_renderers import RENDERER_REPORTLAB, render_resume_pdf
+from cvsai.tasks import export_resume_pdfs
+
+
+@pytest.mark.django_db
+class TestResumePDFCache:
+    """Test cases for the rendered resume PDF cache."""
+
+    def test_key_changes_with_related_content(self, sample_resume):
+        """Test that editing a child row produces a new cache key."""
+        key = resume_pdf_key(sample_resume)
+        assert key.startswith(f"{sample_resume.pk}-")
+        assert resume_pdf_key(sample_resume) == key
+
+        Project.objects.filter(resume=sample_resume).update(title="Renamed")
+        assert resume_pdf_key(sample_resume) != key
+
+    def test_repeat_download_skips_rendering(self, client, sample_resume):
+        """Test that the second download is served from the cache."""
+        url = reverse('cvsai:cv_download_pdf', kwargs={'pk': sample_resume.pk})
+        with mock.patch.object(
+            pdf_cache, 'render_resume_pdf', wraps=pdf_cache.render_resume_pdf
+        ) as render:
+            first = client.get(url)
+            second = client.get(url)
+
+        assert first.status_code == 200
+        assert second.status_code == 200
+        assert first['Content-Type'] == 'application/pdf'
+        assert b''.join(second.streaming_content) == b''.join(
+            first.streaming_content
+        )
+        assert render.call_count == 1
+
+    def test_stale_versions_are_replaced(self, sample_resume):
+        """Test that a new resume version replaces the old cached file."""
+        get_resume_pdf(sample_resume)
+        sample_resume.title = "Architect"
+        sample_resume.save()
+        get_resume_pdf(sample_resume)
+
+        files = list(PDFCache().root.glob(f"{sample_resume.pk}-*.pdf"))
+        assert [path.stem for path in files] == [resume_pdf_key(sample_resume)]
+
+    def test_busy_lock_renders_uncached(self, settings, sample_resume):
+        """Test that a miss does not wait past the lock timeout."""
+        settings.CVSAI_PDF_CACHE_LOCK_TIMEOUT = 0.1
+        cache = PDFCache()
+        key = resume_pdf_key(sample_resume)
+        with cache.lock(key) as locked:
+            assert locked
+            with cache.lock(key) as other:
+                assert not other
+            assert get_resume_pdf(sample_resume).startswith(b'%PDF')
+            assert cache.get(key) is None
+
+        assert get_resume_pdf(sample_resume).startswith(b'%PDF')
+        assert cache.get(key) is not None
+
+
+@pytest.mark.django_db
+class TestReportLabRenderer:
+    """Test cases for the native ReportLab resume renderer."""
+
+    def test_renders_resume(self, sample_resume):
+        """Test that the ReportLab renderer produces a PDF with the resume."""
+        content = render_resume_pdf(sample_resume, RENDERER_REPORTLAB)
+        assert content.startswith(b'%PDF')
+
+    def test_renderer_from_settings(self, sample_resume, settings):
+        """Test that the renderer is part of the cache key."""
+        pisa_key = resume_pdf_key(sample_resume)
+        settings.CVSAI_PDF_RENDERER = RENDERER_REPORTLAB
+        assert resume_pdf_key(sample_resume) != pisa_key
+        assert '-reportlab-' in resume_pdf_key(sample_resume)
+
+    def test_renderer_query_param(self, client, sample_resume):
+        """Test that the renderer can be chosen per download."""
+        url = reverse('cvsai:cv_download_pdf', kwargs={'pk': sample_resume.pk})
+        with mock.patch.object(
+            pdf_renderers, 'draw_resume_pdf', wraps=pdf_renderers.draw_resume_pdf
+        ) as draw:
+            response = client.get(url, {'renderer': 'reportlab'})
+        assert response.status_code == 200
+        draw.assert_called_once()
+
+        assert client.get(url, {'renderer': 'latex'}).status_code == 400
+
+
+def test_lru_eviction(tmp_path):
+    """Test that least recently used files go first when over the size cap."""
+    cache = PDFCache(root=tmp_path, max_size=25)
+    cache.set('1-a', b'x' * 10)
+    cache.set('2-a', b'x' * 10)
+    assert cache.read('1-a') is not None  # 2-a is now the oldest
+
+    cache.set('3-a', b'x' * 10)
+
+    assert cache.get('2-a') is None
+    assert cache.get('1-a') is not None
+    assert cache.get('3-a') is not None
+
+
+def test_lock_files_are_removed_with_entries(tmp_path):
+    """Test that evicted and deleted entries leave no lock files behind."""
+    cache = PDFCache(root=tmp_path, max_size=15)
+    for key in ['1-a', '2-a']:
+        with cache.lock(key):
+            cache.set(key, b'x' * 10)
+    assert not cache.lock_path('1-a').exists()
+    assert cache.lock_path('2-a').exists()
+
+    cache.delete_resume(2)
+    assert not list(tmp_path.iterdir())
+
+
+@pytest.mark.django_db
+class TestResumePDFDownload:
+    """Test cases for conditional and partial PDF downloads."""
+
+    @pytest.fixture
+    def pdf_url(self, sample_resume):
+        return reverse('cvsai:cv_download_pdf', kwargs={'pk': sample_resume.pk})
+
+    def test_validators_and_not_modified(self, client, pdf_url):
+        """Test that a matching If-None-Match is answered with 304."""
+        response = client.get(pdf_url)
+        assert response.status_code == 200
+        assert response['Accept-Ranges'] == 'bytes'
+        assert response['Last-Modified']
+        etag = response['ETag']
+
+        with mock.patch.object(pdf_cache, 'render_resume_pdf') as render:
+            response = client.get(pdf_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        render.assert_not_called()
+
+    def test_etag_changes_with_size(self, client, pdf_url, sample_resume):
+        """Test that a new render of the same key within the mtime gets a new ETag."""
+        etag = client.get(pdf_url)['ETag']
+        path = PDFCache().path(resume_pdf_key(sample_resume))
+        stat = path.stat()
+        path.write_bytes(path.read_bytes() + b'\n')
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+        response = client.get(pdf_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response['ETag'] != etag
+
+    def test_api_endpoint_not_modified(self, client, sample_resume):
+        """Test that the API PDF endpoint honours the same validators."""
+        url = reverse('cvsai_api:resume-pdf', kwargs={'pk': sample_resume.pk})
+        etag = client.get(url)['ETag']
+
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+
+    def test_range_request(self, client, pdf_url):
+        """Test that a byte range is answered with 206 and the partial body."""
+        full = b''.join(client.get(pdf_url).streaming_content)
+
+        response = client.get(pdf_url, HTTP_RANGE='bytes=0-99')
+        assert response.status_code == 206
+        assert response['Content-Range'] == f'bytes 0-99/{len(full)}'
+        assert b''.join(response.streaming_content) == full[:100]
+
+        response = client.get(pdf_url, HTTP_RANGE='bytes=-10')
+        assert b''.join(response.streaming_content) == full[-10:]
+
+    def test_unsatisfiable_range(self, client, pdf_url):
+        """Test that a range past the end of the file returns 416."""
+        response = client.get(pdf_url, HTTP_RANGE='bytes=99999999-')
+        assert response.status_code == 416
+
+    def test_stale_if_range_serves_full_file(self, client, pdf_url):
+        """Test that Range is ignored when If-Range does not match."""
+        response = client.get(
+            pdf_url, HTTP_RANGE='bytes=0-99', HTTP_IF_RANGE='"stale"'
+        )
+        assert response.status_code == 200
+
+    def test_x_accel_redirect(self, client, pdf_url, settings):
+        """Test that the body is left to nginx in x-accel-redirect mode."""
+        settings.CVSAI_PDF_SENDFILE = 'x-accel-redirect'
+        settings.CVSAI_PDF_SENDFILE_URL = '/protected/pdf/'
+
+        response = client.get(pdf_url)
+        assert response.status_code == 200
+        assert response['X-Accel-Redirect'].startswith('/protected/pdf/')
+        assert response['X-Accel-Redirect'].endswith('.pdf')
+        assert response.content == b''
+
+
+class TestPDFRenderEngine:
+    """Test cases for the process-pool PDF rendering engine."""
+
+    @pytest.fixture
+    def engine(self):
+        engine = PDFRenderEngine(workers=1, max_queue=0, timeout=30)
+        yield engine
+        engine.shutdown()
+
+    def test_render_in_worker_process(self, engine):
+        """Test that HTML is converted to PDF in the pool."""
+        content = engine.render('<html><body><h1>Hello</h1></body></html>')
+        assert content.startswith(b'%PDF')
+
+    def test_timeout_recycles_pool(self, engine):
+        """Test that a stuck render times out and the pool is replaced."""
+        engine.timeout = 0.5
+        with pytest.raises(PDFRenderTimeout):
+            engine.run(time.sleep, 10)
+
+        engine.timeout = 30
+        assert engine.run(operator.add, 1, 2) == 3
+
+    def test_timeout_spares_other_workers(self):
+        """Test that only the worker of the stuck render is killed."""
+        engine = PDFRenderEngine(workers=2, max_queue=0, timeout=30)
+        try:
+            # start both workers
+            assert engine.run(operator.add, 1, 2) == 3
+            assert engine.run(operator.add, 1, 2) == 3
+
+            engine.timeout = 1
+            results = {}
+
+            def run(name, seconds):
+                try:
+                    results[name] = engine.run(time.sleep, seconds)
+                except Exception as exc:
+                    results[name] = exc
+
+            stuck = threading.Thread(target=run, args=('stuck', 10))
+            stuck.start()
+            time.sleep(0.5)
+            run('other', 0.8)
+            stuck.join()
+            assert isinstance(results['stuck'], PDFRenderTimeout)
+            assert results['other'] is None
+        finally:
+            engine.shutdown()
+
+    def test_busy_when_queue_is_full(self, engine):
+        """Test that renders are rejected once every slot is taken."""
+        engine._slots.acquire()
+        try:
+            with pytest.raises(PDFEngineBusy):
+                engine.render('<html></html>')
+        finally:
+            engine._slots.release()
+
+    @pytest.mark.django_db
+    def test_busy_engine_returns_503(self, client, sample_resume):
+        """Test that a saturated engine is reported as 503 with Retry-After."""
+        url = reverse('cvsai:cv_download_pdf', kwargs={'pk': sample_resume.pk})
+        with mock.patch.object(
+            PDFRenderEngine, 'run', side_effect=PDFEngineBusy(7)
+        ):
+            response = client.get(url)
+
+        assert response.status_code == 503
+        assert response['Retry-After'] == '7'
+
+
+@pytest.mark.django_db
+class TestResumePDFExport:
+    """Test cases for the bulk resume PDF export."""
+
+    @pytest.fixture
+    def export_url(self):
+        return reverse('cvsai_api:resume-export')
+
+    def _archive(self, response):
+        return zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+
+    def test_streamed_zip(self, client, export_url, sample_resume, multiple_resumes):
+        """Test that the selected resumes are streamed as a ZIP of PDFs."""
+        get_resume_pdf(sample_resume)  # one of them is already cached
+        ids = [sample_resume.pk] + [resume.pk for resume in multiple_resumes[:2]]
+
+        response = client.post(
+            export_url, {'ids': ids}, content_type='application/json'
+        )
+
+        assert response.status_code == 200
+        assert response['Content-Type'] == 'application/zip'
+        archive = self._archive(response)
+        names = archive.namelist()
+        assert len(names) == 3
+        assert all(name.endswith('_resume.pdf') for name in names)
+        assert all(archive.read(name).startswith(b'%PDF') for name in names)
+
+    def test_filter_export(self, client, export_url, sample_resume, multiple_resumes):
+        """Test that resumes can be selected with a filter."""
+        response = client.post(
+            export_url, {'skill': 'python'}, content_type='application/json'
+        )
+        names = self._archive(response).namelist()
+        assert names == [f'oleksandr_shtalinberg_{sample_resume.pk}_resume.pdf']
+
+    def test_export_requires_selection(self, client, export_url):
+        """Test that an export without ids or filter is rejected."""
+        response = client.post(export_url, {}, content_type='application/json')
+        assert response.status_code == 400
+
+    def test_async_export(self, client, export_url, multiple_resumes):
+        """Test that the async mode builds the archive in a task."""
+        ids = [resume.pk for resume in multiple_resumes]
+        with mock.patch.object(export_resume_pdfs, 'delay') as delay:
+            response = client.post(
+                export_url,
+                {'ids': ids, 'mode': 'async'},
+                content_type='application/json',
+            )
+        assert response.status_code == 202
+        data = response.json()
+        delay.assert_called_once_with(data['export_id'], ids, None)
+
+        assert client.get(data['download_url']).status_code == 202
+        export_resume_pdfs(data['export_id'], ids)
+
+        response = client.get(data['download_url'])
+        assert response.status_code == 200
+        assert len(self._archive(response).namelist()) == 3
+
+    def test_async_export_states(self, client, export_url, multiple_resumes):
+        """Test that unknown exports are not found and failures are reported."""
+        unknown = reverse(
+            'cvsai_api:resume-export-download',
+            kwargs={'export_id': '00000000-0000-0000-0000-000000000000'},
+        )
+        assert client.get(unknown).status_code == 404
+
+        ids = [resume.pk for resume in multiple_resumes]
+        with mock.patch.object(export_resume_pdfs, 'delay'):
+            response = client.post(
+                export_url,
+                {'ids': ids, 'mode': 'async'},
+                content_type='application/json',
+            )
+        data = response.json()
+        assert client.get(data['download_url']).json()['status'] == 'queued'
+
+        with mock.patch(
+            'cvsai.tasks.build_resume_pdf_zip', side_effect=OSError('disk full')
+        ):
+            assert export_resume_pdfs(data['export_id'], ids)['status'] == 'error'
+        response = client.get(data['download_url'])
+        assert response.status_code == 500
+        assert response.json()['status'] == 'failed'
+        assert 'disk full' in response.json()['error']
+
+    def test_busy_engine_is_waited_for(self, settings, sample_resume):
+        """Test that export renders back off while the engine is busy."""
+        settings.CVSAI_PDF_CACHE_ENABLED = False
+        busy = PDFEngineBusy(5)
+        with mock.patch.object(
+            PDFRenderEngine, 'run', side_effect=[busy, busy, b'%PDF-1.4']
+        ) as run, mock.patch('cvsai.pdf_export.time.sleep') as sleep:
+            pdfs = list(iter_resume_pdfs([sample_resume]))
+        assert pdfs == [(sample_resume, b'%PDF-1.4', None)]
+        assert run.call_count == 3
+        assert [call.args[0] for call in sleep.call_args_list] == [0.1, 0.2]
+
+        settings.CVSAI_PDF_EXPORT_BUSY_TIMEOUT = 0
+        with mock.patch.object(PDFRenderEngine, 'run', side_effect=busy):
+            [(_resume, source, error)] = iter_resume_pdfs([sample_resume])
+        assert source is None
+        assert isinstance(error, PDFEngineBusy)
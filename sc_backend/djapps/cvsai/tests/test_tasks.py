@@ -0,0 +1,152 @@
+import smtplib
+from unittest import mock
+
+from django.core import mail
+
+import pytest
+
+from cvsai import pdf_cache
+from cvsai.models import Contact, Project, Resume
+from cvsai.pdf_cache import PDFCache, resume_pdf_key
+from cvsai.tasks import prerender_resume_pdf, send_cv_pdf_email, send_cv_pdf_emails
+
+
+@pytest.mark.django_db
+class TestPrerenderResumePDF:
+    """Test cases for background PDF pre-rendering."""
+
+    @pytest.fixture
+    def apply_async(self):
+        with mock.patch.object(prerender_resume_pdf, 'apply_async') as patched:
+            yield patched
+
+    def test_edits_are_debounced_into_one_task(
+        self, sample_resume, apply_async, django_capture_on_commit_callbacks
+    ):
+        """Test that a burst of edits queues a single render."""
+        with django_capture_on_commit_callbacks(execute=True):
+            sample_resume.title = "Lead Developer"
+            sample_resume.save()
+            Project.objects.create(
+                resume=sample_resume, title="Another", description="Another one"
+            )
+            Contact.objects.filter(resume=sample_resume).delete()
+
+        apply_async.assert_called_once()
+        assert apply_async.call_args.args[0] == (sample_resume.pk,)
+
+    def test_nothing_is_queued_before_commit(self, sample_resume, apply_async):
+        """Test that the task is only queued once the transaction commits."""
+        sample_resume.save()
+        apply_async.assert_not_called()
+
+    def test_cache_outage_does_not_fail_the_save(
+        self, sample_resume, django_capture_on_commit_callbacks
+    ):
+        """Test that an unreachable cache only skips the pre-render."""
+        down = ConnectionError('cache down')
+        with mock.patch('cvsai.signals.cache') as cache:
+            cache.add.side_effect = cache.delete.side_effect = down
+            with django_capture_on_commit_callbacks(execute=True):
+                sample_resume.save()
+        cache.delete.assert_called_once()
+
+    def test_task_stores_pdf(self, sample_resume):
+        """Test that the task renders the PDF into the cache."""
+        prerender_resume_pdf(sample_resume.pk)
+
+        resume = Resume.objects.get(pk=sample_resume.pk)
+        assert PDFCache().get(resume_pdf_key(resume)) is not None
+
+    def test_task_drops_pdf_of_deleted_resume(self, sample_resume):
+        """Test that the cached PDFs are removed with the resume."""
+        prerender_resume_pdf(sample_resume.pk)
+        resume_id = sample_resume.pk
+        sample_resume.delete()
+
+        prerender_resume_pdf(resume_id)
+        assert not list(PDFCache().root.glob(f"{resume_id}-*.pdf"))
+
+
+@pytest.mark.django_db
+class TestSendCVPDFEmail:
+    """Test cases for the CV email task."""
+
+    def test_pdf_is_attached(self, sample_resume):
+        """Test that the email carries the cached resume PDF."""
+        result = send_cv_pdf_email(sample_resume.pk, 'hr@example.com')
+
+        assert result['status'] == 'success'
+        [email] = mail.outbox
+        assert email.to == ['hr@example.com']
+        [(filename, content, mimetype)] = email.attachments
+        assert filename == 'Oleksandr_Shtalinberg_resume.pdf'
+        assert mimetype == 'application/pdf'
+        resume = Resume.objects.get(pk=sample_resume.pk)
+        assert content == PDFCache().read(resume_pdf_key(resume))
+
+    def test_pdf_is_rendered_once(self, sample_resume):
+        """Test that emails of the same resume version reuse one render."""
+        with mock.patch.object(
+            pdf_cache, 'render_resume_pdf', wraps=pdf_cache.render_resume_pdf
+        ) as render:
+            for i in range(3):
+                send_cv_pdf_email(sample_resume.pk, f'hr{i}@example.com')
+
+        assert len(mail.outbox) == 3
+        render.assert_called_once()
+
+    def test_missing_resume(self, db):
+        """Test that a missing resume is reported."""
+        result = send_cv_pdf_email(404, 'hr@example.com')
+        assert result['status'] == 'error'
+        assert not mail.outbox
+
+
+@pytest.mark.django_db
+class TestSendCVPDFEmails:
+    """Test cases for the batch CV email task."""
+
+    def test_each_pdf_is_rendered_once(self, sample_resume, multiple_resumes):
+        """Test that every resume is rendered once for all its recipients."""
+        other = multiple_resumes[0]
+        deliveries = [
+            [resume.pk, email]
+            for resume in (sample_resume, other)
+            for email in ('a@example.com', 'b@example.com')
+        ]
+        with mock.patch.object(
+            pdf_cache, 'render_resume_pdf', wraps=pdf_cache.render_resume_pdf
+        ) as render:
+            result = send_cv_pdf_emails(deliveries + deliveries[:1])
+
+        assert result == {'status': 'success', 'sent': 4, 'failed': []}
+        assert render.call_count == 2
+        assert sorted(email.to[0] for email in mail.outbox) == [
+            'a@example.com',
+            'a@example.com',
+            'b@example.com',
+            'b@example.com',
+        ]
+
+    def test_failures_are_reported(self, sample_resume):
+        """Test that missing resumes and refused recipients are listed."""
+        with mock.patch(
+            'django.core.mail.backends.locmem.EmailBackend.send_messages',
+            side_effect=[smtplib.SMTPRecipientsRefused({}), 1],
+        ):
+            result = send_cv_pdf_emails(
+                [
+                    [sample_resume.pk, 'bad@example.com'],
+                    [sample_resume.pk, 'good@example.com'],
+                    [404, 'good@example.com'],
+                ]
+            )
+
+        assert result['status'] == 'partial'
+        assert result['sent'] == 1
+        failed = [(item['resume_id'], item['recipient']) for item in result['failed']]
+        assert failed == [
+            (404, 'good@example.com'),
+            (sample_resume.pk, 'bad@example.com'),
+        ]
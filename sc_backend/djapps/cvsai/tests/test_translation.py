@@ -0,0 +1,691 @@
+import http.server
+import json
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
+from urllib.parse import parse_qsl
+
+from django.core.cache import cache
+from django.core.cache.backends.redis import RedisCache
+from django.utils import timezone
+
+import pytest
+import requests
+
+from cvsai.models import Project, Resume, ResumeTranslation, TranslationMemoryEntry
+from cvsai.text_chunks import count_tokens, join_text, split_text
+from cvsai.translation_limits import (
+    CIRCUIT_CLOSED,
+    CIRCUIT_OPEN,
+    SharedCircuitBreaker,
+    SharedTokenBucket,
+    TokenBucket,
+    get_circuit_breaker,
+    get_rate_limiter,
+    provider_metrics,
+)
+from cvsai.translation_memory import TranslationMemory
+from cvsai.translation_services import (
+    CircuitOpen,
+    GoogleTranslateService,
+    MockTranslationService,
+    OpenAITranslationService,
+    TranslationError,
+    TranslationMemoryService,
+    close_provider_sessions,
+    dispatch,
+    get_translation_service,
+    translate_cv_content,
+)
+from cvsai.translation_store import get_resume_translation, source_hash
+
+
+def http_response(payload, status_code=200):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = json.dumps(payload).encode()  # pylint: disable=protected-access
+    return response
+
+
+def openai_answer(translations):
+    content = json.dumps({'translations': translations})
+    return http_response({'choices': [{'message': {'content': content}}]})
+
+
+class TestTranslateMany:
+    """Test cases for batched translation."""
+
+    def test_empty_and_duplicate_texts(self):
+        """Test that empty texts are kept and duplicates translated once."""
+        service = MockTranslationService()
+        with mock.patch.object(
+            service, 'translate_batch', wraps=service.translate_batch
+        ) as batch:
+            result = service.translate_many(['Expert', '', 'Expert', 'Bio'], 'uk')
+
+        assert result == ['[MOCK UK] Expert', '', '[MOCK UK] Expert', '[MOCK UK] Bio']
+        batch.assert_called_once_with(['Expert', 'Bio'], 'uk', 'en', strict=False)
+
+    def test_google_sends_one_request(self, settings):
+        """Test that Google gets all texts as q parameters of one request."""
+        settings.GOOGLE_TRANSLATE_API_KEY = 'key'
+        translations = [{'translatedText': 'Один'}, {'translatedText': 'Два'}]
+        answer = http_response({'data': {'translations': translations}})
+        with mock.patch('requests.Session.post', return_value=answer) as post:
+            result = GoogleTranslateService().translate_many(['One', 'Two'], 'uk')
+
+        assert result == ['Один', 'Два']
+        post.assert_called_once()
+        params = post.call_args.kwargs['data']
+        assert [value for name, value in params if name == 'q'] == ['One', 'Two']
+
+    def test_google_error(self, settings):
+        """Test that a failed request keeps the error placeholder per text."""
+        settings.GOOGLE_TRANSLATE_API_KEY = 'key'
+        error = requests.ConnectionError('down')
+        with mock.patch('requests.Session.post', side_effect=error):
+            result = GoogleTranslateService().translate_many(['One', 'Two'], 'uk')
+
+        assert result == [
+            '[Translation error: down] One',
+            '[Translation error: down] Two',
+        ]
+
+    def test_openai_sends_one_request(self, settings):
+        """Test that OpenAI gets all texts as one JSON array prompt."""
+        settings.OPENAI_API_KEY = 'key'
+        answer = openai_answer(['Один', 'Два'])
+        with mock.patch('requests.Session.post', return_value=answer) as post:
+            result = OpenAITranslationService().translate_many(['One', 'Two'], 'uk')
+
+        assert result == ['Один', 'Два']
+        post.assert_called_once()
+        prompt = post.call_args.kwargs['json']['messages'][1]['content']
+        assert '["One", "Two"]' in prompt
+
+    def test_openai_falls_back_per_text(self, settings):
+        """Test that an answer with a wrong number of items is not trusted."""
+        settings.OPENAI_API_KEY = 'key'
+        single = http_response({'choices': [{'message': {'content': 'Один'}}]})
+        with mock.patch(
+            'requests.Session.post',
+            side_effect=[openai_answer(['Один']), single, single],
+        ) as post:
+            result = OpenAITranslationService().translate_many(['One', 'Two'], 'uk')
+
+        assert result == ['Один', 'Один']
+        assert post.call_count == 3
+
+
+class TestDispatch:
+    """Test cases for concurrent provider requests."""
+
+    @pytest.fixture
+    def limits(self, settings):
+        settings.TRANSLATION_PROVIDER_LIMITS = {
+            'test': {'max_in_flight': 2, 'deadline': 5}
+        }
+        return settings.TRANSLATION_PROVIDER_LIMITS['test']
+
+    def test_concurrent_in_order_within_limit(self, limits):
+        """Test that calls overlap up to max_in_flight and keep their order."""
+        running, peak = [0], [0]
+        lock = threading.Lock()
+
+        def call(item):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.05)
+            with lock:
+                running[0] -= 1
+            return item * 2
+
+        started = time.monotonic()
+        assert dispatch('test', call, [1, 2, 3, 4]) == [2, 4, 6, 8]
+        assert peak[0] == 2
+        assert time.monotonic() - started < 0.19
+
+    def test_deadline(self, limits):
+        """Test that calls not finished within the deadline raise."""
+        limits['deadline'] = 0.05
+        with pytest.raises(TranslationError, match='did not answer'):
+            dispatch('test', lambda item: time.sleep(0.2), [1])
+        with pytest.raises(TranslationError):
+            dispatch('test', lambda item: time.sleep(0.2), [1, 2])
+
+    def test_saturated_provider_does_not_starve_others(self, settings):
+        """Test that calls queued on one provider leave others their threads."""
+        settings.TRANSLATION_PROVIDER_LIMITS = {
+            'slow': {'max_in_flight': 1, 'deadline': 5},
+            'fast': {'max_in_flight': 1, 'deadline': 5},
+        }
+        release = threading.Event()
+        slow = threading.Thread(
+            target=dispatch, args=('slow', lambda item: release.wait(5), range(20))
+        )
+        slow.start()
+        try:
+            started = time.monotonic()
+            assert dispatch('fast', lambda item: item, [1, 2]) == [1, 2]
+            assert time.monotonic() - started < 0.5
+        finally:
+            release.set()
+            slow.join()
+
+    def test_first_error_is_raised(self, limits):
+        """Test that a failed call fails the whole dispatch."""
+
+        def call(item):
+            if item == 2:
+                raise TranslationError('failed')
+            return item
+
+        with pytest.raises(TranslationError, match='failed'):
+            dispatch('test', call, [1, 2, 3])
+
+    def test_google_chunks_run_concurrently(self, settings):
+        """Test that Google chunks are sent in parallel and joined in order."""
+        settings.GOOGLE_TRANSLATE_API_KEY = 'key'
+        threads = set()
+
+        def post(url, data, timeout):
+            threads.add(threading.current_thread().name)
+            time.sleep(0.02)
+            texts = [value for name, value in data if name == 'q']
+            translations = [{'translatedText': text.upper()} for text in texts]
+            return http_response({'data': {'translations': translations}})
+
+        service = GoogleTranslateService()
+        service.max_batch_items = 2
+        texts = [f'text {i}' for i in range(6)]
+        with mock.patch('requests.Session.post', side_effect=post) as patched:
+            result = service.translate_many(texts, 'uk')
+
+        assert result == [text.upper() for text in texts]
+        assert patched.call_count == 3
+        assert len(threads) > 1
+
+
+class TestProviderProtection:
+    """Test cases for provider rate limits, circuit breakers and fallbacks."""
+
+    def test_token_bucket(self):
+        """Test that bursts are allowed and further calls wait for a token."""
+        bucket = TokenBucket(rate=20, capacity=2)
+        started = time.monotonic()
+        assert bucket.acquire(1) and bucket.acquire(1)
+        assert time.monotonic() - started < 0.04
+        assert bucket.acquire(1)
+        assert time.monotonic() - started >= 0.04
+        assert not bucket.acquire(0)
+        assert bucket.metrics()['throttled'] == 1
+
+    def test_rate_limit_within_deadline(self, settings):
+        """Test that dispatch fails when no token is left before the deadline."""
+        settings.TRANSLATION_PROVIDER_LIMITS = {
+            'test': {'rate': 1, 'burst': 1, 'deadline': 0.1}
+        }
+        assert dispatch('test', lambda item: item, [1]) == [1]
+        with pytest.raises(TranslationError, match='rate limit'):
+            dispatch('test', lambda item: item, [2])
+
+    def test_circuit_breaker(self, settings):
+        """Test that a failing provider is not called until the reset timeout."""
+        settings.TRANSLATION_PROVIDER_LIMITS = {
+            'test': {'failure_threshold': 2, 'reset_timeout': 0.1}
+        }
+        calls = mock.Mock(side_effect=requests.ConnectionError('down'))
+        for _ in range(2):
+            with pytest.raises(requests.ConnectionError, match='down'):
+                dispatch('test', calls, [1])
+        with pytest.raises(CircuitOpen):
+            dispatch('test', calls, [1])
+        assert calls.call_count == 2
+        assert provider_metrics()['test']['circuit']['state'] == CIRCUIT_OPEN
+
+        # after reset_timeout one probe is let through, it closes the circuit
+        time.sleep(0.1)
+        calls.side_effect = None
+        calls.return_value = 'ok'
+        assert dispatch('test', calls, [1]) == ['ok']
+        circuit = provider_metrics()['test']['circuit']
+        assert circuit['state'] == CIRCUIT_CLOSED
+        assert circuit['opened'] == circuit['half_opened'] == 1
+        assert circuit['rejected'] == 1
+
+    def test_client_errors_do_not_open_circuit(self, settings):
+        """Test that only 5xx/429 answers count as provider failures."""
+        settings.GOOGLE_TRANSLATE_API_KEY = 'key'
+        settings.TRANSLATION_PROVIDER_LIMITS = {'google': {'failure_threshold': 1}}
+        service = GoogleTranslateService()
+        bad_request = http_response({'error': 'bad request'}, 400)
+        with mock.patch('requests.Session.post', return_value=bad_request) as post:
+            for _ in range(2):
+                with pytest.raises(TranslationError, match='400'):
+                    service.request_translations(['Expert'], 'uk')
+        assert post.call_count == 2
+        assert provider_metrics()['google']['circuit']['state'] == CIRCUIT_CLOSED
+
+        unavailable = http_response({'error': 'unavailable'}, 503)
+        with mock.patch('requests.Session.post', return_value=unavailable):
+            with pytest.raises(TranslationError, match='503'):
+                service.request_translations(['Expert'], 'uk')
+            with pytest.raises(CircuitOpen):
+                service.request_translations(['Expert'], 'uk')
+
+    def test_limits_are_shared_through_redis(self, settings):
+        """Test that a Redis cache shares the limits and an outage falls back."""
+        settings.TRANSLATION_PROVIDER_LIMITS = {
+            'test': {'rate': 20, 'burst': 1, 'failure_threshold': 1}
+        }
+        redis_cache = RedisCache('redis://127.0.0.1:1/0', {})
+        calls = mock.Mock(side_effect=requests.Timeout('down'))
+        with mock.patch('cvsai.translation_limits.caches', {'default': redis_cache}):
+            limiter = get_rate_limiter('test', 20, 1)
+            breaker = get_circuit_breaker('test', 1, 30)
+            assert isinstance(limiter, SharedTokenBucket)
+            assert isinstance(breaker, SharedCircuitBreaker)
+            assert limiter.key.endswith('cvsai:translation_limits:rate:test')
+
+            # Redis is unreachable, the in-process state is used instead
+            with pytest.raises(requests.Timeout, match='down'):
+                dispatch('test', calls, [1])
+            with pytest.raises(CircuitOpen):
+                dispatch('test', calls, [1])
+            assert calls.call_count == 1
+            assert provider_metrics()['test']['circuit']['state'] == CIRCUIT_OPEN
+
+    def test_fallback_chain(self, settings):
+        """Test that texts go to the next provider and the failing one is skipped."""
+        settings.TRANSLATION_SERVICE = 'google'
+        settings.TRANSLATION_FALLBACK_CHAIN = ['openai', 'mock']
+        settings.TRANSLATION_MEMORY_ENABLED = False
+        settings.GOOGLE_TRANSLATE_API_KEY = 'key'
+        settings.TRANSLATION_PROVIDER_LIMITS = {'google': {'failure_threshold': 1}}
+        error = requests.ConnectionError('down')
+        with mock.patch('requests.Session.post', side_effect=error) as post:
+            service = get_translation_service()
+            assert service.translate('Expert', 'uk') == '[MOCK UK] Expert'
+            assert service.translate('Senior', 'uk') == '[MOCK UK] Senior'
+
+        # openai has no API key, google failed once and then its circuit opened
+        assert post.call_count == 1
+        assert service.name == 'google'
+
+
+class TestTextChunks:
+    """Test cases for splitting long texts to a token budget."""
+
+    def test_short_text(self):
+        """Test that texts within the budget are not split."""
+        assert split_text('Experienced developer.', 100) == (
+            ['Experienced developer.'],
+            [],
+        )
+
+    def test_split_on_paragraphs_then_sentences(self):
+        """Test the split boundaries and that joining restores the text."""
+        paragraph = ' '.join(f'Sentence number {i} of the bio.' for i in range(10))
+        text = f'{paragraph}\n\n{paragraph}\n\n{paragraph}'
+        pieces, separators = split_text(text, count_tokens(paragraph) + 5)
+        assert pieces == [paragraph] * 3
+        assert separators == ['\n\n', '\n\n']
+
+        pieces, separators = split_text(text, 30)
+        assert all(count_tokens(piece) <= 30 for piece in pieces)
+        assert all(piece.endswith('of the bio.') for piece in pieces)
+        assert join_text(pieces, separators) == text
+
+    def test_split_long_words(self):
+        """Test that text without boundaries is still split to the budget."""
+        text = 'x' * 100 + ' ' + 'y' * 10
+        pieces, separators = split_text(text, 10)
+        assert all(count_tokens(piece) <= 10 for piece in pieces)
+        assert join_text(pieces, separators) == text
+
+    def test_openai_translates_long_text_in_pieces(self, settings):
+        """Test that a long bio is sent in pieces with a tight max_tokens."""
+        settings.OPENAI_API_KEY = 'key'
+        settings.TRANSLATION_CHUNK_TOKENS = 300
+        paragraph = ' '.join(f'Sentence number {i} of the bio.' for i in range(100))
+        bio = f'{paragraph}\n\n{paragraph.replace("bio", "text")}'
+        requests_sent = []
+
+        def post(url, **kwargs):
+            prompt = kwargs['json']['messages'][1]['content']
+            texts = json.loads(prompt.split('\n\n', 1)[1])
+            requests_sent.append((texts, kwargs['json']['max_tokens']))
+            return openai_answer([text.upper() for text in texts])
+
+        with mock.patch('requests.Session.post', side_effect=post):
+            result = OpenAITranslationService().translate_many([bio, 'Expert'], 'uk')
+
+        assert result == [bio.upper(), 'EXPERT']
+        pieces = [text for texts, _max_tokens in requests_sent for text in texts]
+        assert len(pieces) > 2
+        assert all(count_tokens(piece) <= 300 for piece in pieces)
+        for texts, max_tokens in requests_sent:
+            assert max_tokens < sum(len(text) for text in texts)
+
+
+class GoogleStubHandler(http.server.BaseHTTPRequestHandler):
+    """Google Translate v2 stub answering with the texts upper-cased."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        self.server.requests += 1
+        length = int(self.headers['Content-Length'])
+        params = parse_qsl(self.rfile.read(length).decode())
+        time.sleep(self.server.delay)
+        if self.server.statuses:
+            status, payload = self.server.statuses.pop(0), {}
+        else:
+            texts = [value for name, value in params if name == 'q']
+            status = 200
+            payload = {
+                'data': {
+                    'translations': [{'translatedText': text.upper()} for text in texts]
+                }
+            }
+        body = json.dumps(payload).encode()
+        try:
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except BrokenPipeError:
+            # the client stopped waiting, see test_read_timeout_is_not_retried
+            self.close_connection = True
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+@pytest.fixture
+def google_server(settings):
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), GoogleStubHandler)
+    server.daemon_threads = True
+    server.connections = 0
+    server.requests = 0
+    server.delay = 0
+    server.statuses = []
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+
+    host, port = server.server_address
+    settings.GOOGLE_TRANSLATE_API_KEY = 'key'
+    settings.GOOGLE_TRANSLATE_URL = f'http://{host}:{port}/translate'
+    settings.TRANSLATION_HTTP_BACKOFF = 0
+    close_provider_sessions()
+    yield server
+    close_provider_sessions()
+    server.shutdown()
+    server.server_close()
+
+
+class TestProviderSession:
+    """Test cases for the pooled provider HTTP sessions."""
+
+    def test_connection_is_kept_alive(self, google_server):
+        """Test that consecutive requests reuse one connection."""
+        for text in ['one', 'two', 'three']:
+            assert GoogleTranslateService().translate(text, 'uk') == text.upper()
+
+        assert google_server.requests == 3
+        assert google_server.connections == 1
+
+    def test_retry_on_unavailable(self, google_server):
+        """Test that 429 and 5xx answers are retried."""
+        google_server.statuses = [429, 503]
+        assert GoogleTranslateService().translate('one', 'uk') == 'ONE'
+        assert google_server.requests == 3
+
+    def test_retries_exhausted(self, settings, google_server):
+        """Test that a provider failing every retry gives the error text."""
+        settings.TRANSLATION_HTTP_RETRIES = 2
+        google_server.statuses = [503] * 3
+        result = GoogleTranslateService().translate('one', 'uk')
+
+        assert result.startswith('[Translation error: 503')
+        assert google_server.requests == 3
+
+    def test_read_timeout_is_not_retried(self, settings, google_server):
+        """Test the read timeout and that an unanswered request is not resent."""
+        settings.TRANSLATION_PROVIDER_LIMITS = {'google': {'read_timeout': 0.1}}
+        google_server.delay = 0.3
+        result = GoogleTranslateService().translate('one', 'uk')
+
+        assert result.startswith('[Translation error')
+        assert google_server.requests == 1
+
+
+@pytest.mark.django_db
+def test_translate_cv_content_in_one_batch(settings, sample_resume):
+    """Test that the whole resume is translated with one translate_many call."""
+    settings.TRANSLATION_SERVICE = 'mock'
+    Project.objects.create(
+        resume=sample_resume, title='Second', description='Another project'
+    )
+    resume = Resume.objects.prefetch_related(
+        'resumeskill_set__skill', 'projects', 'contacts'
+    ).get(pk=sample_resume.pk)
+
+    with mock.patch.object(
+        MockTranslationService,
+        'request_translations',
+        autospec=True,
+        side_effect=MockTranslationService.request_translations,
+    ) as request:
+        content = translate_cv_content(resume, 'uk')
+
+    request.assert_called_once()
+    assert content['title'] == '[MOCK UK] Python Django Developer'
+    assert content['skills'] == [{'name': 'Python', 'level': '[MOCK UK] Advanced'}]
+    assert [project['title'] for project in content['projects']] == [
+        '[MOCK UK] Test Project',
+        '[MOCK UK] Second',
+    ]
+    assert content['projects'][1]['description'] == '[MOCK UK] Another project'
+
+
+@pytest.mark.django_db
+class TestTranslationMemory:
+    """Test cases for the translation memory."""
+
+    @pytest.fixture
+    def request_translations(self):
+        with mock.patch.object(
+            MockTranslationService,
+            'request_translations',
+            autospec=True,
+            side_effect=MockTranslationService.request_translations,
+        ) as patched:
+            yield patched
+
+    def test_repeat_translation_makes_no_provider_calls(
+        self, settings, sample_resume, translation_memory, request_translations
+    ):
+        """Test that translating an unchanged resume again is served from memory."""
+        settings.TRANSLATION_SERVICE = 'mock'
+        first = translate_cv_content(sample_resume, 'uk')
+        assert request_translations.call_count == 1
+
+        assert translate_cv_content(sample_resume, 'uk') == first
+        assert request_translations.call_count == 1
+        assert translation_memory.stats['lru_hits'] == 5
+
+        # other processes find it in the cache or the database
+        translation_memory.clear_local()
+        assert translate_cv_content(sample_resume, 'uk') == first
+        assert translation_memory.stats['cache_hits'] == 5
+        cache.clear()
+        translation_memory.clear_local()
+        assert translate_cv_content(sample_resume, 'uk') == first
+        assert translation_memory.stats['db_hits'] == 5
+        assert request_translations.call_count == 1
+
+        translate_cv_content(sample_resume, 'de')
+        assert request_translations.call_count == 2
+
+    def test_only_new_texts_are_sent(self, request_translations):
+        """Test that known texts are not sent to the provider again."""
+        service = TranslationMemoryService(MockTranslationService())
+        service.translate_many(['Beginner', 'Expert'], 'uk')
+        service.translate_many(['Expert', 'Senior developer'], 'uk')
+
+        assert request_translations.call_args.args[1] == ['Senior developer']
+
+    def test_failures_are_not_remembered(self, settings):
+        """Test that errors and unconfigured placeholders are not stored."""
+        service = TranslationMemoryService(GoogleTranslateService())
+        assert service.translate('Expert', 'uk') == '[Translation to uk] Expert'
+
+        settings.GOOGLE_TRANSLATE_API_KEY = 'key'
+        service = TranslationMemoryService(GoogleTranslateService())
+        error = requests.ConnectionError('down')
+        with mock.patch('requests.Session.post', side_effect=error):
+            assert service.translate('Expert', 'uk').startswith('[Translation error')
+
+        assert not TranslationMemoryEntry.objects.exists()
+
+    def test_eviction(self, request_translations):
+        """Test that the table keeps the most recently used entries only."""
+        memory = TranslationMemory(max_entries=2)
+        service = TranslationMemoryService(MockTranslationService(), memory)
+        for text in ['One', 'Two', 'Three']:
+            service.translate(text, 'uk')
+        memory.evict()
+
+        assert TranslationMemoryEntry.objects.count() == 2
+        texts = TranslationMemoryEntry.objects.values_list('translated_text', flat=True)
+        assert '[MOCK UK] One' not in texts
+
+    def test_expired_entries_are_not_used(self, request_translations):
+        """Test that entries older than the TTL are translated again."""
+        memory = TranslationMemory(ttl=60)
+        service = TranslationMemoryService(MockTranslationService(), memory)
+        service.translate('Expert', 'uk')
+        TranslationMemoryEntry.objects.update(
+            created_at=timezone.now() - timedelta(seconds=120)
+        )
+        memory.clear_local()
+        cache.clear()
+
+        service.translate('Expert', 'uk')
+        assert request_translations.call_count == 2
+
+        # storing it again restarted the TTL
+        memory.clear_local()
+        cache.clear()
+        service.translate('Expert', 'uk')
+        assert request_translations.call_count == 2
+
+
+@pytest.mark.django_db
+class TestResumeTranslationStore:
+    """Test cases for stored resume translations."""
+
+    @pytest.fixture
+    def request_translations(self, settings):
+        settings.TRANSLATION_SERVICE = 'mock'
+        settings.TRANSLATION_MEMORY_ENABLED = False
+        with mock.patch.object(
+            MockTranslationService,
+            'request_translations',
+            autospec=True,
+            side_effect=MockTranslationService.request_translations,
+        ) as patched:
+            yield patched
+
+    def load(self, resume):
+        return Resume.objects.prefetch_related(
+            'resumeskill_set__skill', 'projects', 'contacts'
+        ).get(pk=resume.pk)
+
+    def test_only_changed_fields_are_translated(
+        self, sample_resume, request_translations
+    ):
+        """Test that editing one of 20 projects sends one text to the provider."""
+        for i in range(19):
+            Project.objects.create(
+                resume=sample_resume, title=f'Project {i}', description=f'About {i}'
+            )
+        content = get_resume_translation(self.load(sample_resume), 'uk')
+        assert len(request_translations.call_args.args[1]) == 43
+
+        project = sample_resume.projects.get(title='Project 7')
+        project.description = 'Rewritten'
+        project.save()
+        content = get_resume_translation(self.load(sample_resume), 'uk')
+
+        assert request_translations.call_count == 2
+        assert request_translations.call_args.args[1] == ['Rewritten']
+        assert '[MOCK UK] Rewritten' in [
+            project['description'] for project in content['projects']
+        ]
+        assert ResumeTranslation.objects.get().fields['title'] == {
+            'hash': source_hash('Python Django Developer'),
+            'text': '[MOCK UK] Python Django Developer',
+        }
+
+    def test_stored_translation_is_served(self, sample_resume, request_translations):
+        """Test that an unchanged resume is served without provider calls."""
+        first = get_resume_translation(self.load(sample_resume), 'uk')
+        sample_resume.projects.all().delete()
+        content = get_resume_translation(self.load(sample_resume), 'uk')
+
+        assert request_translations.call_count == 1
+        assert content == dict(first, projects=[])
+        # removed fields are dropped from the stored translation
+        assert len(ResumeTranslation.objects.get().fields) == 3
+
+    def test_failures_are_not_stored(self, settings, sample_resume):
+        """Test that placeholders of a failed provider are not stored."""
+        settings.TRANSLATION_SERVICE = 'google'
+        content = get_resume_translation(self.load(sample_resume), 'uk')
+
+        assert content['title'] == '[Translation to uk] Python Django Developer'
+        assert not ResumeTranslation.objects.exists()
+
+    def test_progress_counts_reused_fields(self, sample_resume, request_translations):
+        """Test that progress starts at the number of reused fields."""
+        get_resume_translation(self.load(sample_resume), 'uk')
+        sample_resume.bio = 'New bio'
+        sample_resume.save()
+
+        progress = mock.Mock()
+        get_resume_translation(self.load(sample_resume), 'uk', progress=progress)
+        assert progress.call_args_list == [mock.call(4, 5), mock.call(5, 5)]
+
+    def test_fallback_answers_are_not_stored(self, settings, sample_resume):
+        """Test that fallback texts are served but the primary is asked again."""
+        settings.TRANSLATION_SERVICE = 'google'
+        settings.TRANSLATION_FALLBACK_CHAIN = ['mock']
+        settings.TRANSLATION_MEMORY_ENABLED = False
+        settings.GOOGLE_TRANSLATE_API_KEY = 'key'
+        down = requests.ConnectionError('down')
+        with mock.patch('requests.Session.post', side_effect=down):
+            content = get_resume_translation(self.load(sample_resume), 'uk')
+        assert content['title'] == '[MOCK UK] Python Django Developer'
+        assert not ResumeTranslation.objects.exists()
+
+        def google(url, data, **kwargs):
+            texts = [value for name, value in data if name == 'q']
+            translations = [{'translatedText': f'G {text}'} for text in texts]
+            return http_response({'data': {'translations': translations}})
+
+        with mock.patch('requests.Session.post', side_effect=google) as post:
+            content = get_resume_translation(self.load(sample_resume), 'uk')
+        assert post.called
+        assert content['title'] == 'G Python Django Developer'
+        stored = ResumeTranslation.objects.get()
+        assert stored.provider == 'google'
+        assert stored.fields['title']['text'] == 'G Python Django Developer'
@@ -1,8 +1,23 @@
+import json
+import time
+from unittest import mock
+
+from django.core.cache import cache
 from django.test import Client
 from django.urls import reverse
 
 import pytest
+from cvsai.models import Project
+from cvsai.tasks import translate_resume
 from cvsai.tests.constants import TEST_EMAIL
+from cvsai.translation_jobs import (
+    DEDUP_ATTEMPTS,
+    JOB_KEY_PREFIX,
+    get_translation_job,
+    start_translation_job,
+    translation_dedup_key,
+)
+from cvsai.translation_services import MockTranslationService, TranslationError
 
 
 @pytest.fixture
@@ -128,3 +143,220 @@ class TestResumeDetailView:
 
         assert response.status_code == 200
         assert 'cvsai/resume_detail.html' in [t.name for t in response.templates]
+
+
+@pytest.mark.django_db
+class TestTranslationJobs:
+    """Test cases for async translation jobs."""
+
+    @pytest.fixture
+    def delay(self, settings):
+        settings.TRANSLATION_SERVICE = 'mock'
+        with mock.patch.object(translate_resume, 'delay') as patched:
+            yield patched
+
+    def start(self, client, resume, language='kw'):
+        url = reverse('cvsai:translate_cv', kwargs={'pk': resume.pk})
+        data = {'language': language, 'mode': 'async'}
+        return client.post(url, data, content_type='application/json')
+
+    def test_job_lifecycle(self, client, sample_resume, delay):
+        """Test that a job is queued, reports progress and returns the content."""
+        response = self.start(client, sample_resume)
+        assert response.status_code == 202
+        data = response.json()
+        delay.assert_called_once_with(data['job_id'])
+
+        status = client.get(data['status_url']).json()
+        assert status['status'] == 'queued'
+        assert status['done'] == 0
+
+        translate_resume(data['job_id'])
+        status = client.get(data['status_url']).json()
+        assert status['status'] == 'success'
+        assert status['done'] == status['total'] == 5
+        assert status['translated_content']['title'] == (
+            '[MOCK KW] Python Django Developer'
+        )
+
+    def test_identical_jobs_share_a_task(self, client, sample_resume, delay):
+        """Test that the same resume version and language is queued once."""
+        first = self.start(client, sample_resume).json()
+        assert self.start(client, sample_resume).json()['job_id'] == first['job_id']
+        assert self.start(client, sample_resume, 'gv').json()['job_id'] != (
+            first['job_id']
+        )
+
+        sample_resume.title = 'Senior Python Developer'
+        sample_resume.save()
+        assert self.start(client, sample_resume).json()['job_id'] != first['job_id']
+        assert delay.call_count == 3
+
+    def test_failed_job_is_not_reused(self, client, sample_resume, delay):
+        """Test that a failed job reports its error and is queued again."""
+        job_id = self.start(client, sample_resume).json()['job_id']
+        with mock.patch(
+            'cvsai.tasks.get_resume_translation', side_effect=RuntimeError('down')
+        ):
+            translate_resume(job_id)
+
+        url = reverse(
+            'cvsai:translate_cv_job', kwargs={'pk': sample_resume.pk, 'job_id': job_id}
+        )
+        status = client.get(url).json()
+        assert status['status'] == 'error'
+        assert status['error'] == 'Translation failed: down'
+        assert self.start(client, sample_resume).json()['job_id'] != job_id
+
+    def test_provider_error_fails_job(self, client, sample_resume, delay):
+        """Test that provider errors fail the job instead of placeholder texts."""
+        job_id = self.start(client, sample_resume).json()['job_id']
+        with mock.patch.object(
+            MockTranslationService,
+            'request_translations',
+            side_effect=TranslationError('quota'),
+        ):
+            assert translate_resume(job_id)['status'] == 'error'
+
+        url = reverse(
+            'cvsai:translate_cv_job', kwargs={'pk': sample_resume.pk, 'job_id': job_id}
+        )
+        status = client.get(url).json()
+        assert status['status'] == 'error'
+        assert 'quota' in status['error']
+        assert 'translated_content' not in status
+        assert self.start(client, sample_resume).json()['job_id'] != job_id
+
+    def test_stale_dedup_key_is_not_deleted(self, sample_resume, delay):
+        """Test that a key of a failed job is left to its task to delete."""
+        dedup_key = translation_dedup_key(sample_resume, 'kw')
+        cache.set(dedup_key, 'failed-job')
+        cache.set(JOB_KEY_PREFIX + 'failed-job', {'status': 'error'})
+
+        with mock.patch('cvsai.translation_jobs.time.sleep') as sleep:
+            job_id, created = start_translation_job(sample_resume, 'kw')
+        assert created
+        assert sleep.call_count == DEDUP_ATTEMPTS
+        assert cache.get(dedup_key) == 'failed-job'
+        assert get_translation_job(job_id)['dedup_key'] is None
+        delay.assert_called_once_with(job_id)
+
+    def test_job_is_written_before_dedup_key(self, sample_resume, delay):
+        """Test that a caller finding the dedup key finds the job as well."""
+        added = []
+        cache_add = cache.add
+
+        def add(key, value, timeout):
+            added.append(get_translation_job(value))
+            return cache_add(key, value, timeout)
+
+        with mock.patch('cvsai.translation_jobs.cache.add', side_effect=add):
+            job_id, created = start_translation_job(sample_resume, 'kw')
+        assert created
+        assert added[0]['status'] == 'queued'
+        assert start_translation_job(sample_resume, 'kw') == (job_id, False)
+
+    def test_unknown_job(self, client, sample_resume, multiple_resumes, delay):
+        """Test that unknown jobs and jobs of another resume are not found."""
+        job_id = self.start(client, sample_resume).json()['job_id']
+        url = reverse(
+            'cvsai:translate_cv_job',
+            kwargs={'pk': multiple_resumes[0].pk, 'job_id': job_id},
+        )
+        assert client.get(url).status_code == 404
+
+
+@pytest.mark.django_db
+class TestTranslationStream:
+    """Test cases for the streamed CV translation."""
+
+    @pytest.fixture
+    def request_translations(self, settings):
+        settings.TRANSLATION_SERVICE = 'mock'
+        settings.TRANSLATION_MEMORY_ENABLED = False
+        with mock.patch.object(
+            MockTranslationService,
+            'request_translations',
+            autospec=True,
+            side_effect=MockTranslationService.request_translations,
+        ) as patched:
+            yield patched
+
+    def stream(self, client, resume, **params):
+        url = reverse('cvsai:translate_cv_stream', kwargs={'pk': resume.pk})
+        response = client.get(url, {'language': 'kw', **params})
+        assert response.status_code == 200
+        return response, b''.join(response.streaming_content).decode()
+
+    def events(self, client, resume):
+        _response, body = self.stream(client, resume)
+        return [json.loads(line) for line in body.splitlines()]
+
+    def test_ndjson_events(self, client, sample_resume, request_translations):
+        """Test that every part of the CV is sent as one JSON line."""
+        Project.objects.create(
+            resume=sample_resume, title='Second', description='Another project'
+        )
+        events = self.events(client, sample_resume)
+
+        assert events[0]['event'] == 'start'
+        assert events[0]['data']['parts'] == 5
+        assert events[0]['data']['firstname'] == 'Oleksandr'
+        assert events[-1] == {'event': 'done', 'data': {}}
+        assert [event['event'] for event in events].count('project') == 2
+        assert {'title', 'bio', 'skill'} <= {event['event'] for event in events}
+        project = next(
+            event['data']
+            for event in events
+            if event['event'] == 'project' and event['data']['index'] == 1
+        )
+        assert project['title'] == '[MOCK KW] Second'
+        assert project['description'] == '[MOCK KW] Another project'
+
+    def test_parts_are_sent_when_done(
+        self, client, sample_resume, request_translations
+    ):
+        """Test that a slow part does not hold back the others."""
+
+        def translate(service, texts, target_language, source_language='en'):
+            if 'Python Django Developer' in texts:
+                time.sleep(0.2)
+            return [f'[MOCK KW] {text}' for text in texts]
+
+        request_translations.side_effect = translate
+        events = self.events(client, sample_resume)
+        assert [event['event'] for event in events][-2:] == ['title', 'done']
+
+    def test_stored_parts_come_first(
+        self, client, sample_resume, request_translations
+    ):
+        """Test that stored parts are flushed before translated ones."""
+        self.events(client, sample_resume)
+        project = sample_resume.projects.get()
+        project.description = 'Rewritten'
+        project.save()
+
+        events = self.events(client, sample_resume)
+        assert [event['event'] for event in events] == [
+            'start',
+            'title',
+            'bio',
+            'skill',
+            'project',
+            'done',
+        ]
+        assert events[4]['data']['description'] == '[MOCK KW] Rewritten'
+        assert request_translations.call_args.args[1] == ['Rewritten']
+
+    def test_server_sent_events(self, client, sample_resume, request_translations):
+        """Test the text/event-stream format."""
+        response, body = self.stream(client, sample_resume, format='sse')
+
+        assert response['Content-Type'] == 'text/event-stream'
+        assert body.startswith('event: start\ndata: {')
+        assert body.endswith('event: done\ndata: {}\n\n')
+
+    def test_unsupported_language(self, client, sample_resume):
+        """Test that unsupported languages are rejected."""
+        url = reverse('cvsai:translate_cv_stream', kwargs={'pk': sample_resume.pk})
+        assert client.get(url, {'language': 'xx'}).status_code == 400
@@ -0,0 +1,108 @@
+import functools
+import itertools
+import math
+import re
+
+try:
+    import tiktoken
+except ImportError:  # optional, token counts are estimated without it
+    tiktoken = None
+
+# Average characters per token of English text for GPT tokenizers
+CHARS_PER_TOKEN = 4
+# Translations into rare languages take more tokens than the English source
+OUTPUT_TOKEN_RATIO = 2
+OUTPUT_TOKEN_MARGIN = 16
+
+PARAGRAPH_RE = re.compile(r'(\n\s*\n)')
+SENTENCE_RE = re.compile(r'(?<=[.!?…])(\s+)')
+WORD_RE = re.compile(r'(\s+)')
+
+
+@functools.lru_cache(maxsize=1)
+def get_encoding():
+    """Return the tiktoken encoding of GPT models, loaded once."""
+    return tiktoken.get_encoding('cl100k_base')
+
+
+def count_tokens(text):
+    """Return the number of tokens of text (estimated without tiktoken)."""
+    if tiktoken is not None:
+        return len(get_encoding().encode(text))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def estimate_output_tokens(text):
+    """Return a max_tokens estimate for the translation of text."""
+    return count_tokens(text) * OUTPUT_TOKEN_RATIO + OUTPUT_TOKEN_MARGIN
+
+
+def _split(text, max_tokens, patterns):
+    """Split text into ``[piece, separator, piece, ...]`` pieces that fit."""
+    if count_tokens(text) <= max_tokens:
+        return [text]
+    if not patterns:
+        # a single word longer than the budget
+        pieces = []
+        for chars in itertools.batched(text, max_tokens * CHARS_PER_TOKEN):
+            pieces += [''.join(chars), '']
+        return pieces[:-1]
+
+    parts = patterns[0].split(text)
+    if len(parts) == 1:
+        return _split(text, max_tokens, patterns[1:])
+
+    # pack consecutive parts (with the separators between them) into pieces
+    pieces = []
+    current = parts[0]
+    for separator, part in zip(parts[1::2], parts[2::2]):
+        candidate = current + separator + part
+        if count_tokens(candidate) <= max_tokens:
+            current = candidate
+        else:
+            pieces += _split(current, max_tokens, patterns[1:]) + [separator]
+            current = part
+    return pieces + _split(current, max_tokens, patterns[1:])
+
+
+def split_text(text, max_tokens):
+    """
+    Split text into pieces of at most ``max_tokens`` tokens, on paragraph
+    boundaries first, then on sentences and then on words.
+
+    Return ``(pieces, separators)``; the text is ``pieces[0] + separators[0]
+    + pieces[1] + ...``.
+    """
+    parts = _split(text, max_tokens, [PARAGRAPH_RE, SENTENCE_RE, WORD_RE])
+    return parts[::2], parts[1::2]
+
+
+def join_text(pieces, separators):
+    """Join (translated) pieces with the separators of split_text."""
+    joined = [pieces[0]]
+    for separator, piece in zip(separators, pieces[1:]):
+        joined += [separator, piece]
+    return ''.join(joined)
+
+
+def split_texts(texts, max_tokens):
+    """
+    Split every text longer than ``max_tokens`` tokens, see split_text.
+
+    Return the pieces of all texts and the layout to give to join_texts.
+    """
+    pieces, layout = [], []
+    for text in texts:
+        text_pieces, separators = split_text(text, max_tokens)
+        layout.append((len(text_pieces), separators))
+        pieces += text_pieces
+    return pieces, layout
+
+
+def join_texts(pieces, layout):
+    """Reassemble the (translated) pieces of split_texts into texts."""
+    pieces = iter(pieces)
+    return [
+        join_text([next(pieces) for _ in range(count)], separators)
+        for count, separators in layout
+    ]
@@ -0,0 +1,127 @@
+import hashlib
+import logging
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from cvsai.pdf_cache import resume_content_version
+
+logger = logging.getLogger(__name__)
+
+JOB_KEY_PREFIX = 'cvsai:translation_job:'
+DEDUP_KEY_PREFIX = 'cvsai:translation_job_dedup:'
+
+# the job state outlives its dedup key by DEDUP_KEY_MARGIN seconds; a key
+# whose job is gone or failed is looked up again DEDUP_ATTEMPTS times
+DEDUP_KEY_MARGIN = 60
+DEDUP_ATTEMPTS = 5
+DEDUP_RETRY_DELAY = 0.05
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_SUCCESS = 'success'
+JOB_ERROR = 'error'
+
+
+def _job_ttl():
+    return getattr(settings, 'TRANSLATION_JOB_TTL', 3600)
+
+
+def translation_dedup_key(resume, target_language):
+    """Cache key shared by jobs translating the same resume version."""
+    provider = getattr(settings, 'TRANSLATION_SERVICE', 'openai')
+    raw = f'{resume.id}:{target_language}:{provider}:{resume_content_version(resume)}'
+    return DEDUP_KEY_PREFIX + hashlib.sha256(raw.encode()).hexdigest()
+
+
+def get_translation_job(job_id):
+    """Return the state of a translation job, None when unknown or expired."""
+    return cache.get(JOB_KEY_PREFIX + job_id)
+
+
+def update_translation_job(job_id, **fields):
+    """Update fields of the job state (only the job task writes it)."""
+    job = get_translation_job(job_id)
+    if job is None:
+        return None
+    job.update(fields)
+    cache.set(JOB_KEY_PREFIX + job_id, job, timeout=_job_ttl())
+    return job
+
+
+def _reusable_job(dedup_key):
+    """
+    Return the id of the job holding the dedup key, None when the key is free
+    or its job failed (the failing task is about to delete the key).
+    """
+    existing = cache.get(dedup_key)
+    if existing is None:
+        return None
+    job = get_translation_job(existing)
+    if job is None or job['status'] == JOB_ERROR:
+        return None
+    return existing
+
+
+def start_translation_job(resume, target_language):
+    """
+    Queue a translation of the resume and return ``(job_id, created)``.
+
+    While a job for the same resume version, language and provider is queued,
+    running or succeeded, its id is returned instead of queueing another
+    task. Failed jobs are not reused.
+
+    The job state is written before the dedup key is published, so a caller
+    finding the key always finds the job; the job state also outlives the
+    key. A key left by a failing job is waited for rather than deleted, after
+    DEDUP_ATTEMPTS lookups the job is queued without deduplication.
+    """
+    # imported here, cvsai.tasks imports this module
+    from cvsai.tasks import (  # pylint: disable=import-outside-toplevel
+        translate_resume,
+    )
+
+    dedup_key = translation_dedup_key(resume, target_language)
+    job_id = str(uuid.uuid4())
+    job_key = JOB_KEY_PREFIX + job_id
+    job = {
+        'status': JOB_QUEUED,
+        'resume_id': resume.id,
+        'language': target_language,
+        'done': 0,
+        'total': None,
+        'dedup_key': dedup_key,
+    }
+    cache.set(job_key, job, timeout=_job_ttl() + DEDUP_KEY_MARGIN)
+
+    for attempt in range(DEDUP_ATTEMPTS):
+        if cache.add(dedup_key, job_id, timeout=_job_ttl()):
+            break
+        existing = _reusable_job(dedup_key)
+        if existing is not None:
+            cache.delete(job_key)
+            return existing, False
+        time.sleep(DEDUP_RETRY_DELAY * (attempt + 1))
+    else:
+        logger.warning("Translation dedup key %s is stale, not shared", dedup_key)
+        job['dedup_key'] = None
+        cache.set(job_key, job, timeout=_job_ttl() + DEDUP_KEY_MARGIN)
+
+    try:
+        translate_resume.delay(job_id)
+    except Exception:
+        if job['dedup_key'] is not None:
+            cache.delete(dedup_key)
+        cache.delete(job_key)
+        raise
+    return job_id, True
+
+
+def fail_translation_job(job_id, error):
+    """Mark the job failed, so the next request queues a new one."""
+    job = update_translation_job(job_id, status=JOB_ERROR, error=error)
+    if job is not None and job['dedup_key'] is not None:
+        cache.delete(job['dedup_key'])
+    logger.warning("Translation job %s failed: %s", job_id, error)
@@ -0,0 +1,407 @@
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.core.cache import caches
+from django.core.cache.backends.redis import RedisCache
+
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+CIRCUIT_CLOSED = 'closed'
+CIRCUIT_OPEN = 'open'
+CIRCUIT_HALF_OPEN = 'half_open'
+
+KEY_PREFIX = 'cvsai:translation_limits'
+# idle circuit state is dropped after reset_timeout + STATE_TTL seconds
+STATE_TTL = 3600
+
+# KEYS[1] bucket, ARGV rate, capacity; returns the wait for a token, 0 when
+# one was taken
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(now - updated, 0) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+# KEYS[1] circuit, ARGV reset_timeout, ttl; returns 0 when rejected, 1 when
+# allowed and 2 when allowed as the half-open probe of an open circuit
+CIRCUIT_ALLOW_SCRIPT = """
+local reset_timeout = tonumber(ARGV[1])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'state', 'opened_at', 'probing_at')
+local circuit = state[1] or 'closed'
+local result = 1
+if circuit == 'open' then
+    if now - tonumber(state[2]) < reset_timeout then
+        return 0
+    end
+    circuit = 'half_open'
+    result = 2
+    redis.call('HSET', KEYS[1], 'state', circuit)
+end
+if circuit == 'half_open' then
+    -- a probe that never reported back is given up after reset_timeout
+    local probing_at = tonumber(state[3])
+    if probing_at and now - probing_at < reset_timeout then
+        return 0
+    end
+    redis.call('HSET', KEYS[1], 'probing_at', tostring(now))
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return result
+"""
+
+# KEYS[1] circuit, ARGV failure_threshold, ttl; returns 1 when the circuit
+# was opened
+CIRCUIT_FAILURE_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local failures = redis.call('HINCRBY', KEYS[1], 'failures', 1)
+local circuit = redis.call('HGET', KEYS[1], 'state') or 'closed'
+local opened = 0
+if circuit == 'half_open' or failures >= tonumber(ARGV[1]) then
+    if circuit ~= 'open' then
+        opened = 1
+    end
+    redis.call('HSET', KEYS[1], 'state', 'open', 'opened_at', tostring(now))
+    redis.call('HDEL', KEYS[1], 'probing_at')
+end
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return opened
+"""
+
+
+class TokenBucket:
+    """
+    Rate limiter allowing ``rate`` requests per second on average and bursts
+    of up to ``capacity`` requests.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.stats = Counter(acquired=0, throttled=0, rejected=0)
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout):
+        """Take a token, waiting up to ``timeout`` seconds; False on timeout."""
+        expires_at = time.monotonic() + timeout
+        throttled = False
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    self.stats['acquired'] += 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+                if now + wait > expires_at:
+                    self.stats['rejected'] += 1
+                    return False
+                if not throttled:
+                    throttled = True
+                    self.stats['throttled'] += 1
+            time.sleep(wait)
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'rate': self.rate,
+                'capacity': self.capacity,
+                'tokens': round(self._tokens, 2),
+                **self.stats,
+            }
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker failing provider calls fast after ``failure_threshold``
+    consecutive failures.
+
+    The circuit stays open for ``reset_timeout`` seconds, then one probe call
+    is let through (half-open): it closes the circuit when it succeeds and
+    opens it again when it fails.
+    """
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CIRCUIT_CLOSED
+        self.stats = Counter(opened=0, half_opened=0, rejected=0, failures=0)
+        self._failures = 0
+        self._opened_at = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Return whether a call may be made now."""
+        with self._lock:
+            if self.state == CIRCUIT_OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    self.stats['rejected'] += 1
+                    return False
+                self.state = CIRCUIT_HALF_OPEN
+                self.stats['half_opened'] += 1
+            if self.state == CIRCUIT_HALF_OPEN:
+                if self._probing:
+                    self.stats['rejected'] += 1
+                    return False
+                self._probing = True
+            return True
+
+    def release(self):
+        """Give back a call allowed by allow() that was not made."""
+        with self._lock:
+            self._probing = False
+
+    def record_success(self):
+        with self._lock:
+            self.state = CIRCUIT_CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.stats['failures'] += 1
+            self._failures += 1
+            if self.state == CIRCUIT_HALF_OPEN or (
+                self._failures >= self.failure_threshold
+            ):
+                if self.state != CIRCUIT_OPEN:
+                    self.stats['opened'] += 1
+                self.state = CIRCUIT_OPEN
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+    def metrics(self):
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self._failures,
+                **self.stats,
+            }
+
+
+def _shared_state():
+    """
+    Return the Redis client and key function of the cache backend, None when
+    the cache is not Redis (locmem in tests and local development) and the
+    limits are kept per process.
+    """
+    backend = caches['default']
+    if not isinstance(backend, RedisCache):
+        return None
+    # pylint: disable-next=protected-access
+    return backend._cache.get_client(write=True), backend.make_and_validate_key
+
+
+class SharedTokenBucket(TokenBucket):
+    """
+    TokenBucket kept in Redis, shared by every process and worker using the
+    cache. The bucket is refilled and taken from by a Lua script, so
+    concurrent callers never take the same token. Falls back to the
+    in-process bucket while Redis is unreachable.
+    """
+
+    def __init__(self, rate, capacity, client, key):
+        super().__init__(rate, capacity)
+        self.key = key
+        self._client = client
+        self._script = client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    def acquire(self, timeout):
+        expires_at = time.monotonic() + timeout
+        throttled = False
+        while True:
+            try:
+                wait = float(
+                    self._script(keys=[self.key], args=[self.rate, self.capacity])
+                )
+            except RedisError as exc:
+                logger.warning("Shared rate limit %s unavailable: %s", self.key, exc)
+                return super().acquire(max(expires_at - time.monotonic(), 0))
+            with self._lock:
+                if not wait:
+                    self.stats['acquired'] += 1
+                    return True
+                if time.monotonic() + wait > expires_at:
+                    self.stats['rejected'] += 1
+                    return False
+                if not throttled:
+                    throttled = True
+                    self.stats['throttled'] += 1
+            time.sleep(wait)
+
+    def metrics(self):
+        metrics = super().metrics()
+        try:
+            tokens = self._client.hget(self.key, 'tokens')
+        except RedisError:
+            return metrics
+        metrics['tokens'] = self.capacity if tokens is None else round(float(tokens), 2)
+        metrics['shared'] = True
+        return metrics
+
+
+class SharedCircuitBreaker(CircuitBreaker):
+    """
+    CircuitBreaker kept in Redis, so a provider failing for one worker is
+    failed fast by all of them. State changes are made by Lua scripts. Falls
+    back to the in-process breaker while Redis is unreachable.
+    """
+
+    def __init__(self, failure_threshold, reset_timeout, client, key):
+        super().__init__(failure_threshold, reset_timeout)
+        self.key = key
+        self._client = client
+        self._ttl = int(reset_timeout) + STATE_TTL
+        self._allow = client.register_script(CIRCUIT_ALLOW_SCRIPT)
+        self._failure = client.register_script(CIRCUIT_FAILURE_SCRIPT)
+
+    def _unavailable(self, exc):
+        logger.warning("Shared circuit breaker %s unavailable: %s", self.key, exc)
+
+    def allow(self):
+        try:
+            allowed = int(
+                self._allow(keys=[self.key], args=[self.reset_timeout, self._ttl])
+            )
+        except RedisError as exc:
+            self._unavailable(exc)
+            return super().allow()
+        with self._lock:
+            if allowed == 2:
+                self.stats['half_opened'] += 1
+            if not allowed:
+                self.stats['rejected'] += 1
+        return bool(allowed)
+
+    def release(self):
+        try:
+            self._client.hdel(self.key, 'probing_at')
+        except RedisError as exc:
+            self._unavailable(exc)
+        super().release()
+
+    def record_success(self):
+        try:
+            with self._client.pipeline() as pipe:
+                pipe.hset(self.key, mapping={'state': CIRCUIT_CLOSED, 'failures': 0})
+                pipe.hdel(self.key, 'probing_at')
+                pipe.expire(self.key, self._ttl)
+                pipe.execute()
+        except RedisError as exc:
+            self._unavailable(exc)
+        super().record_success()
+
+    def record_failure(self):
+        try:
+            opened = int(
+                self._failure(keys=[self.key], args=[self.failure_threshold, self._ttl])
+            )
+        except RedisError as exc:
+            self._unavailable(exc)
+            super().record_failure()
+            return
+        with self._lock:
+            self.stats['failures'] += 1
+            self.stats['opened'] += opened
+
+    def metrics(self):
+        metrics = super().metrics()
+        try:
+            state = self._client.hgetall(self.key)
+        except RedisError:
+            return metrics
+        metrics['state'] = state.get(b'state', CIRCUIT_CLOSED.encode()).decode()
+        metrics['consecutive_failures'] = int(state.get(b'failures', 0))
+        metrics['shared'] = True
+        return metrics
+
+
+_limiters = {}
+_breakers = {}
+_lock = threading.Lock()
+
+
+def _get(registry, provider, config, factory):
+    with _lock:
+        current, instance = registry.get(provider, (None, None))
+        if current != config:
+            instance = factory(*config)
+            registry[provider] = (config, instance)
+        return instance
+
+
+def _factory(kind, provider, local, shared):
+    def factory(*config):
+        state = _shared_state()
+        if state is None:
+            return local(*config)
+        client, make_key = state
+        return shared(*config, client, make_key(f'{KEY_PREFIX}:{kind}:{provider}'))
+
+    return factory
+
+
+def get_rate_limiter(provider, rate, capacity):
+    """
+    Return the token bucket of the provider, shared through Redis when it is
+    the cache backend, by this process otherwise.
+    """
+    factory = _factory('rate', provider, TokenBucket, SharedTokenBucket)
+    return _get(_limiters, provider, (rate, capacity), factory)
+
+
+def get_circuit_breaker(provider, failure_threshold, reset_timeout):
+    """
+    Return the circuit breaker of the provider, shared through Redis when it
+    is the cache backend, by this process otherwise.
+    """
+    factory = _factory('circuit', provider, CircuitBreaker, SharedCircuitBreaker)
+    return _get(_breakers, provider, (failure_threshold, reset_timeout), factory)
+
+
+def provider_metrics():
+    """Return ``{provider: {'circuit': ..., 'rate_limit': ...}}``."""
+    with _lock:
+        limiters = {name: bucket for name, (_, bucket) in _limiters.items()}
+        breakers = {name: breaker for name, (_, breaker) in _breakers.items()}
+    return {
+        name: {
+            'circuit': breakers[name].metrics() if name in breakers else None,
+            'rate_limit': limiters[name].metrics() if name in limiters else None,
+        }
+        for name in sorted(set(limiters) | set(breakers))
+    }
+
+
+def reset_provider_limits():
+    """Forget all rate limiters and circuit breakers."""
+    with _lock:
+        _limiters.clear()
+        _breakers.clear()
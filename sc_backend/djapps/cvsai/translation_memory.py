@@ -0,0 +1,198 @@
+import functools
+import hashlib
+import logging
+import threading
+import time
+from collections import Counter, OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.utils import timezone
+
+from cvsai.models import TranslationMemoryEntry
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = 'cvsai:tm:'
+# Size eviction of the table runs once per this many stored entries
+EVICT_EVERY = 100
+
+
+def memory_key(text, source_language, target_language, provider):
+    """Translation memory key: sha256 of provider, languages and text."""
+    raw = f'{provider}\0{source_language}\0{target_language}\0{text}'
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class TranslationMemory:
+    """
+    Three tier store of provider translations: an in-process LRU, the Django
+    cache (shared by all processes) and the TranslationMemoryEntry table.
+
+    A hit in a lower tier is copied to the tiers above it. Entries expire
+    after ``ttl`` seconds in every tier; the LRU keeps at most ``lru_size``
+    entries and the table at most ``max_entries`` (least recently used are
+    deleted). Hits per tier and misses are counted in ``stats``.
+    """
+
+    def __init__(self, ttl=None, lru_size=None, max_entries=None):
+        if ttl is None:
+            ttl = getattr(settings, 'TRANSLATION_MEMORY_TTL', 90 * 24 * 3600)
+        if lru_size is None:
+            lru_size = getattr(settings, 'TRANSLATION_MEMORY_LRU_SIZE', 2048)
+        if max_entries is None:
+            max_entries = getattr(settings, 'TRANSLATION_MEMORY_MAX_ENTRIES', 100_000)
+        self.ttl = ttl
+        self.lru_size = lru_size
+        self.max_entries = max_entries
+        self.stats = Counter(lru_hits=0, cache_hits=0, db_hits=0, misses=0)
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._stored = 0
+
+    def get_many(self, keys):
+        """Return ``{key: translated_text}`` of the keys found in any tier."""
+        found = {}
+        now = time.time()
+        with self._lock:
+            for key in keys:
+                entry = self._lru.get(key)
+                if entry is None:
+                    continue
+                text, expires_at = entry
+                if expires_at < now:
+                    del self._lru[key]
+                    continue
+                self._lru.move_to_end(key)
+                found[key] = text
+        self._count('lru_hits', len(found))
+
+        missing = [key for key in keys if key not in found]
+        if missing:
+            cache_hits = self._cache_get_many(missing)
+            self._count('cache_hits', len(cache_hits))
+            self._remember(cache_hits)
+            found.update(cache_hits)
+
+        missing = [key for key in keys if key not in found]
+        if missing:
+            db_hits = self._db_get_many(missing)
+            self._count('db_hits', len(db_hits))
+            self._cache_set_many(db_hits)
+            self._remember(db_hits)
+            found.update(db_hits)
+
+        self._count('misses', len(keys) - len(found))
+        return found
+
+    def set_many(self, translations, provider, source_language, target_language):
+        """Store ``{key: translated_text}`` in every tier."""
+        if not translations:
+            return
+        self._remember(translations)
+        self._cache_set_many(translations)
+        try:
+            TranslationMemoryEntry.objects.bulk_create(
+                [
+                    TranslationMemoryEntry(
+                        key=key,
+                        provider=provider,
+                        source_language=source_language,
+                        target_language=target_language,
+                        translated_text=text,
+                    )
+                    for key, text in translations.items()
+                ],
+                update_conflicts=True,
+                unique_fields=['key'],
+                # the TTL restarts when the entry is translated again
+                update_fields=['translated_text', 'created_at', 'last_used_at'],
+            )
+        except DatabaseError as exc:
+            logger.warning("Unable to store translation memory: %s", exc)
+            return
+
+        self._stored += len(translations)
+        if self._stored >= EVICT_EVERY:
+            self._stored = 0
+            self.evict()
+
+    def evict(self):
+        """Delete expired entries and trim the table to max_entries."""
+        TranslationMemoryEntry.objects.filter(
+            created_at__lt=timezone.now() - timedelta(seconds=self.ttl)
+        ).delete()
+        try:
+            # last_used_at of the first entry over the limit
+            cutoff = TranslationMemoryEntry.objects.order_by(
+                '-last_used_at'
+            ).values_list('last_used_at', flat=True)[self.max_entries]
+        except IndexError:
+            return
+        TranslationMemoryEntry.objects.filter(last_used_at__lte=cutoff).delete()
+
+    def clear_local(self):
+        """Drop the in-process LRU."""
+        with self._lock:
+            self._lru.clear()
+
+    def _count(self, name, value):
+        with self._lock:
+            self.stats[name] += value
+
+    def _remember(self, translations):
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            for key, text in translations.items():
+                self._lru[key] = (text, expires_at)
+                self._lru.move_to_end(key)
+            while len(self._lru) > self.lru_size:
+                self._lru.popitem(last=False)
+
+    def _cache_get_many(self, keys):
+        try:
+            cached = cache.get_many([CACHE_KEY_PREFIX + key for key in keys])
+        except Exception as exc:  # the shared cache is optional, e.g. Redis down
+            logger.warning("Unable to read translation memory cache: %s", exc)
+            return {}
+        return {
+            key: cached[CACHE_KEY_PREFIX + key]
+            for key in keys
+            if CACHE_KEY_PREFIX + key in cached
+        }
+
+    def _cache_set_many(self, translations):
+        if not translations:
+            return
+        try:
+            cache.set_many(
+                {CACHE_KEY_PREFIX + key: text for key, text in translations.items()},
+                timeout=self.ttl,
+            )
+        except Exception as exc:
+            logger.warning("Unable to write translation memory cache: %s", exc)
+
+    def _db_get_many(self, keys):
+        try:
+            entries = dict(
+                TranslationMemoryEntry.objects.filter(
+                    key__in=keys,
+                    created_at__gte=timezone.now() - timedelta(seconds=self.ttl),
+                ).values_list('key', 'translated_text')
+            )
+            if entries:
+                TranslationMemoryEntry.objects.filter(key__in=list(entries)).update(
+                    last_used_at=timezone.now()
+                )
+        except DatabaseError as exc:
+            logger.warning("Unable to read translation memory: %s", exc)
+            return {}
+        return entries
+
+
+@functools.lru_cache(maxsize=1)
+def get_translation_memory():
+    """Return the process-wide translation memory."""
+    return TranslationMemory()
@@ -1,71 +1,515 @@
+import itertools
+import json
+import logging
+import os
+import threading
+import time
 from abc import ABC, abstractmethod
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
 
 from django.conf import settings
 
 import requests
+from celery.signals import worker_process_shutdown
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from cvsai.constants import SUPPORTED_LANGUAGES
+from cvsai.text_chunks import (
+    count_tokens,
+    estimate_output_tokens,
+    join_texts,
+    split_texts,
+)
+from cvsai.translation_limits import get_circuit_breaker, get_rate_limiter
+from cvsai.translation_memory import get_translation_memory, memory_key
+
+logger = logging.getLogger(__name__)
+
+
+def _chunks(texts, max_items, max_size, size=len):
+    """
+    Split texts into chunks of at most max_items items and ~max_size, the
+    sum of ``size(text)`` (characters by default).
+    """
+    chunk, chunk_size = [], 0
+    for text in texts:
+        text_size = size(text)
+        if chunk and (len(chunk) >= max_items or chunk_size + text_size > max_size):
+            yield chunk
+            chunk, chunk_size = [], 0
+        chunk.append(text)
+        chunk_size += text_size
+    if chunk:
+        yield chunk
+
+
+class TranslationError(Exception):
+    """Raised by request_translations when the provider request failed."""
+
+
+class ProviderUnavailable(TranslationError):
+    """Raised by a strict translate_many when the provider is not configured."""
+
+
+class CircuitOpen(TranslationError):
+    """Raised instead of calling a provider that keeps failing."""
+
+
+class RateLimited(TranslationError):
+    """Raised when no request of the provider rate limit is left in time."""
+
+
+DEFAULT_PROVIDER_LIMITS = {
+    'max_in_flight': 4,
+    'deadline': 30,
+    'connect_timeout': 3.05,
+    'read_timeout': 30,
+    # requests per second, None for no rate limit
+    'rate': None,
+    'burst': 1,
+    'failure_threshold': 5,
+    'reset_timeout': 30,
+}
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_executors = {}
+_sessions = {}
+_dispatch_lock = threading.Lock()
+
+
+def is_provider_failure(exc):
+    """
+    Return whether the exception, or one it was raised from, means the
+    provider is failing: a timeout, a connection error or a 5xx/429 answer.
+    Client errors such as a 400 do not count towards its circuit breaker.
+    """
+    while exc is not None:
+        if isinstance(exc, (requests.Timeout, requests.ConnectionError)):
+            return True
+        if isinstance(exc, requests.HTTPError) and exc.response is not None:
+            status = exc.response.status_code
+            return status == 429 or status >= 500
+        exc = exc.__cause__
+    return False
+
+
+def get_provider_limits(provider):
+    """
+    Return the limits of the provider: its TRANSLATION_PROVIDER_LIMITS entry
+    over DEFAULT_PROVIDER_LIMITS.
+    """
+    limits = dict(DEFAULT_PROVIDER_LIMITS)
+    limits.update(
+        getattr(settings, 'TRANSLATION_PROVIDER_LIMITS', {}).get(provider, {})
+    )
+    return limits
+
+
+def get_provider_timeout(provider):
+    """Return the ``(connect, read)`` timeout of provider requests."""
+    limits = get_provider_limits(provider)
+    return limits['connect_timeout'], limits['read_timeout']
+
+
+def get_provider_session(provider):
+    """
+    Return the HTTP session of the provider shared by this process.
+
+    Connections are kept alive and pooled (up to the provider max_in_flight)
+    so only the first request pays DNS, TCP and TLS setup. Failed connects
+    and 429/5xx answers are retried TRANSLATION_HTTP_RETRIES times with
+    exponential backoff, honouring Retry-After. Requests whose answer may
+    have been lost are not resent, a provider may bill them.
+    """
+    with _dispatch_lock:
+        pid, session = _sessions.get(provider, (None, None))
+        if pid == os.getpid():
+            return session
+
+        retry = Retry(
+            total=getattr(settings, 'TRANSLATION_HTTP_RETRIES', 3),
+            read=0,
+            backoff_factor=getattr(settings, 'TRANSLATION_HTTP_BACKOFF', 0.5),
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=None,  # provider APIs are POST only
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=get_provider_limits(provider)['max_in_flight'],
+            max_retries=retry,
+        )
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        _sessions[provider] = (os.getpid(), session)
+        return session
+
+
+@worker_process_shutdown.connect
+def close_provider_sessions(**kwargs):
+    """Close the HTTP sessions of all providers."""
+    with _dispatch_lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    for pid, session in sessions:
+        if pid == os.getpid():
+            session.close()
+
+
+def get_provider_executor(provider):
+    """
+    Return the thread pool running the requests of the provider, one thread
+    per request it may have in flight. Each provider has a pool of its own,
+    so a slow or saturated provider cannot hold the threads of the others.
+    """
+    max_in_flight = get_provider_limits(provider)['max_in_flight']
+    with _dispatch_lock:
+        limit, executor = _executors.get(provider, (None, None))
+        if limit != max_in_flight:
+            if executor is not None:
+                executor.shutdown(wait=False)
+            executor = ThreadPoolExecutor(
+                max_workers=max_in_flight,
+                thread_name_prefix=f'translation-{provider}',
+            )
+            _executors[provider] = (max_in_flight, executor)
+        return executor
+
+
+def dispatch(provider, func, items):
+    """
+    Call ``func(item)`` for every item concurrently and return the results
+    in the order of ``items``.
+
+    At most ``max_in_flight`` calls of the provider run at a time in this
+    process (its thread pool is shared by all requests) and all of them must
+    finish within its ``deadline`` (TRANSLATION_PROVIDER_LIMITS), otherwise
+    TranslationError is raised, a single call included. The first error of a
+    call is raised as well.
+
+    Calls also take a token of the provider rate limiter (``rate`` calls per
+    second, bursts of ``burst``) and go through its circuit breaker: after
+    ``failure_threshold`` consecutive provider failures (is_provider_failure)
+    CircuitOpen is raised without calling the provider for ``reset_timeout``
+    seconds.
+    """
+    limits = get_provider_limits(provider)
+    deadline = limits['deadline']
+    executor = get_provider_executor(provider)
+    breaker = get_circuit_breaker(
+        provider, limits['failure_threshold'], limits['reset_timeout']
+    )
+    limiter = None
+    if limits['rate']:
+        limiter = get_rate_limiter(provider, limits['rate'], limits['burst'])
+    expires_at = time.monotonic() + deadline
+
+    def call(item):
+        if not breaker.allow():
+            raise CircuitOpen(f'{provider} is failing, circuit open')
+        if limiter and not limiter.acquire(max(expires_at - time.monotonic(), 0)):
+            breaker.release()
+            raise RateLimited(f'{provider} rate limit, deadline exceeded')
+        try:
+            result = func(item)
+        except Exception as exc:
+            if is_provider_failure(exc):
+                breaker.record_failure()
+            else:
+                # the provider answered, the request itself was refused
+                breaker.record_success()
+            raise
+        breaker.record_success()
+        return result
+
+    futures = [executor.submit(call, item) for item in items]
+    done, not_done = wait(futures, timeout=deadline, return_when=FIRST_EXCEPTION)
+    for future in not_done:
+        future.cancel()
+    for future in done:
+        if future.exception() is not None:
+            raise future.exception()
+    if not_done:
+        raise TranslationError(f'{provider} did not answer within {deadline}s')
+    return [future.result() for future in futures]
 
 
 class BaseTranslationService(ABC):
     """Abstract base class for translation services."""
 
+    name = None
+
+    @property
+    def is_available(self):
+        """False when the provider is not configured (no API key)."""
+        return True
+
     @abstractmethod
-    def translate(self, text: str, target_language: str, source_language: str = 'en'):
-        pass
+    def request_translation(
+        self, text: str, target_language: str, source_language: str = 'en'
+    ) -> str:
+        """Translate one text with the provider, raising TranslationError."""
+
+    def request_translations(
+        self, texts: list, target_language: str, source_language: str = 'en'
+    ) -> list:
+        """
+        Translate texts with the provider, raising TranslationError.
+
+        Providers with a batch API override it, by default every text is
+        requested on its own, concurrently.
+        """
+        return dispatch(
+            self.name,
+            lambda text: self.request_translation(
+                text, target_language, source_language
+            ),
+            texts,
+        )
+
+    def unavailable_text(self, text: str, target_language: str) -> str:
+        """Placeholder returned when the provider is not configured."""
+        return f"[Translation to {target_language}] {text}"
+
+    def error_text(self, exc: Exception, text: str) -> str:
+        """Placeholder returned when the provider request failed."""
+        return f"[Translation error: {str(exc)}] {text}"
+
+    def translate(
+        self, text: str, target_language: str, source_language: str = 'en'
+    ) -> str:
+        return self.translate_batch([text], target_language, source_language)[0]
+
+    def translate_many(
+        self,
+        texts: list,
+        target_language: str,
+        source_language: str = 'en',
+        strict: bool = False,
+    ) -> list:
+        """
+        Translate several texts, returning translations in the same order.
+
+        Empty texts are not sent and duplicates are sent once; the unique
+        texts go to translate_batch, which providers implement with as few
+        requests as their API allows.
+        """
+        unique = list(dict.fromkeys(text for text in texts if text))
+        translations = {}
+        if unique:
+            translated = self.translate_batch(
+                unique, target_language, source_language, strict=strict
+            )
+            translations = dict(zip(unique, translated))
+        return [translations.get(text, text) for text in texts]
+
+    def translate_with_provider(
+        self, texts: list, target_language: str, source_language: str = 'en'
+    ) -> tuple:
+        """
+        Strict translate_many returning ``(translations, provider name)``,
+        the name of the provider that answered: not ``name`` when a fallback
+        provider did.
+        """
+        translations = self.translate_many(
+            texts, target_language, source_language, strict=True
+        )
+        return translations, self.name
+
+    def translate_batch(
+        self,
+        texts: list,
+        target_language: str,
+        source_language: str = 'en',
+        strict: bool = False,
+    ) -> list:
+        """
+        Translate non-empty unique texts, failures give placeholder texts.
+
+        With ``strict`` failures raise TranslationError instead
+        (ProviderUnavailable when the provider is not configured).
+        """
+        if not self.is_available:
+            if strict:
+                raise ProviderUnavailable(f'{self.name} is not configured')
+            return [self.unavailable_text(text, target_language) for text in texts]
+        try:
+            return self.request_translations(texts, target_language, source_language)
+        except TranslationError as exc:
+            if strict:
+                raise
+            return [self.error_text(exc, text) for text in texts]
+
+    def failure_texts(
+        self, exc: TranslationError, texts: list, target_language: str
+    ) -> list:
+        """Placeholder texts of a strict translate_many that raised exc."""
+        if isinstance(exc, ProviderUnavailable):
+            return [
+                self.unavailable_text(text, target_language) if text else text
+                for text in texts
+            ]
+        return [self.error_text(exc, text) if text else text for text in texts]
 
 
 class GoogleTranslateService(BaseTranslationService):
     """Google Translate API service."""
 
+    name = 'google'
+
+    # Limits of one v2 request: 128 text segments, ~30k characters
+    max_batch_items = 128
+    max_batch_chars = 30000
+
     def __init__(self):
         self.api_key = getattr(settings, 'GOOGLE_TRANSLATE_API_KEY', None)
-        self.base_url = 'https://translation.googleapis.com/language/translate/v2'
+        self.base_url = getattr(
+            settings,
+            'GOOGLE_TRANSLATE_URL',
+            'https://translation.googleapis.com/language/translate/v2',
+        )
 
-    def translate(
+    @property
+    def is_available(self):
+        return bool(self.api_key)
+
+    def request_translation(
         self, text: str, target_language: str, source_language: str = 'en'
     ) -> str:
-        if not self.api_key:
-            return f"[Translation to {target_language}] {text}"
+        return self._request_chunk([text], target_language, source_language)[0]
+
+    def request_translations(
+        self, texts: list, target_language: str, source_language: str = 'en'
+    ) -> list:
+        """Translate texts with one request per chunk, chunks run concurrently."""
+        chunks = list(_chunks(texts, self.max_batch_items, self.max_batch_chars))
+        results = dispatch(
+            self.name,
+            lambda chunk: self._request_chunk(chunk, target_language, source_language),
+            chunks,
+        )
+        return [translation for result in results for translation in result]
 
+    def _request_chunk(self, texts, target_language, source_language):
         try:
-            params = {
-                'key': self.api_key,
-                'q': text,
-                'target': target_language,
-                'source': source_language,
-                'format': 'text',
-            }
-
-            response = requests.post(self.base_url, data=params, timeout=10)
+            # one q parameter per text
+            params = [('q', text) for text in texts] + [
+                ('key', self.api_key),
+                ('target', target_language),
+                ('source', source_language),
+                ('format', 'text'),
+            ]
+
+            response = get_provider_session(self.name).post(
+                self.base_url, data=params, timeout=get_provider_timeout(self.name)
+            )
             response.raise_for_status()
 
             result = response.json()
-            return result['data']['translations'][0]['translatedText']
+            return [item['translatedText'] for item in result['data']['translations']]
 
         except Exception as exc:
-            return f"[Translation error: {str(exc)}] {text}"
+            raise TranslationError(str(exc)) from exc
 
 
 class OpenAITranslationService(BaseTranslationService):
     """OpenAI GPT-based translation service."""
 
+    name = 'openai'
+
+    # Keep a batch prompt (and its answer) well within the model context
+    max_batch_items = 64
+    max_batch_tokens = 1500
+
     def __init__(self):
         self.api_key = getattr(settings, 'OPENAI_API_KEY', None)
-        self.base_url = 'https://api.openai.com/v1/chat/completions'
+        self.base_url = getattr(
+            settings, 'OPENAI_API_URL', 'https://api.openai.com/v1/chat/completions'
+        )
 
-    def translate(
+    @property
+    def is_available(self):
+        return bool(self.api_key)
+
+    def unavailable_text(self, text: str, target_language: str) -> str:
+        return f"[OpenAI Translation to {target_language}] {text}"
+
+    def error_text(self, exc: Exception, text: str) -> str:
+        return f"[OpenAI Translation error: {str(exc)}] {text}"
+
+    def request_translations(
+        self, texts: list, target_language: str, source_language: str = 'en'
+    ) -> list:
+        """
+        Translate texts with one chat completion per chunk: the texts are sent
+        as a JSON array and the answer must be a JSON object with the same
+        number of translations. Chunks with an unusable answer fall back to
+        one request per text. Chunks, and then single texts, run concurrently.
+
+        Texts over TRANSLATION_CHUNK_TOKENS tokens (long bios and project
+        descriptions) are split on paragraphs and sentences first and the
+        translated pieces joined again, see cvsai.text_chunks.
+        """
+        max_tokens = getattr(settings, 'TRANSLATION_CHUNK_TOKENS', 800)
+        pieces, layout = split_texts(texts, max_tokens)
+        # whitespace-only pieces are kept as they are
+        sent = list(dict.fromkeys(piece for piece in pieces if piece.strip()))
+        translated = dict(
+            zip(sent, self._request_pieces(sent, target_language, source_language))
+        )
+        return join_texts([translated.get(piece, piece) for piece in pieces], layout)
+
+    def _request_pieces(self, texts, target_language, source_language):
+        chunks = list(
+            _chunks(
+                texts, self.max_batch_items, self.max_batch_tokens, size=count_tokens
+            )
+        )
+        results = dispatch(
+            self.name,
+            lambda chunk: self._try_batch(chunk, target_language, source_language),
+            chunks,
+        )
+
+        retry = [
+            text
+            for chunk, result in zip(chunks, results)
+            if result is None
+            for text in chunk
+        ]
+        if retry:
+            singles = super().request_translations(
+                retry, target_language, source_language
+            )
+            retried = iter(singles)
+            results = [
+                [next(retried) for _text in chunk] if result is None else result
+                for chunk, result in zip(chunks, results)
+            ]
+        return [translation for result in results for translation in result]
+
+    def _try_batch(self, texts, target_language, source_language):
+        """Translations of the chunk, None when the answer is unusable."""
+        try:
+            return self._request_batch(texts, target_language, source_language)
+        except requests.RequestException as exc:
+            raise TranslationError(str(exc)) from exc
+        except (ValueError, LookupError, TypeError) as exc:
+            logger.warning("Unusable OpenAI batch translation: %s", exc)
+            return None
+
+    def _headers(self):
+        return {
+            'Authorization': f'Bearer {self.api_key}',
+            'Content-Type': 'application/json',
+        }
+
+    def request_translation(
         self, text: str, target_language: str, source_language: str = 'en'
     ) -> str:
-        if not self.api_key:
-            return f"[OpenAI Translation to {target_language}] {text}"
-
         try:
-            headers = {
-                'Authorization': f'Bearer {self.api_key}',
-                'Content-Type': 'application/json',
-            }
-
             prompt = (
                 f"Translate the following text from {source_language} "
                 f"to {target_language}. "
@@ -84,12 +528,15 @@ class OpenAITranslationService(BaseTranslationService):
                     },
                     {'role': 'user', 'content': prompt},
                 ],
-                'max_tokens': len(text) * 2,  # Rough estimate
+                'max_tokens': estimate_output_tokens(text),
                 'temperature': 0.1,  # Low temperature for consistent translations
             }
 
-            response = requests.post(
-                self.base_url, json=data, headers=headers, timeout=30
+            response = get_provider_session(self.name).post(
+                self.base_url,
+                json=data,
+                headers=self._headers(),
+                timeout=get_provider_timeout(self.name),
             )
             response.raise_for_status()
 
@@ -97,82 +544,328 @@ class OpenAITranslationService(BaseTranslationService):
             return result['choices'][0]['message']['content'].strip()
 
         except Exception as exc:
-            return f"[OpenAI Translation error: {str(exc)}] {text}"
+            raise TranslationError(str(exc)) from exc
+
+    def _request_batch(self, texts, target_language, source_language):
+        prompt = (
+            f"Translate every string of the JSON array below from {source_language} "
+            f"to {target_language}. Return a JSON object "
+            '{"translations": [...]} with the translations in the same order '
+            "and nothing else:\n\n"
+            f"{json.dumps(texts, ensure_ascii=False)}"
+        )
+
+        data = {
+            'model': 'gpt-3.5-turbo',
+            'messages': [
+                {
+                    'role': 'system',
+                    'content': (
+                        "You are a professional translator. "
+                        "Translate accurately and maintain formatting."
+                    ),
+                },
+                {'role': 'user', 'content': prompt},
+            ],
+            'response_format': {'type': 'json_object'},
+            # Translations plus the JSON object around them
+            'max_tokens': sum(estimate_output_tokens(text) for text in texts)
+            + 4 * len(texts)
+            + 8,
+            'temperature': 0.1,
+        }
+
+        response = get_provider_session(self.name).post(
+            self.base_url,
+            json=data,
+            headers=self._headers(),
+            timeout=get_provider_timeout(self.name),
+        )
+        response.raise_for_status()
+
+        content = response.json()['choices'][0]['message']['content']
+        translations = json.loads(content)['translations']
+        if len(translations) != len(texts) or not all(
+            isinstance(item, str) for item in translations
+        ):
+            raise ValueError(
+                f'Expected {len(texts)} translations, got {len(translations)}'
+            )
+        return [item.strip() for item in translations]
 
 
 class MockTranslationService(BaseTranslationService):
     """Mock translation service for testing/demo."""
 
-    def translate(
+    name = 'mock'
+
+    def request_translation(
         self, text: str, target_language: str, source_language: str = 'en'
     ) -> str:
         return f"[MOCK {target_language.upper()}] {text}"
 
+    def request_translations(
+        self, texts: list, target_language: str, source_language: str = 'en'
+    ) -> list:
+        return [self.request_translation(text, target_language) for text in texts]
+
+
+class TranslationMemoryService(BaseTranslationService):
+    """
+    Translation service answering from the translation memory and sending
+    only the texts it does not know to the wrapped provider.
+
+    Failed requests and placeholders of an unconfigured provider are never
+    remembered.
+    """
+
+    def __init__(self, service, memory=None):
+        self.service = service
+        self.memory = memory or get_translation_memory()
+
+    @property
+    def name(self):
+        return self.service.name
+
+    @property
+    def is_available(self):
+        return self.service.is_available
+
+    def unavailable_text(self, text: str, target_language: str) -> str:
+        return self.service.unavailable_text(text, target_language)
+
+    def error_text(self, exc: Exception, text: str) -> str:
+        return self.service.error_text(exc, text)
+
+    def request_translation(
+        self, text: str, target_language: str, source_language: str = 'en'
+    ) -> str:
+        return self.request_translations([text], target_language, source_language)[0]
+
+    def request_translations(
+        self, texts: list, target_language: str, source_language: str = 'en'
+    ) -> list:
+        keys = [
+            memory_key(text, source_language, target_language, self.name)
+            for text in texts
+        ]
+        found = self.memory.get_many(keys)
+
+        missing = [(key, text) for key, text in zip(keys, texts) if key not in found]
+        if missing:
+            translated = self.service.request_translations(
+                [text for _key, text in missing], target_language, source_language
+            )
+            new = {key: text for (key, _text), text in zip(missing, translated)}
+            self.memory.set_many(new, self.name, source_language, target_language)
+            found.update(new)
+        return [found[key] for key in keys]
+
+
+class FallbackTranslationService(BaseTranslationService):
+    """
+    Translation service trying providers in order: texts go to the next
+    configured provider when one fails (or its circuit is open).
+
+    Named after the first provider, whose placeholders are returned when
+    every provider fails.
+    """
+
+    def __init__(self, services):
+        self.services = services
+
+    @property
+    def name(self):
+        return self.services[0].name
+
+    @property
+    def is_available(self):
+        return any(service.is_available for service in self.services)
+
+    def unavailable_text(self, text: str, target_language: str) -> str:
+        return self.services[0].unavailable_text(text, target_language)
+
+    def error_text(self, exc: Exception, text: str) -> str:
+        return self.services[0].error_text(exc, text)
+
+    def request_translation(
+        self, text: str, target_language: str, source_language: str = 'en'
+    ) -> str:
+        return self.request_translations([text], target_language, source_language)[0]
+
+    def request_translations(
+        self, texts: list, target_language: str, source_language: str = 'en'
+    ) -> list:
+        translations, _provider = self.translate_with_provider(
+            texts, target_language, source_language
+        )
+        return translations
+
+    def translate_with_provider(
+        self, texts: list, target_language: str, source_language: str = 'en'
+    ) -> tuple:
+        error = None
+        for service in self.services:
+            if not service.is_available:
+                continue
+            try:
+                return service.translate_with_provider(
+                    texts, target_language, source_language
+                )
+            except TranslationError as exc:
+                logger.warning("%s translation failed: %s", service.name, exc)
+                error = exc
+        raise error or ProviderUnavailable('No translation provider is configured')
+
+
+def get_provider_service(provider):
+    """Return the translation service of the provider (behind the memory)."""
+    if provider == 'google':
+        service = GoogleTranslateService()
+    elif provider == 'openai':
+        service = OpenAITranslationService()
+    else:
+        service = MockTranslationService()
+
+    if getattr(settings, 'TRANSLATION_MEMORY_ENABLED', True):
+        return TranslationMemoryService(service)
+    return service
+
 
 def get_translation_service():
-    """Get configured translation service."""
+    """
+    Get configured translation service: TRANSLATION_SERVICE, followed by the
+    providers of TRANSLATION_FALLBACK_CHAIN when it fails.
+    """
     service_type = getattr(settings, 'TRANSLATION_SERVICE', 'openai')
+    chain = [service_type] + [
+        provider
+        for provider in getattr(settings, 'TRANSLATION_FALLBACK_CHAIN', [])
+        if provider != service_type
+    ]
 
-    if service_type == 'google':
-        return GoogleTranslateService()
-    if service_type == 'openai':
-        return OpenAITranslationService()
-    return MockTranslationService()
+    services = [get_provider_service(provider) for provider in chain]
+    if len(services) == 1:
+        return services[0]
+    return FallbackTranslationService(services)
 
 
-def translate_cv_content(resume, target_language: str) -> dict:
+def resume_source_texts(resume) -> dict:
     """
-    Translate CV content to target language.
-    Returns dict with translated content.
+    Return ``{field: text}`` of the translatable resume fields: title, bio,
+    skill levels and project titles and descriptions.
     """
-    service = get_translation_service()
-    translated_content = {
+    texts = {'title': resume.title, 'bio': resume.bio}
+    for resume_skill in resume.resumeskill_set.all():
+        texts[f'skill:{resume_skill.id}:level'] = str(resume_skill.get_level_display())
+    for project in resume.projects.all():
+        texts[f'project:{project.id}:title'] = project.title
+        texts[f'project:{project.id}:description'] = project.description
+    return texts
+
+
+def translate_in_steps(
+    service, texts, target_language, *, progress=None, strict=False, providers=None
+):
+    """
+    Translate texts with ``service.translate_many``.
+
+    With a ``progress(done, total)`` callback the texts are translated in
+    steps of TRANSLATION_JOB_PROGRESS_STEP and it is called after each step.
+    With a ``providers`` list (strict only) the name of the provider that
+    translated each text is appended to it, see translate_with_provider.
+    """
+
+    def translate(batch):
+        if providers is None:
+            return service.translate_many(batch, target_language, strict=strict)
+        translated, provider = service.translate_with_provider(batch, target_language)
+        providers.extend([provider] * len(batch))
+        return translated
+
+    if progress is None:
+        return translate(texts)
+
+    translated = []
+    progress(0, len(texts))
+    step = getattr(settings, 'TRANSLATION_JOB_PROGRESS_STEP', 20)
+    for batch in itertools.batched(texts, step):
+        translated += translate(list(batch))
+        progress(len(translated), len(texts))
+    return translated
+
+
+def untranslated_content(resume, target_language) -> dict:
+    """Return the parts of the translated CV that are not translated."""
+    return {
         'firstname': resume.firstname,
         'lastname': resume.lastname,
-        'title': service.translate(resume.title, target_language),
-        'bio': service.translate(resume.bio, target_language) if resume.bio else '',
-        'skills': [],
-        'projects': [],
-        'contacts': [],  # Змінено на список
+        'contacts': [
+            {
+                'type': contact.contact_type,
+                'value': contact.value,
+                'id': contact.id,
+            }
+            for contact in resume.contacts.all()
+        ],
         'language': target_language,
         'language_name': SUPPORTED_LANGUAGES.get(target_language, {}).get(
             'name', target_language
         ),
     }
 
-    for contact in resume.contacts.all():
-        translated_content['contacts'].append(
-            {
-                'type': contact.contact_type,
-                'value': contact.value,
-                'id': contact.id,
-            }
-        )
 
-    # Translate skills
-    for resume_skill in resume.resumeskill_set.all():
-        translated_content['skills'].append(
-            {
-                'name': resume_skill.skill.name,
-                'level': service.translate(
-                    resume_skill.get_level_display(), target_language
-                ),
-            }
-        )
+def translated_skill(resume_skill, translations) -> dict:
+    """Return the translated skill from ``{field: translated text}``."""
+    return {
+        'name': resume_skill.skill.name,
+        'level': translations[f'skill:{resume_skill.id}:level'],
+    }
 
-    # Translate projects
-    for project in resume.projects.all():
-        translated_content['projects'].append(
-            {
-                'title': service.translate(project.title, target_language),
-                'description': service.translate(project.description, target_language),
-                'url': project.url,
-                'start_date': (
-                    project.start_date.isoformat() if project.start_date else None
-                ),
-                'end_date': project.end_date.isoformat() if project.end_date else None,
-                'is_ongoing': project.is_ongoing,
-            }
-        )
 
-    return translated_content
+def translated_project(project, translations) -> dict:
+    """Return the translated project from ``{field: translated text}``."""
+    return {
+        'title': translations[f'project:{project.id}:title'],
+        'description': translations[f'project:{project.id}:description'],
+        'url': project.url,
+        'start_date': project.start_date.isoformat() if project.start_date else None,
+        'end_date': project.end_date.isoformat() if project.end_date else None,
+        'is_ongoing': project.is_ongoing,
+    }
+
+
+def build_translated_content(resume, target_language, translations) -> dict:
+    """Return the translated CV from ``{field: translated text}``."""
+    return {
+        **untranslated_content(resume, target_language),
+        'title': translations['title'],
+        'bio': translations['bio'] or '',
+        'skills': [
+            translated_skill(resume_skill, translations)
+            for resume_skill in resume.resumeskill_set.all()
+        ],
+        'projects': [
+            translated_project(project, translations)
+            for project in resume.projects.all()
+        ],
+    }
+
+
+def translate_cv_content(resume, target_language: str, progress=None) -> dict:
+    """
+    Translate CV content to target language.
+    Returns dict with translated content.
+
+    Everything is translated with one translate_many call (one per step
+    when reporting progress, see translate_in_steps). Stored translations
+    are served by cvsai.translation_store.
+    """
+    service = get_translation_service()
+    texts = resume_source_texts(resume)
+    translated = translate_in_steps(
+        service, list(texts.values()), target_language, progress=progress
+    )
+    return build_translated_content(
+        resume, target_language, dict(zip(texts, translated))
+    )
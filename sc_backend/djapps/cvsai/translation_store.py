@@ -0,0 +1,262 @@
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.db import connection
+
+from cvsai.models import ResumeTranslation
+from cvsai.translation_services import (
+    TranslationError,
+    build_translated_content,
+    get_provider_limits,
+    get_translation_service,
+    resume_source_texts,
+    translate_in_steps,
+    translated_project,
+    translated_skill,
+    untranslated_content,
+)
+
+
+def source_hash(text):
+    """Hash of a source field text, recorded with its translation."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def _stored_translations(resume, target_language, service, hashes):
+    """
+    Return ``{field: translated text}`` of the stored fields whose source
+    hash is unchanged, and all stored fields.
+    """
+    stored = ResumeTranslation.objects.filter(
+        resume=resume, language=target_language, provider=service.name
+    ).first()
+    stored_fields = stored.fields if stored else {}
+    translations = {
+        field: stored_fields[field]['text']
+        for field in hashes
+        if stored_fields.get(field, {}).get('hash') == hashes[field]
+    }
+    return translations, stored_fields
+
+
+def _store_translations(resume, target_language, service, hashes, translations):
+    """
+    Store ``{field: translated text}`` under the configured provider; only
+    texts that provider translated belong there, not fallback answers or
+    placeholders.
+    """
+    ResumeTranslation.objects.update_or_create(
+        resume=resume,
+        language=target_language,
+        defaults={
+            'provider': service.name,
+            'fields': {
+                field: {'hash': hashes[field], 'text': translations[field]}
+                for field in hashes
+                if field in translations
+            },
+        },
+    )
+
+
+def get_resume_translation(resume, target_language, progress=None, strict=False):
+    """
+    Return the translated CV content, served from its ResumeTranslation.
+
+    Only fields whose source text changed since they were stored (or that
+    were added) are sent to the provider, everything else is reused; editing
+    one project description costs one translated text. Translations stored
+    by another provider are not reused, and texts answered by a fallback
+    provider are served but not stored. When every provider fails, the
+    changed fields get placeholder texts and nothing is stored, or the
+    TranslationError is raised when ``strict``.
+
+    ``progress(done, total)`` counts reused fields as done, see
+    translate_in_steps.
+    """
+    service = get_translation_service()
+    texts = resume_source_texts(resume)
+    hashes = {field: source_hash(text) for field, text in texts.items()}
+    translations, stored_fields = _stored_translations(
+        resume, target_language, service, hashes
+    )
+
+    # fields translated by the configured provider, which may be stored
+    reused = set(translations)
+    reusable = set(reused)
+    changed = [field for field in texts if field not in translations]
+    if changed:
+
+        def step_progress(done, _total):
+            progress(len(reused) + done, len(texts))
+
+        changed_texts = [texts[field] for field in changed]
+        providers = []
+        try:
+            translated = translate_in_steps(
+                service,
+                changed_texts,
+                target_language,
+                progress=step_progress if progress is not None else None,
+                strict=True,
+                providers=providers,
+            )
+        except TranslationError as exc:
+            if strict:
+                raise
+            translated = service.failure_texts(exc, changed_texts, target_language)
+            translations.update(zip(changed, translated))
+            return build_translated_content(resume, target_language, translations)
+        translations.update(zip(changed, translated))
+        reusable.update(
+            field
+            for field, provider in zip(changed, providers)
+            if provider == service.name
+        )
+    elif progress is not None:
+        progress(len(texts), len(texts))
+
+    if reusable != reused or set(stored_fields) != reusable:
+        _store_translations(
+            resume,
+            target_language,
+            service,
+            hashes,
+            {field: translations[field] for field in reusable},
+        )
+    return build_translated_content(resume, target_language, translations)
+
+
+def _translate_part(service, texts, target_language):
+    try:
+        return service.translate_with_provider(texts, target_language)
+    finally:
+        # runs in a pool thread, do not leave its database connection open
+        connection.close()
+
+
+def _resume_parts(resume):
+    """
+    Return ``(event, fields, data)`` of every part of the CV streamed by
+    iter_resume_translation, ``data`` builds the event data from
+    ``{field: translated text}``.
+    """
+    parts = [
+        ('title', ['title'], lambda translated: translated['title']),
+        ('bio', ['bio'], lambda translated: translated['bio'] or ''),
+    ]
+    for index, resume_skill in enumerate(resume.resumeskill_set.all()):
+        parts.append(
+            (
+                'skill',
+                [f'skill:{resume_skill.id}:level'],
+                lambda translated, index=index, resume_skill=resume_skill: {
+                    'index': index,
+                    **translated_skill(resume_skill, translated),
+                },
+            )
+        )
+    for index, project in enumerate(resume.projects.all()):
+        parts.append(
+            (
+                'project',
+                [f'project:{project.id}:title', f'project:{project.id}:description'],
+                lambda translated, index=index, project=project: {
+                    'index': index,
+                    **translated_project(project, translated),
+                },
+            )
+        )
+    return parts
+
+
+def _translated_parts(pool, service, target_language, texts, pending):
+    """
+    Translate the missing fields of the pending ``(event, missing, data)``
+    parts in the pool and yield ``(part, {field: text}, provider)`` as each
+    one is done; a failed part gets placeholder texts and a None provider.
+    """
+    futures = {
+        pool.submit(
+            _translate_part,
+            service,
+            [texts[field] for field in missing],
+            target_language,
+        ): (event, missing, data)
+        for event, missing, data in pending
+    }
+    for future in as_completed(futures):
+        part = futures[future]
+        missing = part[1]
+        try:
+            translated, provider = future.result()
+        except TranslationError as exc:
+            sources = [texts[field] for field in missing]
+            translated = service.failure_texts(exc, sources, target_language)
+            provider = None
+        yield part, dict(zip(missing, translated)), provider
+
+
+def iter_resume_translation(resume, target_language):
+    """
+    Yield the translated CV part by part as ``(event, data)`` pairs.
+
+    ``start`` carries the untranslated parts (names, contacts, language) and
+    the number of parts, followed by one ``title``, ``bio``, ``skill`` and
+    ``project`` event per part (skills and projects with their ``index``)
+    and a final ``done``. Parts served from the stored translation come
+    first, the others are translated concurrently and yielded as soon as
+    they are done. Translations of the configured provider are stored like
+    get_resume_translation does.
+    """
+    service = get_translation_service()
+    texts = resume_source_texts(resume)
+    hashes = {field: source_hash(text) for field, text in texts.items()}
+    translations, stored_fields = _stored_translations(
+        resume, target_language, service, hashes
+    )
+    parts = _resume_parts(resume)
+
+    yield 'start', {
+        **untranslated_content(resume, target_language),
+        'parts': len(parts),
+    }
+
+    # parts not fully stored, with only the fields that are not
+    pending = []
+    for event, fields, data in parts:
+        missing = [field for field in fields if field not in translations]
+        if missing:
+            pending.append((event, missing, data))
+        else:
+            yield event, data(translations)
+
+    reused = set(translations)
+    reusable = set(reused)
+    if pending:
+        max_workers = get_provider_limits(service.name)['max_in_flight']
+        # a pool of its own, provider requests go to the pool of the provider
+        pool = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            for (event, missing, data), translated, provider in _translated_parts(
+                pool, service, target_language, texts, pending
+            ):
+                if provider is None:
+                    yield event, data({**translations, **translated})
+                    continue
+                translations.update(translated)
+                if provider == service.name:
+                    reusable.update(missing)
+                yield event, data(translations)
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    if reusable != reused or set(stored_fields) != reusable:
+        _store_translations(
+            resume,
+            target_language,
+            service,
+            hashes,
+            {field: translations[field] for field in reusable},
+        )
+    yield 'done', {}
@@ -6,6 +6,8 @@ from cvsai.views import (
     download_resume_pdf,
     send_cv_email,
     translate_cv,
+    translate_cv_job,
+    translate_cv_stream,
 )
 
 app_name = 'cvsai'
@@ -16,4 +18,14 @@ urlpatterns = [
     path('cv/<int:pk>/download-pdf/', download_resume_pdf, name='cv_download_pdf'),
     path('cv/<int:pk>/send-email/', send_cv_email, name='send_cv_email'),
     path('cv/<int:pk>/translate/', translate_cv, name='translate_cv'),
+    path(
+        'cv/<int:pk>/translate/stream/',
+        translate_cv_stream,
+        name='translate_cv_stream',
+    ),
+    path(
+        'cv/<int:pk>/translate/jobs/<uuid:job_id>/',
+        translate_cv_job,
+        name='translate_cv_job',
+    ),
 ]
@@ -1,14 +1,23 @@
-import io
+import re
 
-from django.http import HttpResponse
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
 from django.template.loader import get_template
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 
-from xhtml2pdf import pisa
+from cvsai.pdf_engine import PDFEngineBusy, PDFRenderError, get_pdf_engine
 
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+RANGE_CHUNK_SIZE = 64 * 1024
 
-def render_to_pdf(template_src, context_dict, filename):
+
+def render_pdf(template_src, context_dict):
     """
-    Universal function to render template to PDF using xhtml2pdf.
+    Render template to PDF bytes using xhtml2pdf.
+
+    The HTML -> PDF conversion runs in the PDF rendering engine process pool
+    (see cvsai.pdf_engine) and may raise PDFEngineBusy or PDFRenderTimeout.
     """
     template = get_template(template_src)
 
@@ -16,14 +25,141 @@ def render_to_pdf(template_src, context_dict, filename):
     html = template.render(context_dict)
 
     # Create PDF
-    result = io.BytesIO()
-    pdf = pisa.CreatePDF(io.BytesIO(html.encode('utf-8')), result)
+    return get_pdf_engine().render(html)
+
 
-    if not pdf.err:
-        response = HttpResponse(result.getvalue(), content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+def pdf_response(content, filename):
+    """Wrap PDF bytes into an attachment response."""
+    response = HttpResponse(content, content_type='application/pdf')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def pdf_error_response(exc):
+    """Response returned when a PDF could not be generated."""
+    if isinstance(exc, PDFEngineBusy):
+        response = HttpResponse(str(exc), status=503)
+        response['Retry-After'] = str(exc.retry_after)
         return response
+    return HttpResponse(f'We had some errors generating PDF: <b>{exc}</b>', status=500)
+
+
+def render_to_pdf(template_src, context_dict, filename):
+    """
+    Universal function to render template to PDF using xhtml2pdf.
+    """
+    try:
+        content = render_pdf(template_src, context_dict)
+    except PDFRenderError as exc:
+        return pdf_error_response(exc)
+    return pdf_response(content, filename)
+
+
+def stored_pdf_response(request, path, filename):
+    """
+    Serve a PDF stored on disk with ETag/Last-Modified validators.
+
+    Answers conditional requests with 304/412 and single byte ranges with 206.
+    With ``CVSAI_PDF_SENDFILE`` set to ``x-accel-redirect`` (nginx) or
+    ``x-sendfile`` (Apache, lighttpd) the body is left to the front proxy.
+    """
+    stat = path.stat()
+    # the key is a hash of the resume content, not of the file: the size and
+    # mtime tell renders of the same key apart
+    etag = f'"{path.stem}-{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+    last_modified = int(stat.st_mtime)
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = _stored_pdf_body(request, path, filename, stat.st_size, etag)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def _stored_pdf_body(request, path, filename, size, etag):
+    sendfile = getattr(settings, 'CVSAI_PDF_SENDFILE', '')
+    if sendfile == 'x-accel-redirect':
+        response = HttpResponse(content_type='application/pdf')
+        url_prefix = getattr(settings, 'CVSAI_PDF_SENDFILE_URL', '/protected/pdf/')
+        response['X-Accel-Redirect'] = f'{url_prefix}{path.name}'
+    elif sendfile == 'x-sendfile':
+        response = HttpResponse(content_type='application/pdf')
+        response['X-Sendfile'] = str(path)
+    else:
+        byte_range = None
+        if _if_range_matches(request, etag, path):
+            byte_range = _parse_byte_range(request.META.get('HTTP_RANGE'), size)
+
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+        # pylint: disable-next=consider-using-with
+        file_obj = open(path, 'rb')
+        if byte_range is None:
+            response = FileResponse(file_obj, content_type='application/pdf')
+        else:
+            start, end = byte_range
+            response = StreamingHttpResponse(
+                _iter_file_range(file_obj, start, end),
+                status=206,
+                content_type='application/pdf',
+            )
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+            response['Content-Length'] = str(end - start + 1)
+        response['Accept-Ranges'] = 'bytes'
+
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def _if_range_matches(request, etag, path):
+    """Range is only honoured when If-Range (if any) matches the current file."""
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+    return if_range in (etag, http_date(int(path.stat().st_mtime)))
+
+
+def _parse_byte_range(header, size):
+    """
+    Parse a single ``bytes=start-end`` range.
+
+    Return None to serve the whole file (no, malformed or multi-range header),
+    False when the range is not satisfiable, or an inclusive (start, end) pair.
+    """
+    if not header:
+        return None
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None
+
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        return False
+    return start, min(end, size - 1)
+
 
-    return HttpResponse(
-        f'We had some errors generating PDF: <b>{pdf.err}</b>', status=500
-    )
+def _iter_file_range(file_obj, start, end):
+    with file_obj:
+        file_obj.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = file_obj.read(min(RANGE_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
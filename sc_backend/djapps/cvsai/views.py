@@ -1,18 +1,33 @@
 import json
 
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.template.defaultfilters import slugify
-from django.views.decorators.http import require_POST
+from django.urls import reverse
+from django.views.decorators.http import require_GET, require_POST
 from django.views.generic import DetailView, ListView
 
 from cvsai.constants import SUPPORTED_LANGUAGES
 from cvsai.forms import SendCVEmailForm
 from cvsai.models import Resume
-from cvsai.tasks import send_cv_pdf_email
-from cvsai.translation_services import translate_cv_content
-from cvsai.utils import render_to_pdf
+from cvsai.pdf_cache import get_resume_pdf, get_resume_pdf_file
+from cvsai.pdf_renderers import PDF_RENDERERS
+from cvsai.tasks import send_cv_pdf_email, send_cv_pdf_emails
+from cvsai.translation_jobs import (
+    JOB_ERROR,
+    JOB_QUEUED,
+    JOB_SUCCESS,
+    get_translation_job,
+    start_translation_job,
+)
+from cvsai.translation_store import get_resume_translation, iter_resume_translation
+from cvsai.utils import (
+    PDFRenderError,
+    pdf_error_response,
+    pdf_response,
+    stored_pdf_response,
+)
 
 
 class ResumeListView(ListView):
@@ -38,17 +53,45 @@ class ResumeDetailView(DetailView):
 
 
 def download_resume_pdf(request, pk):
-    resume = get_object_or_404(Resume, pk=pk)
-    context = {'resume': resume, 'request': request}
+    """
+    Download resume as PDF.
+
+    The stored PDF is streamed from disk and supports conditional
+    (If-None-Match/If-Modified-Since) and Range requests.
+    ``?renderer=pisa|reportlab`` overrides settings.CVSAI_PDF_RENDERER.
+    """
+    renderer = request.GET.get('renderer') or None
+    if renderer is not None and renderer not in PDF_RENDERERS:
+        return HttpResponseBadRequest(f'Unknown PDF renderer: {renderer}')
+
+    resume = get_object_or_404(
+        Resume.objects.prefetch_related(
+            'resumeskill_set__skill', 'projects', 'contacts'
+        ),
+        pk=pk,
+    )
     slugify_name = slugify(resume.full_name.replace(' ', '_'))
     filename = f"{slugify_name}_resume.pdf"
-    return render_to_pdf('cvsai/resume_pdf.html', context, filename)
+    try:
+        path, content = get_resume_pdf_file(resume, renderer=renderer)
+        if path is not None:
+            try:
+                return stored_pdf_response(request, path, filename)
+            except FileNotFoundError:
+                # evicted by another process in the meantime
+                content = content or get_resume_pdf(resume, renderer=renderer)
+    except PDFRenderError as exc:
+        return pdf_error_response(exc)
+    return pdf_response(content, filename)
 
 
 @require_POST
 def send_cv_email(request, pk):
     """
     View to send CV PDF via email using Celery task.
+
+    ``email`` may hold several comma separated addresses (or JSON ``emails``
+    a list of them), they are sent in one batch over one mail connection.
     """
     resume = get_object_or_404(Resume, pk=pk)
 
@@ -56,25 +99,27 @@ def send_cv_email(request, pk):
     if request.headers.get('Content-Type') == 'application/json':
         try:
             data = json.loads(request.body)
-            email = data.get('email')
+            emails = data.get('emails') or data.get('email')
         except json.JSONDecodeError:
             return JsonResponse(
                 {'status': 'error', 'message': 'Invalid JSON data'}, status=400
             )
     else:
         # Handle form submission
-        email = request.POST.get('email')
+        emails = request.POST.get('email')
 
-    if not email:
+    if isinstance(emails, str):
+        emails = [email.strip() for email in emails.split(',') if email.strip()]
+
+    if not emails or not isinstance(emails, list):
         response_data = {'status': 'error', 'message': 'Email address is required'}
         if request.headers.get('Content-Type') == 'application/json':
             return JsonResponse(response_data, status=400)
         messages.error(request, response_data['message'])
         return redirect('cvsai:cv_detail', pk=pk)
 
-    # Validate email using form
-    form = SendCVEmailForm({'email': email})
-    if not form.is_valid():
+    # Validate emails using form
+    if not all(SendCVEmailForm({'email': email}).is_valid() for email in emails):
         response_data = {'status': 'error', 'message': 'Invalid email address'}
         if request.headers.get('Content-Type') == 'application/json':
             return JsonResponse(response_data, status=400)
@@ -83,12 +128,16 @@ def send_cv_email(request, pk):
 
     try:
         # Queue the Celery task
-        task = send_cv_pdf_email.delay(resume.id, email)
+        if len(emails) == 1:
+            task = send_cv_pdf_email.delay(resume.id, emails[0])
+        else:
+            task = send_cv_pdf_emails.delay([[resume.id, email] for email in emails])
 
         response_data = {
             'status': 'success',
             'message': (
-                f"CV is being sent to {email}. " "You will be notified when complete."
+                f"CV is being sent to {', '.join(emails)}. "
+                "You will be notified when complete."
             ),
             'task_id': task.id,
         }
@@ -115,15 +164,20 @@ def translate_cv(request, pk):
     Translate CV content to selected language.
     Supports both POST (with language) and GET (show translation page).
     """
-    resume = get_object_or_404(Resume, pk=pk)
+    resume = get_object_or_404(
+        Resume.objects.prefetch_related(
+            'resumeskill_set__skill', 'projects', 'contacts'
+        ),
+        pk=pk,
+    )
 
     if request.method == 'POST':
         # Handle AJAX translation request
         if request.content_type == 'application/json':
             data = json.loads(request.body)
-            target_language = data.get('language')
         else:
-            target_language = request.POST.get('language')
+            data = request.POST
+        target_language = data.get('language')
         try:
             if not target_language:
                 return JsonResponse(
@@ -136,8 +190,25 @@ def translate_cv(request, pk):
                     status=400,
                 )
 
-            # Perform translation
-            translated_content = translate_cv_content(resume, target_language)
+            if data.get('mode') == 'async':
+                # Translate in a Celery task, the client polls the job status
+                job_id, _created = start_translation_job(resume, target_language)
+                job = get_translation_job(job_id)
+                return JsonResponse(
+                    {
+                        'success': True,
+                        'job_id': job_id,
+                        'status': job['status'] if job else JOB_QUEUED,
+                        'status_url': reverse(
+                            'cvsai:translate_cv_job',
+                            kwargs={'pk': resume.pk, 'job_id': job_id},
+                        ),
+                    },
+                    status=202,
+                )
+
+            # Perform translation, only changed fields are sent to the provider
+            translated_content = get_resume_translation(resume, target_language)
 
             return JsonResponse(
                 {
@@ -156,3 +227,72 @@ def translate_cv(request, pk):
         # GET request - show translation interface
         context = {'resume': resume, 'supported_languages': SUPPORTED_LANGUAGES}
         return render(request, 'cvsai/translate_cv.html', context)
+
+
+@require_GET
+def translate_cv_job(request, pk, job_id):
+    """
+    Return the state of an async translation job of the CV.
+
+    ``done`` and ``total`` count translated fields, ``translated_content`` is
+    set once the status is ``success``.
+    """
+    job = get_translation_job(str(job_id))
+    if job is None or job['resume_id'] != pk:
+        return JsonResponse({'error': 'Translation job not found'}, status=404)
+
+    payload = {
+        'job_id': str(job_id),
+        'status': job['status'],
+        'language': job['language'],
+        'done': job['done'],
+        'total': job['total'],
+    }
+    if job['status'] == JOB_SUCCESS:
+        payload['translated_content'] = job['translated_content']
+    elif job['status'] == JOB_ERROR:
+        payload['error'] = job['error']
+    return JsonResponse(payload)
+
+
+@require_GET
+def translate_cv_stream(request, pk):
+    """
+    Stream the CV translation part by part as it is translated.
+
+    GET ?language=<code> - one JSON object per line (``event`` and ``data``);
+    with ?format=sse or ``Accept: text/event-stream`` server-sent events.
+    See cvsai.translation_store.iter_resume_translation for the events.
+    """
+    resume = get_object_or_404(
+        Resume.objects.prefetch_related(
+            'resumeskill_set__skill', 'projects', 'contacts'
+        ),
+        pk=pk,
+    )
+    target_language = request.GET.get('language')
+    if target_language not in SUPPORTED_LANGUAGES:
+        return JsonResponse(
+            {'error': f'Language {target_language} is not supported'}, status=400
+        )
+
+    events = iter_resume_translation(resume, target_language)
+    sse = request.GET.get('format') == 'sse' or 'text/event-stream' in (
+        request.headers.get('Accept', '')
+    )
+    if sse:
+        body = (
+            f'event: {event}\ndata: {json.dumps(data)}\n\n' for event, data in events
+        )
+        content_type = 'text/event-stream'
+    else:
+        body = (
+            json.dumps({'event': event, 'data': data}) + '\n' for event, data in events
+        )
+        content_type = 'application/x-ndjson'
+
+    response = StreamingHttpResponse(body, content_type=content_type)
+    response['Cache-Control'] = 'no-cache'
+    # nginx must not buffer the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
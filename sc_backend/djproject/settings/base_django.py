@@ -148,6 +148,42 @@ MEDIA_URL = "/media/"
 # STATICFILES_DIRS = [join_to_project("static")]
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10485760 * 10  # 100 MB
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('CACHE_URL', 'redis://127.0.0.1:6379/1'),
+    }
+}
+
+# Rendered resume PDFs are cached under MEDIA_ROOT/CVSAI_PDF_CACHE_DIR
+CVSAI_PDF_CACHE_ENABLED = os.getenv('CVSAI_PDF_CACHE_ENABLED', 'True') == 'True'
+CVSAI_PDF_CACHE_DIR = 'pdf_cache'
+CVSAI_PDF_CACHE_MAX_SIZE = int(
+    os.getenv('CVSAI_PDF_CACHE_MAX_SIZE', str(500 * 1024 * 1024))
+)  # bytes
+CVSAI_PDF_CACHE_LOCK_TIMEOUT = 35  # seconds a miss waits for the same render
+# Resume PDF renderer: 'pisa' (HTML template) or 'reportlab' (native, faster)
+CVSAI_PDF_RENDERER = os.getenv('CVSAI_PDF_RENDERER', 'pisa')
+# PDF rendering engine: pool of warm worker processes (0 renders inline)
+CVSAI_PDF_WORKERS = int(os.getenv('CVSAI_PDF_WORKERS', '2'))
+CVSAI_PDF_MAX_QUEUE = int(os.getenv('CVSAI_PDF_MAX_QUEUE', '8'))  # 503 beyond that
+CVSAI_PDF_RENDER_TIMEOUT = int(os.getenv('CVSAI_PDF_RENDER_TIMEOUT', '30'))  # seconds
+CVSAI_PDF_WORKER_MAX_RENDERS = 100  # recycle a worker after N renders
+CVSAI_PDF_RETRY_AFTER = 5  # Retry-After seconds of the 503 response
+# Bulk PDF export (ZIP archives of async exports live in MEDIA_ROOT/pdf_exports)
+CVSAI_PDF_EXPORT_MAX_RESUMES = 5000
+CVSAI_PDF_EXPORT_DIR = 'pdf_exports'
+CVSAI_PDF_EXPORT_TTL = 24 * 3600  # seconds
+CVSAI_PDF_EXPORT_BUSY_TIMEOUT = 120  # seconds an export waits for a busy engine
+# Let the front proxy send stored PDFs: '', 'x-accel-redirect' (nginx, needs an
+# internal location for CVSAI_PDF_SENDFILE_URL) or 'x-sendfile' (Apache)
+CVSAI_PDF_SENDFILE = os.getenv('CVSAI_PDF_SENDFILE', '')
+CVSAI_PDF_SENDFILE_URL = os.getenv('CVSAI_PDF_SENDFILE_URL', '/protected/pdf/')
+# Re-render the PDF in Celery when a resume or its children change.
+# Edits within CVSAI_PDF_PRERENDER_DEBOUNCE seconds collapse into one render.
+CVSAI_PDF_PRERENDER = os.getenv('CVSAI_PDF_PRERENDER', 'True') == 'True'
+CVSAI_PDF_PRERENDER_DEBOUNCE = int(os.getenv('CVSAI_PDF_PRERENDER_DEBOUNCE', '10'))
+
 REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
@@ -161,6 +197,18 @@ EMAIL_USE_TLS = True
 EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', '')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
 DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'noreply@example.com')
+# CV mailing: a Celery worker keeps its SMTP session open between tasks,
+# it is reopened after this many messages or seconds of idleness
+CVSAI_EMAIL_BATCH_SIZE = 50
+CVSAI_EMAIL_IDLE_TIMEOUT = 60
+# a reused session idle for longer than this many seconds gets a NOOP first
+CVSAI_EMAIL_HEALTH_CHECK_AFTER = 5
+EMAIL_TIMEOUT = 30
+CVSAI_EMAIL_MAX_DELIVERIES = 500
+# Bulk resume upsert (POST /api/resumes/bulk/): resumes per request and rows
+# per INSERT/UPDATE query
+CVSAI_BULK_MAX_RESUMES = 1000
+CVSAI_BULK_BATCH_SIZE = 500
 
 # Translation Service Configuration
 TRANSLATION_SERVICE = os.getenv(
@@ -169,9 +217,66 @@ TRANSLATION_SERVICE = os.getenv(
 
 # Google Translate API (free tier: 500k chars/month)
 GOOGLE_TRANSLATE_API_KEY = os.getenv('GOOGLE_TRANSLATE_API_KEY', '')
+GOOGLE_TRANSLATE_URL = os.getenv(
+    'GOOGLE_TRANSLATE_URL', 'https://translation.googleapis.com/language/translate/v2'
+)
 
 # OpenAI API (paid - ~$0.01-0.05 per CV translation)
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY', '')
+OPENAI_API_URL = os.getenv(
+    'OPENAI_API_URL', 'https://api.openai.com/v1/chat/completions'
+)
+
+# Translation memory: provider translations are reused from an in-process
+# LRU, the cache and the TranslationMemoryEntry table
+TRANSLATION_MEMORY_ENABLED = True
+TRANSLATION_MEMORY_TTL = 90 * 24 * 3600  # seconds
+TRANSLATION_MEMORY_LRU_SIZE = 2048
+TRANSLATION_MEMORY_MAX_ENTRIES = 100_000
+
+# Provider requests run concurrently: every provider has a thread pool of
+# max_in_flight threads in a process (and as many keep-alive connections are
+# pooled), a translation must finish within deadline seconds and one request
+# within connect_timeout/read_timeout.
+# rate/burst: requests per second allowed per process (token bucket);
+# after failure_threshold consecutive failures the provider is not called
+# for reset_timeout seconds (circuit breaker)
+TRANSLATION_PROVIDER_LIMITS = {
+    'google': {
+        'max_in_flight': 8,
+        'deadline': 15,
+        'connect_timeout': 3.05,
+        'read_timeout': 10,
+        'rate': 10,
+        'burst': 20,
+        'failure_threshold': 5,
+        'reset_timeout': 30,
+    },
+    'openai': {
+        'max_in_flight': 4,
+        'deadline': 45,
+        'connect_timeout': 3.05,
+        'read_timeout': 30,
+        'rate': 3,
+        'burst': 5,
+        'failure_threshold': 5,
+        'reset_timeout': 30,
+    },
+}
+# Providers tried in order when TRANSLATION_SERVICE fails, e.g.
+# ['google', 'mock']
+TRANSLATION_FALLBACK_CHAIN = []
+# OpenAI: texts over this many tokens are split on paragraphs and sentences
+# and the pieces translated in parallel
+TRANSLATION_CHUNK_TOKENS = 800
+# Retries of failed connects and 429/5xx answers, exponential backoff factor
+TRANSLATION_HTTP_RETRIES = 3
+TRANSLATION_HTTP_BACKOFF = 0.5
+
+# Async translation jobs ({"mode": "async"}): state kept in the cache for
+# TRANSLATION_JOB_TTL seconds, progress reported every N fields
+TRANSLATION_JOB_TTL = 3600
+TRANSLATION_JOB_PROGRESS_STEP = 20
 
 
 try:
@@ -9,6 +9,12 @@ DATABASES["default"] = {
     "ENGINE": "django.db.backends.sqlite3",
     "TEST": {"MIGRATE": False},
 }
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+CVSAI_PDF_WORKERS = 0
 PASSWORD_HASHERS = ("django.contrib.auth.hashers.MD5PasswordHasher",)
 
 INSTALLED_APPS = tuple(